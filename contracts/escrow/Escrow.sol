@@ -4,6 +4,11 @@ pragma solidity ^0.8.0;
 
 
 import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+import "@openzeppelin/contracts/utils/structs/EnumerableSet.sol";
+import "@openzeppelin/contracts/utils/Address.sol";
+import "@openzeppelin/contracts/metatx/ERC2771Context.sol";
+import "../payments/WithdrawalLedger.sol";
 
 
 /** @title Escrow
@@ -14,9 +19,21 @@ import "@openzeppelin/contracts/access/Ownable.sol";
  * If no reaction from buyer after a while, order expires and seller can withdraw funds.
  * Orders can be cancelled by seller or buyer if in an appropriate status.
  * In case of disputes admins decides how to distribute funds
+ * Funds are either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`.
+ * Sellers can also sign orders off-chain (EIP-712), the order is only stored when a buyer initiates it through the
+ * `signatureVerifier` set by the owner, `EscrowSignatures`, see `initiateOrderFor`.
+ * Several calls, e.g. `sendOrder` on many orders, can be batched in one transaction with `multicall`, `msg.sender` is kept.
+ * Repeat counterparties can opt in to netting : their received orders only add to the balance of the pair, each side collects its part at once with `settleNet`.
+ * On rollups, where calldata is the main cost, the lifecycle functions can also be called with packed arguments, see `fallback`.
+ * Calls can be relayed by the trusted forwarder set at deployment (ERC-2771), e.g. `BatchForwarder`, accounts are read with `_msgSender()`.
+ * Disputes can also be settled by the `disputeResolver` set by the owner, e.g. `EscrowDisputeRoots` settling them in bulk from
+ * the Merkle root of the decisions. Both are separate contracts to keep `Escrow` under the contract size limit (EIP-170).
+ * Buyer and seller can also settle an initiated order at once by both signing a release (EIP-712), checked by the
+ * `signatureVerifier`, see `releaseOrder`. A release is bound to the current initiation of the order through its `releaseNonce`.
+ * Settled orders (`RECEIVED`, `EXPIRED`, `RESOLVED`, `CANCELLED`) only keep their status, buyer, seller and `outcome`, the other fields are cleared.
  */
-contract Escrow is Ownable {
-
+contract Escrow is Ownable, WithdrawalLedger, ERC2771Context {
+    using EnumerableSet for EnumerableSet.UintSet;
 
     /// fee charged by admin to handle a dispute
     uint256 public disputeFee;
@@ -24,49 +41,88 @@ contract Escrow is Ownable {
     uint256 public minOrderAmount;
     /// number of blocks for the order to expire after seller send it
     uint256 public numBlocksToExpire; 
-    /// tracks num of orders
-    uint256 public orderCount; 
-    /// Array holding all orders
-    Order[] public orders;
-    /// track all disputed orders by orderId for admin to resolve
-    uint256[] public disputedOrdersId; 
+    /// Array holding all orders, the orderId of an order is its index
+    Order[] private _orders;
+    /// orderIds of the disputed orders waiting for the admin to resolve them, removed once resolved
+    EnumerableSet.UintSet private _openDisputes;
+    /// orderIds created by each seller
+    mapping(address => uint256[]) private _sellerOrders;
+    /// orderIds initiated by each buyer, removed when the buyer cancels, settled orders are kept with their buyer
+    mapping(address => EnumerableSet.UintSet) private _buyerOrders;
+    /// contract allowed to resolve disputes besides the owner, see `settleDispute`, `address(0)` for none
+    address public disputeResolver;
+    /// contract allowed to initiate signed orders and settle signed releases, see `initiateOrderFor` and `releaseOrder`, `address(0)` for none
+    address public signatureVerifier;
+    /// accounts settling their received orders by netting, see `setNetting`
+    mapping(address => bool) public nettingEnabled;
+    /// payouts of netted orders owed to each account of a pair, keyed by the lower then the higher address
+    mapping(address => mapping(address => NetBalance)) private _netBalances;
+
+    /// opcodes of the compact calls, first byte of the calldata, see `fallback`
+    uint8 private constant _OP_CREATE = 0x01;
+    uint8 private constant _OP_INITIATE = 0x02;
+    uint8 private constant _OP_SEND = 0x03;
+    uint8 private constant _OP_RECEIVE = 0x04;
+    uint8 private constant _OP_DISPUTE = 0x05;
+    uint8 private constant _OP_EXPIRE = 0x06;
+    uint8 private constant _OP_CANCEL_BUY = 0x07;
+    uint8 private constant _OP_CANCEL_SELL = 0x08;
+    uint8 private constant _OP_RESOLVE = 0x09;
     
     
     enum OrderStatus {CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
 
-    /// @dev struct representing the order/escrow
+    /// @dev struct representing the order/escrow, packed in 3 storage slots :
+    /// `status`, `sendBlock`, `buyer` and `outcome` / `seller` and `releaseNonce` / `amount` and `deposit`.
+    /// Once settled, `sendBlock`, `amount` and `deposit` are cleared, see `_settle`.
     /// @param sendBlock representing the block when the order was sent by seller.
+    /// @param outcome first 6 bytes of the hash of the settlement, 0 until the order is settled, see `orderOutcome`.
+    /// @param releaseNonce number of times the buyer cancelled the order, signed in releases, see `releaseOrder`.
     struct Order {
         OrderStatus status;
+        uint40 sendBlock;
         address payable buyer;
+        bytes6 outcome;
         address payable seller;
-        uint256 amount;
-        uint256 deposit;
-        uint256 orderId;
-        uint256 sendBlock;
+        uint96 releaseNonce;
+        uint128 amount;
+        uint128 deposit;
+    }
+
+    /// @dev payouts owed to the two accounts of a pair, packed in one storage slot, `low` being the lower address.
+    struct NetBalance {
+        uint128 owedToLow;
+        uint128 owedToHigh;
     }
 
-    event OrderCreated(address _seller, uint256 _amount, uint256 _deposit, uint256 _orderId);
-    event OrderInitiated(address buyer, uint256 _orderId);
-    event OrderSent(uint256 _orderId, uint256 _sendBlock);
-    event OrderReceived(uint256 _orderId);
-    event OrderExpired(uint256 _orderId);
-    event OrderCancelled(address canceller, uint256 _orderId, OrderStatus _statusBeforeCancell);
-    event OrderDisputed(address disputer, uint256 _orderId);
-    event OrderResolved(uint256 _orderId, uint256 buyerRefund, uint256 sellerRefund);
+    /// @dev order events have the orderId as first topic, and the account acting on the order, if any, as second topic.
+    event OrderCreated(uint256 indexed _orderId, address indexed _seller, uint256 _amount, uint256 _deposit);
+    event OrderInitiated(uint256 indexed _orderId, address indexed _buyer);
+    event OrderSent(uint256 indexed _orderId);
+    event OrderReceived(uint256 indexed _orderId, uint256 buyerRefund, uint256 sellerRefund);
+    event OrderExpired(uint256 indexed _orderId, uint256 sellerRefund);
+    event OrderCancelled(uint256 indexed _orderId, address indexed canceller, OrderStatus _statusBeforeCancell, uint256 buyerRefund);
+    event OrderDisputed(uint256 indexed _orderId, address indexed disputer);
+    event OrderResolved(uint256 indexed _orderId, uint256 buyerRefund, uint256 sellerRefund);
+    event DisputeSkipped(uint256 indexed _orderId);
+    event ExpireSkipped(uint256 indexed _orderId);
+    event DisputeResolverSet(address indexed _resolver);
+    event SignatureVerifierSet(address indexed _verifier);
+    event NettingSet(address indexed _account, bool _enabled);
+    event NetSettled(address indexed _account, address indexed _counterparty, uint256 amount);
 
     /**
      * @dev Throws if called by an account other than the buyer of `orders[_orderId]`
      */
     modifier onlyBuyer(uint256 _orderId) {
-        require(orders[_orderId].buyer == msg.sender, 'Only Buyer Allowed');
+        require(_orders[_orderId].buyer == _msgSender(), 'Only Buyer Allowed');
         _;
     }
     /**
      * @dev Throws if called by an account other than the seller of `orders[_orderId]`
      */
     modifier onlySeller(uint256 _orderId) {
-        require(orders[_orderId].seller == msg.sender, 'Only Seller Allowed');
+        require(_orders[_orderId].seller == _msgSender(), 'Only Seller Allowed');
         _;
     }
 
@@ -74,64 +130,319 @@ contract Escrow is Ownable {
      * @dev Throws if called by an account other than the buyer or seller of `orders[_orderId]`
      */
     modifier onlyBuyerOrSeller(uint256 _orderId) {
-        require(orders[_orderId].seller == msg.sender || orders[_orderId].buyer == msg.sender , 'Only Buyer or Seller Allowed');
+        address sender = _msgSender();
+        require(_orders[_orderId].seller == sender || _orders[_orderId].buyer == sender , 'Only Buyer or Seller Allowed');
         _;
     }
 
     /**
      * @dev Initialize the contract settings, and owner to the deployer.
+     * `_trustedForwarder` is the ERC-2771 forwarder allowed to relay calls, `address(0)` for none.
      */
-    constructor(uint256 _minOrderAmount, uint256 _disputeFee, uint256 _numBlocksToExpire)  {
+    constructor(uint256 _minOrderAmount, uint256 _disputeFee, uint256 _numBlocksToExpire, address _trustedForwarder)
+        ERC2771Context(_trustedForwarder)
+    {
         require(_disputeFee < _minOrderAmount, 'Review settings');
         //admin = payable(msg.sender);
         disputeFee = _disputeFee;
         minOrderAmount = _minOrderAmount; 
         numBlocksToExpire = _numBlocksToExpire;
     }
+
+    /**
+     * @dev Receives and executes a batch of function calls on this contract, like OpenZeppelin `Multicall` : each call is
+     * a delegatecall so `msg.sender` is kept, and it is not payable so `msg.value` can't be counted once per call.
+     * When the batch is relayed by the trusted forwarder, its sender is appended to each call too, otherwise `_msgSender()`
+     * would read the end of the call arguments as the sender.
+     */
+    function multicall(bytes[] calldata data) external returns (bytes[] memory results) {
+        bytes memory context;
+        if (isTrustedForwarder(msg.sender)) {
+            context = abi.encodePacked(_msgSender());
+        }
+        results = new bytes[](data.length);
+        for (uint256 i = 0; i < data.length; i++) {
+            results[i] = Address.functionDelegateCall(address(this), abi.encodePacked(data[i], context));
+        }
+        return results;
+    }
+
+    /**
+     * @dev Compact entry point of the lifecycle functions, for rollups where each calldata byte is paid on L1.
+     * The calldata is an opcode byte followed by the packed arguments, orderIds as uint32 and amounts as uint96,
+     * instead of a 4 bytes selector and 32 bytes per argument :
+     * `createOrder` 0x01 | amount | deposit, `initiateOrder` 0x02 | orderId ( payable ), `sendOrder` 0x03, `receiveOrder` 0x04,
+     * `disputeOrder` 0x05, `expireOrder` 0x06, `cancelBuyOrder` 0x07, `cancelSellOrder` 0x08 | orderId,
+     * `resolveDispute` 0x09 | orderId | refundToBuyer. The function is called internally, with the same checks and events.
+     * A payload starting with the selector of a function calls that function instead, see `scripts/escrow_scripts/compact_calls.py`.
+     * Compact calls can be relayed by the trusted forwarder, alone or inside a relayed `multicall` : the payload is read from
+     * `_msgData()`, so the sender appended by the forwarder, or by `multicall`, is not counted in the length checks.
+     */
+    fallback() external payable {
+        bytes calldata data = _msgData();
+        require(data.length > 0, 'Unknown call');
+        uint8 op = uint8(data[0]);
+        require(msg.value == 0 || op == _OP_INITIATE, 'Not payable');
+        if (op == _OP_CREATE) {
+            require(data.length == 25, 'Wrong length');
+            createOrder(_packedArg(data, 1, 96), _packedArg(data, 13, 96));
+        } else if (op == _OP_RESOLVE) {
+            require(data.length == 17, 'Wrong length');
+            resolveDispute(_packedArg(data, 1, 32), _packedArg(data, 5, 96));
+        } else {
+            require(data.length == 5, 'Wrong length');
+            uint256 orderId = _packedArg(data, 1, 32);
+            if (op == _OP_INITIATE) {
+                initiateOrder(orderId);
+            } else if (op == _OP_SEND) {
+                sendOrder(orderId);
+            } else if (op == _OP_RECEIVE) {
+                receiveOrder(orderId);
+            } else if (op == _OP_DISPUTE) {
+                disputeOrder(orderId);
+            } else if (op == _OP_EXPIRE) {
+                expireOrder(orderId);
+            } else if (op == _OP_CANCEL_BUY) {
+                cancelBuyOrder(orderId);
+            } else if (op == _OP_CANCEL_SELL) {
+                cancelSellOrder(orderId);
+            } else {
+                revert('Unknown call');
+            }
+        }
+    }
+
+    /**
+     * @dev Returns the number of orders ever created.
+     */
+    function orderCount() public view returns (uint256) {
+        return _orders.length;
+    }
+
+    /**
+     * @dev Returns the order with `_orderId`, with the same fields and order as the getter of the unpacked layout.
+     */
+    function orders(uint256 _orderId) public view returns (
+        OrderStatus status,
+        address buyer,
+        address seller,
+        uint256 amount,
+        uint256 deposit,
+        uint256 orderId,
+        uint256 sendBlock
+    ) {
+        Order storage order = _orders[_orderId];
+        return (order.status, order.buyer, order.seller, order.amount, order.deposit, _orderId, order.sendBlock);
+    }
+
+    /**
+     * @dev Returns the nonce a `Release` of the order with `_orderId` must be signed with, see `EscrowSignatures.settleCooperatively`.
+     */
+    function releaseNonce(uint256 _orderId) external view returns (uint256) {
+        return _orders[_orderId].releaseNonce;
+    }
+
+    /**
+     * @dev Returns the fingerprint kept for the settled order with `_orderId`, 0 if it is not settled :
+     * the first 6 bytes of `keccak256(abi.encode(orderId, status, buyer, seller, buyerRefund, sellerRefund))`.
+     * It can be checked against the settlement event, the cleared fields are only kept in the events.
+     */
+    function orderOutcome(uint256 _orderId) public view returns (bytes6) {
+        return _orders[_orderId].outcome;
+    }
+
+    /**
+     * @dev Returns the orders with orderIds in `[_start, _start + _count)`, with their orderIds, to read many orders in one call.
+     * If `_statusMask` is not 0 only the orders whose status bit is set are returned, status `s` is bit `1 << s`,
+     * the next page still starts at `_start + _count`.
+     */
+    function getOrders(uint256 _start, uint256 _count, uint256 _statusMask) public view returns (uint256[] memory ids, Order[] memory result) {
+        uint256 end = _pageEnd(_orders.length, _start, _count);
+        uint256 size = end - _start;
+        if (_statusMask != 0) {
+            size = 0;
+            for (uint256 i = _start; i < end; i++) {
+                if (_statusMask & (1 << uint256(_orders[i].status)) != 0) {
+                    size++;
+                }
+            }
+        }
+        ids = new uint256[](size);
+        uint256 n;
+        for (uint256 i = _start; i < end; i++) {
+            if (_statusMask == 0 || _statusMask & (1 << uint256(_orders[i].status)) != 0) {
+                ids[n] = i;
+                n++;
+            }
+        }
+        result = _ordersOf(ids);
+    }
+
+    /**
+     * @dev Returns the number of disputed orders waiting to be resolved.
+     */
+    function openDisputeCount() public view returns (uint256) {
+        return _openDisputes.length();
+    }
+
+    /**
+     * @dev Returns at most `_limit` orderIds of disputed orders waiting to be resolved, starting at `_offset`.
+     * Resolving a dispute moves the last open dispute in its place, so the order of the ids is not stable.
+     */
+    function getOpenDisputes(uint256 _offset, uint256 _limit) public view returns (uint256[] memory ids) {
+        uint256 end = _pageEnd(_openDisputes.length(), _offset, _limit);
+        ids = new uint256[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            ids[i - _offset] = _openDisputes.at(i);
+        }
+    }
+
+    /**
+     * @dev Returns the number of orders created by `_seller`.
+     */
+    function sellerOrderCount(address _seller) public view returns (uint256) {
+        return _sellerOrders[_seller].length;
+    }
+
+    /**
+     * @dev Returns the number of orders initiated by `_buyer`, settled ones included, but not the ones it cancelled.
+     */
+    function buyerOrderCount(address _buyer) public view returns (uint256) {
+        return _buyerOrders[_buyer].length();
+    }
+
+    /**
+     * @dev Returns at most `_limit` orders created by `_seller` starting at `_offset`, with their orderIds.
+     */
+    function getOrdersBySeller(address _seller, uint256 _offset, uint256 _limit) public view returns (uint256[] memory ids, Order[] memory result) {
+        uint256[] storage sellerOrders = _sellerOrders[_seller];
+        uint256 end = _pageEnd(sellerOrders.length, _offset, _limit);
+        ids = new uint256[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            ids[i - _offset] = sellerOrders[i];
+        }
+        result = _ordersOf(ids);
+    }
+
+    /**
+     * @dev Returns at most `_limit` orders initiated by `_buyer` starting at `_offset`, with their orderIds, settled ones included.
+     * Cancelling an order moves the last order of the buyer in its place, so the order of the ids is not stable.
+     */
+    function getOrdersByBuyer(address _buyer, uint256 _offset, uint256 _limit) public view returns (uint256[] memory ids, Order[] memory result) {
+        EnumerableSet.UintSet storage buyerOrders = _buyerOrders[_buyer];
+        uint256 end = _pageEnd(buyerOrders.length(), _offset, _limit);
+        ids = new uint256[](end - _offset);
+        for (uint256 i = _offset; i < end; i++) {
+            ids[i - _offset] = buyerOrders.at(i);
+        }
+        result = _ordersOf(ids);
+    }
+
     /**
      * @dev Creates a new order with status : `CREATED` and append it to the `orders` array.
      */
     function createOrder(uint256 _amount, uint256 _deposit) public {
         require(_amount >= minOrderAmount, 'Order Too Small');
-        Order memory order = Order(OrderStatus.CREATED, payable(address(0)), payable(msg.sender),  _amount, _deposit, orderCount, 0);
-        orders.push(order);
-        emit OrderCreated(msg.sender, _amount, _deposit, orderCount);
-        orderCount++;
-        
+        uint256 orderId = _orders.length;
+        _pushOrder(_msgSender(), _amount, _deposit);
+        emit OrderCreated(orderId, _msgSender(), _amount, _deposit);
+    }
+
+    /**
+     * @dev Creates one order per `_amounts[i]`, `_deposits[i]` pair, each with status : `CREATED`.
+     * `minOrderAmount` is read once for the whole batch.
+     * Emits one `OrderCreated` per order.
+     */
+    function createOrders(uint256[] calldata _amounts, uint256[] calldata _deposits) external {
+        require(_amounts.length == _deposits.length, 'Length mismatch');
+        uint256 minAmount = minOrderAmount;
+        uint256 orderId = _orders.length;
+        address seller = _msgSender();
+        for (uint256 i = 0; i < _amounts.length; i++) {
+            require(_amounts[i] >= minAmount, 'Order Too Small');
+            _pushOrder(seller, _amounts[i], _deposits[i]);
+            emit OrderCreated(orderId, seller, _amounts[i], _deposits[i]);
+            orderId++;
+        }
     }
 
     /**
      * @dev Initiate the escrow order with `_orderId`, and send the funds.
      */
     function initiateOrder(uint256 _orderId) public payable {
-        require(orders[_orderId].status == OrderStatus.CREATED, 'Order already initiated');
-        require(orders[_orderId].buyer == address(0), 'Order already initiated');
-        require(msg.value ==orders[_orderId].amount + orders[_orderId].deposit, 'wrong amount' );
-        orders[_orderId].buyer = payable(msg.sender);
-        orders[_orderId].status = OrderStatus.INITIATED;
-        emit OrderInitiated(msg.sender, _orderId);
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.CREATED, 'Order already initiated');
+        require(order.buyer == address(0), 'Order already initiated');
+        require(msg.value == uint256(order.amount) + order.deposit, 'wrong amount' );
+        address buyer = _msgSender();
+        order.buyer = payable(buyer);
+        order.status = OrderStatus.INITIATED;
+        _buyerOrders[buyer].add(_orderId);
+        emit OrderInitiated(_orderId, buyer);
+    }
+
+    /**
+     * @dev Creates an order sold by `_seller` and initiates it with `_buyer` as buyer, sending the funds.
+     * Only the `signatureVerifier` can call it, after checking the signature of the seller, see `EscrowSignatures`.
+     */
+    function initiateOrderFor(address _seller, uint256 _amount, uint256 _deposit, address _buyer) external payable returns (uint256 orderId) {
+        require(msg.sender == signatureVerifier, 'Only Verifier Allowed');
+        require(_amount >= minOrderAmount, 'Order Too Small');
+        require(msg.value == _amount + _deposit, 'wrong amount' );
+        orderId = _orders.length;
+        Order storage order = _pushOrder(_seller, _amount, _deposit);
+        order.buyer = payable(_buyer);
+        order.status = OrderStatus.INITIATED;
+        _buyerOrders[_buyer].add(orderId);
+        emit OrderCreated(orderId, _seller, _amount, _deposit);
+        emit OrderInitiated(orderId, _buyer);
     }
+
     /**
      * @dev Change status order with `_orderId` to `SENT`. Only the seller of that order can call it.
      */
     function sendOrder(uint256 _orderId) public onlySeller(_orderId) {
-        require(orders[_orderId].status == OrderStatus.INITIATED, "Can't send order now");
-        orders[_orderId].status = OrderStatus.SENT;
-        orders[_orderId].sendBlock = block.number;
-        emit OrderSent(_orderId, block.number);
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't send order now");
+        order.status = OrderStatus.SENT;
+        order.sendBlock = uint40(block.number);
+        emit OrderSent(_orderId);
     }
 
     
     /**
      * @dev Change status order with `_orderId` to `RECEIVED`. Only the buyer of that order can call it.
-     * Releases funds to buyer and seller.
+     * Releases funds to buyer and seller, or adds them to their net balance, see `setNetting`.
      */
     function receiveOrder(uint256 _orderId) public onlyBuyer(_orderId) {
-        require(orders[_orderId].status == OrderStatus.SENT, "Can't receive order now");
-        orders[_orderId].status = OrderStatus.RECEIVED;
-        orders[_orderId].buyer.transfer(orders[_orderId].deposit);
-        orders[_orderId].seller.transfer(orders[_orderId].amount);
-        emit OrderReceived(_orderId);
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't receive order now");
+        address payable buyer = order.buyer;
+        address payable seller = order.seller;
+        uint256 buyerRefund = order.deposit;
+        uint256 sellerRefund = order.amount;
+        _settle(_orderId, OrderStatus.RECEIVED, buyerRefund, sellerRefund);
+        _payReceived(buyer, seller, buyerRefund, sellerRefund);
+        emit OrderReceived(_orderId, buyerRefund, sellerRefund);
+    }
+
+    /**
+     * @dev Change status order with `_orderId` to `RECEIVED` and pays `_payoutBuyer` to the buyer and `_payoutSeller` to the seller,
+     * or adds them to their net balance, see `setNetting`. Only the `signatureVerifier` can call it, after checking the release
+     * signed by both of them, see `EscrowSignatures`.
+     * Can be called if order is in state `INITIATED` or `SENT`, skipping the send and expiry wait. The payouts must add up to
+     * the funds of the order. A `DISPUTED` order is left to the admin, so that its `disputeFee` is always charged.
+     */
+    function releaseOrder(uint256 _orderId, uint256 _payoutBuyer, uint256 _payoutSeller) external {
+        require(msg.sender == signatureVerifier, 'Only Verifier Allowed');
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED || order.status == OrderStatus.SENT, "Can't settle order now");
+        require(_payoutBuyer + _payoutSeller == uint256(order.amount) + order.deposit, 'Wrong payouts');
+        address payable buyer = order.buyer;
+        address payable seller = order.seller;
+        _settle(_orderId, OrderStatus.RECEIVED, _payoutBuyer, _payoutSeller);
+        _payReceived(buyer, seller, _payoutBuyer, _payoutSeller);
+        emit OrderReceived(_orderId, _payoutBuyer, _payoutSeller);
     }
 
     /**
@@ -140,27 +451,53 @@ contract Escrow is Ownable {
      * Release funds to seller, buyer loses deposit.
      */
     function expireOrder(uint256 _orderId) public onlySeller(_orderId) {
-        require(orders[_orderId].status == OrderStatus.SENT, "Order not sent");
-        require(orders[_orderId].sendBlock + numBlocksToExpire < block.number, 'Order not expired yet');
-        uint256 transferAmount = orders[_orderId].deposit + orders[_orderId].amount;
-        orders[_orderId].status = OrderStatus.EXPIRED;
-        orders[_orderId].seller.transfer(transferAmount);
-        emit OrderExpired(_orderId);
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Order not sent");
+        require(order.sendBlock + numBlocksToExpire < block.number, 'Order not expired yet');
+        _pay(order.seller, ETH, _expireOrder(_orderId));
+    }
+
+    /**
+     * @dev Expires each order of `_orderIds` the caller is the seller of, like `expireOrder`, and pays the sum in one transfer.
+     * Orders that can't be expired yet are skipped with an `ExpireSkipped` event instead of reverting the batch.
+     * Returns whether each order was expired.
+     */
+    function expireOrders(uint256[] calldata _orderIds) external returns (bool[] memory expired) {
+        uint256 expiry = numBlocksToExpire;
+        uint256 payout = 0;
+        address seller = _msgSender();
+        expired = new bool[](_orderIds.length);
+        for (uint256 i = 0; i < _orderIds.length; i++) {
+            uint256 orderId = _orderIds[i];
+            if (orderId >= _orders.length
+                || _orders[orderId].seller != seller
+                || _orders[orderId].status != OrderStatus.SENT
+                || _orders[orderId].sendBlock + expiry >= block.number) {
+                emit ExpireSkipped(orderId);
+                continue;
+            }
+            payout += _expireOrder(orderId);
+            expired[i] = true;
+        }
+        _pay(payable(seller), ETH, payout);
     }
 
     /**
      * @dev Change status order with `_orderId` to `CANCELLED`. Only the buyer of that order can call it.
      * Can only be called if order is in state `INITIATED`.
-     * Makes order available again.
+     * Makes order available again, and bumps its `releaseNonce` so releases signed so far can't be used.
      */
     function cancelBuyOrder(uint256 _orderId) public onlyBuyer(_orderId) {
-        require(orders[_orderId].status == OrderStatus.INITIATED, "Can't cancell order now");
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't cancell order now");
         OrderStatus beforeCancell = OrderStatus.INITIATED;
-        uint256 refund = orders[_orderId].amount + orders[_orderId].deposit;
-        orders[_orderId].status = OrderStatus.CREATED;
-        orders[_orderId].buyer = payable(address(0));
-        payable(msg.sender).transfer(refund);
-        emit OrderCancelled(msg.sender, _orderId, beforeCancell);
+        uint256 refund = uint256(order.amount) + order.deposit;
+        order.status = OrderStatus.CREATED;
+        order.buyer = payable(address(0));
+        order.releaseNonce++;
+        _buyerOrders[_msgSender()].remove(_orderId);
+        _pay(payable(_msgSender()), ETH, refund);
+        emit OrderCancelled(_orderId, _msgSender(), beforeCancell, refund);
     }
 
     /**
@@ -169,14 +506,19 @@ contract Escrow is Ownable {
     * If the order is in state `INITIATED` or `SENT` funds are sent back to the buyer.
     */
     function cancelSellOrder(uint256 _orderId) public onlySeller(_orderId) {
-        require(orders[_orderId].status == OrderStatus.CREATED || orders[_orderId].status == OrderStatus.INITIATED || orders[_orderId].status == OrderStatus.SENT, "Can't cancell order now");
-        OrderStatus beforeCancell = orders[_orderId].status;
-        if( orders[_orderId].status == OrderStatus.INITIATED || orders[_orderId].status == OrderStatus.SENT) {
-            uint256 refund = orders[_orderId].amount + orders[_orderId].deposit;
-            orders[_orderId].buyer.transfer(refund);
+        Order storage order = _orders[_orderId];
+        OrderStatus beforeCancell = order.status;
+        require(beforeCancell == OrderStatus.CREATED || beforeCancell == OrderStatus.INITIATED || beforeCancell == OrderStatus.SENT, "Can't cancell order now");
+        address payable buyer = order.buyer;
+        uint256 refund = 0;
+        if( beforeCancell == OrderStatus.INITIATED || beforeCancell == OrderStatus.SENT) {
+            refund = uint256(order.amount) + order.deposit;
+        }
+        _settle(_orderId, OrderStatus.CANCELLED, refund, 0);
+        if (refund > 0) {
+            _pay(buyer, ETH, refund);
         }
-        orders[_orderId].status = OrderStatus.CANCELLED;
-        emit OrderCancelled(msg.sender, _orderId, beforeCancell);
+        emit OrderCancelled(_orderId, _msgSender(), beforeCancell, refund);
     }
 
     /**
@@ -184,29 +526,256 @@ contract Escrow is Ownable {
     * Can only be called if order is in state `SENT`.
     */
     function disputeOrder(uint256 _orderId) public onlyBuyerOrSeller(_orderId) {
-        require(orders[_orderId].status == OrderStatus.SENT, "Can't dispute order now");
-        orders[_orderId].status = OrderStatus.DISPUTED;
-        disputedOrdersId.push(_orderId);
-        emit OrderDisputed(msg.sender, _orderId );
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't dispute order now");
+        order.status = OrderStatus.DISPUTED;
+        _openDisputes.add(_orderId);
+        emit OrderDisputed(_orderId, _msgSender());
     }
 
     /**
     * @dev Change status order with `_orderId` to `RESOLVED`. Only the owner of the contract can call it.
     * Can only be called if order is in state `DISPUTED`.
-    * Owner collect the fee `disputeFee` and release the rest of the funds to buyer and seller.
+    * Owner collect the fee `disputeFee`, added to `accruedFees`, and release the rest of the funds to buyer and seller.
     */
     function resolveDispute(uint256 _orderId,uint256 refundToBuyer) public onlyOwner() {
-        address payable admin = payable(owner());
-        require(orders[_orderId].status == OrderStatus.DISPUTED, 'Cant resolve order');
-        require(refundToBuyer + disputeFee < orders[_orderId].amount + orders[_orderId].deposit, 'High refund' );
-        uint256 refundToSeller = orders[_orderId].amount + orders[_orderId].deposit - refundToBuyer - disputeFee;
-        orders[_orderId].status = OrderStatus.RESOLVED;
-        admin.transfer(disputeFee);
-        orders[_orderId].buyer.transfer(refundToBuyer);
-        orders[_orderId].seller.transfer(refundToSeller);
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.DISPUTED, 'Cant resolve order');
+        require(refundToBuyer + disputeFee < uint256(order.amount) + order.deposit, 'High refund' );
+        _resolveDispute(_orderId, refundToBuyer, disputeFee);
+        _accrueFee(disputeFee);
+    }
+
+    /**
+    * @dev Resolves the dispute of each `_orderIds[i]`, refunding `_refundsToBuyer[i]` to its buyer. Only the owner of the contract can call it.
+    * Orders that are not `DISPUTED` or with a too high refund are skipped with a `DisputeSkipped` event instead of reverting the batch.
+    * The `disputeFee` of all resolved orders is added to `accruedFees` at once.
+    * Returns whether each order was resolved.
+    */
+    function resolveDisputes(uint256[] calldata _orderIds, uint256[] calldata _refundsToBuyer) external onlyOwner() returns (bool[] memory resolved) {
+        require(_orderIds.length == _refundsToBuyer.length, 'Length mismatch');
+        uint256 fee = disputeFee;
+        uint256 fees = 0;
+        resolved = new bool[](_orderIds.length);
+        for (uint256 i = 0; i < _orderIds.length; i++) {
+            uint256 orderId = _orderIds[i];
+            if (orderId >= _orders.length
+                || _orders[orderId].status != OrderStatus.DISPUTED
+                || _refundsToBuyer[i] >= uint256(_orders[orderId].amount) + _orders[orderId].deposit - fee) {
+                emit DisputeSkipped(orderId);
+                continue;
+            }
+            _resolveDispute(orderId, _refundsToBuyer[i], fee);
+            fees += fee;
+            resolved[i] = true;
+        }
+        _accrueFee(fees);
+    }
+
+    /**
+    * @dev Turns netting on or off for the caller. The payouts of an order received between two accounts that both turned it on
+    * ( `receiveOrder` or `releaseOrder` ) are not paid, they are added to the net balance of the pair until one of them
+    * collects its side with `settleNet`, so a pair trading many orders is paid once per side instead of twice per order.
+    */
+    function setNetting(bool _enabled) external {
+        nettingEnabled[_msgSender()] = _enabled;
+        emit NettingSet(_msgSender(), _enabled);
+    }
+
+    /**
+    * @dev Returns what the netted orders between `_account` and `_counterparty` owe to each of them.
+    */
+    function netBalance(address _account, address _counterparty) public view returns (uint256 owedToAccount, uint256 owedToCounterparty) {
+        (address low, address high) = _sortPair(_account, _counterparty);
+        NetBalance memory balance = _netBalances[low][high];
+        if (_account == low) {
+            return (balance.owedToLow, balance.owedToHigh);
+        }
+        return (balance.owedToHigh, balance.owedToLow);
+    }
+
+    /**
+    * @dev Pays the caller what the netted orders with `_counterparty` owe to it, a single payment whatever the number of orders.
+    * Only the side of the caller is paid and cleared, the counterparty collects its own side, so an account rejecting ETH
+    * can't block the payout of the other one. Sent with all the gas available, like `withdraw`, so smart contract wallets can collect.
+    * Works after netting is turned off, for the orders netted before.
+    */
+    function settleNet(address _counterparty) external {
+        address account = _msgSender();
+        (address low, address high) = _sortPair(account, _counterparty);
+        NetBalance storage balance = _netBalances[low][high];
+        uint256 owed;
+        if (account == low) {
+            owed = balance.owedToLow;
+            balance.owedToLow = 0;
+        } else {
+            owed = balance.owedToHigh;
+            balance.owedToHigh = 0;
+        }
+        require(owed > 0, 'Nothing to settle');
+        Address.sendValue(payable(account), owed);
+        emit NetSettled(account, _counterparty, owed);
+    }
+
+    /**
+    * @dev Sets `_resolver` as the contract allowed to resolve disputes with `settleDispute`. Only the owner of the contract can call it.
+    */
+    function setDisputeResolver(address _resolver) external onlyOwner() {
+        disputeResolver = _resolver;
+        emit DisputeResolverSet(_resolver);
+    }
+
+    /**
+    * @dev Sets `_verifier` as the contract allowed to initiate signed orders and settle signed releases, see `initiateOrderFor` and `releaseOrder`. Only the owner of the contract can call it.
+    */
+    function setSignatureVerifier(address _verifier) external onlyOwner() {
+        signatureVerifier = _verifier;
+        emit SignatureVerifierSet(_verifier);
+    }
+
+    /**
+    * @dev Change status order with `_orderId` to `RESOLVED`, refunding `_refundToBuyer` to the buyer and `_refundToSeller` to the seller,
+    * like `resolveDispute` but the whole order can be refunded to either of them. The rest of the funds is the fee of the dispute,
+    * added to `accruedFees` : it is the fee the decision was taken with, so a decision stays valid whatever the current `disputeFee`.
+    * Only the `disputeResolver` can call it, after checking the decision and the caller, see `EscrowDisputeRoots`.
+    */
+    function settleDispute(uint256 _orderId, uint256 _refundToBuyer, uint256 _refundToSeller) external {
+        require(msg.sender == disputeResolver, 'Only Resolver Allowed');
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.DISPUTED, 'Cant resolve order');
+        uint256 funds = uint256(order.amount) + order.deposit;
+        require(_refundToBuyer + _refundToSeller <= funds, 'High refund');
+        uint256 fee = funds - _refundToBuyer - _refundToSeller;
+        _resolveDispute(_orderId, _refundToBuyer, fee);
+        _accrueFee(fee);
+    }
+
+    /**
+     * @dev Returns the sender of the request when relayed by the trusted forwarder, `msg.sender` otherwise.
+     */
+    function _msgSender() internal view override(Context, ERC2771Context) returns (address sender) {
+        return ERC2771Context._msgSender();
+    }
+
+    /**
+     * @dev Returns the calldata without the sender appended by the trusted forwarder.
+     */
+    function _msgData() internal view override(Context, ERC2771Context) returns (bytes calldata) {
+        return ERC2771Context._msgData();
+    }
+
+    /**
+     * @dev Pays the payouts of a received order to `_buyer` and `_seller`, or adds them to the net balance of the pair
+     * if both turned netting on.
+     */
+    function _payReceived(address payable _buyer, address payable _seller, uint256 _buyerPayout, uint256 _sellerPayout) internal {
+        if (_buyer == _seller || !nettingEnabled[_buyer] || !nettingEnabled[_seller]) {
+            _pay(_buyer, ETH, _buyerPayout);
+            _pay(_seller, ETH, _sellerPayout);
+            return;
+        }
+        (address low, address high) = _sortPair(_buyer, _seller);
+        NetBalance memory balance = _netBalances[low][high];
+        (uint256 toLow, uint256 toHigh) = _buyer == low ? (_buyerPayout, _sellerPayout) : (_sellerPayout, _buyerPayout);
+        _netBalances[low][high] = NetBalance(
+            SafeCast.toUint128(balance.owedToLow + toLow),
+            SafeCast.toUint128(balance.owedToHigh + toHigh)
+        );
+    }
+
+    /**
+     * @dev Returns `_a` and `_b` sorted, the key of their pair in `_netBalances`.
+     */
+    function _sortPair(address _a, address _b) private pure returns (address, address) {
+        return _a < _b ? (_a, _b) : (_b, _a);
+    }
+
+    /**
+     * @dev Reads the `_bits` bits big endian unsigned integer starting at byte `_offset` of `_data`.
+     */
+    function _packedArg(bytes calldata _data, uint256 _offset, uint256 _bits) private pure returns (uint256 value) {
+        assembly {
+            value := shr(sub(256, _bits), calldataload(add(_data.offset, _offset)))
+        }
+    }
+
+    /**
+     * @dev Appends an order with status : `CREATED` sold by `_seller`, and adds it to the seller orders.
+     * Only the `seller` and the `amount`/`deposit` slots are written, the `status` slot is left empty.
+     */
+    function _pushOrder(address _seller, uint256 _amount, uint256 _deposit) internal returns (Order storage order) {
+        _sellerOrders[_seller].push(_orders.length);
+        order = _orders.push();
+        order.seller = payable(_seller);
+        order.amount = SafeCast.toUint128(_amount);
+        order.deposit = SafeCast.toUint128(_deposit);
+    }
+
+    /**
+     * @dev Change status of the sent order with `_orderId` to `EXPIRED` and returns the amount owed to the seller.
+     */
+    function _expireOrder(uint256 _orderId) internal returns (uint256 sellerRefund) {
+        Order storage order = _orders[_orderId];
+        sellerRefund = uint256(order.deposit) + order.amount;
+        _settle(_orderId, OrderStatus.EXPIRED, 0, sellerRefund);
+        emit OrderExpired(_orderId, sellerRefund);
+    }
+
+    /**
+     * @dev Change status of the disputed order with `_orderId` to `RESOLVED`, pays `refundToBuyer` to the buyer and the rest,
+     * minus `_fee`, to the seller. The fee is left to the caller.
+     */
+    function _resolveDispute(uint256 _orderId, uint256 refundToBuyer, uint256 _fee) internal {
+        Order storage order = _orders[_orderId];
+        uint256 refundToSeller = uint256(order.amount) + order.deposit - refundToBuyer - _fee;
+        address payable buyer = order.buyer;
+        address payable seller = order.seller;
+        _settle(_orderId, OrderStatus.RESOLVED, refundToBuyer, refundToSeller);
+        _openDisputes.remove(_orderId);
+        _pay(buyer, ETH, refundToBuyer);
+        _pay(seller, ETH, refundToSeller);
         emit OrderResolved(_orderId, refundToBuyer, refundToSeller);
     }
 
+    /**
+     * @dev Moves the order with `_orderId` to the terminal `_status` and clears the fields that are no longer needed :
+     * `sendBlock` is zeroed and the `amount`/`deposit` slot is deleted, which refunds gas.
+     * `status`, `buyer`, `seller` and `outcome` are kept, `outcome` being the fingerprint described in `orderOutcome`.
+     * The buyer shares its slot with `status` and `outcome`, which are written anyway, so keeping it costs nothing, and
+     * the order stays consistent with `getOrdersByBuyer`, which keeps settled orders.
+     * Must be called before paying, the caller reads what it needs from the order first.
+     */
+    function _settle(uint256 _orderId, OrderStatus _status, uint256 _buyerRefund, uint256 _sellerRefund) internal {
+        Order storage order = _orders[_orderId];
+        order.outcome = bytes6(keccak256(abi.encode(_orderId, _status, order.buyer, order.seller, _buyerRefund, _sellerRefund)));
+        order.status = _status;
+        order.sendBlock = 0;
+        delete order.amount;
+        delete order.deposit;
+    }
+
+    /**
+     * @dev Returns the orders with orderIds `_ids`, the single copy of orders to memory shared by the getters.
+     */
+    function _ordersOf(uint256[] memory _ids) internal view returns (Order[] memory result) {
+        result = new Order[](_ids.length);
+        for (uint256 i = 0; i < _ids.length; i++) {
+            result[i] = _orders[_ids[i]];
+        }
+    }
+
+    /**
+     * @dev Returns the end of the page starting at `_offset` of a list of `_length` items, `_offset` when out of range.
+     */
+    function _pageEnd(uint256 _length, uint256 _offset, uint256 _limit) internal pure returns (uint256) {
+        if (_offset >= _length) {
+            return _offset;
+        }
+        if (_limit > _length - _offset) {
+            return _length;
+        }
+        return _offset + _limit;
+    }
 
   
 
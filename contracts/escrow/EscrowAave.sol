@@ -1,10 +1,13 @@
 // SPDX-License-Identifier: MIT
 
 pragma solidity ^0.6.0;
+pragma experimental ABIEncoderV2;
 
 import '../../interfaces/ILendingPool.sol';
 import '../../interfaces/IERC20.sol';
+import '../../interfaces/IERC20Permit.sol';
 import '../access/Ownable.sol';
+import '../utils/Multicall.sol';
 
 /** @title EscrowAave
  *  @dev This contract implement a simple Escrow contract of an ERC20 token.
@@ -16,9 +19,11 @@ import '../access/Ownable.sol';
  * `adminFee` to the owner.
  * If no reaction from buyer after a while, order expires and seller can withdraw funds.
  * In case of disputes admins decides how to distribute funds
+ * Can be deployed directly or cloned by `EscrowFactory`, `initialize` then replaces the constructor.
+ * Calls can be batched with `multicall`, `msg.sender` is kept.
  */
 
-contract EscrowAave is Ownable  {
+contract EscrowAave is Ownable, Multicall  {
 
 
     address payable public buyer;
@@ -33,13 +38,14 @@ contract EscrowAave is Ownable  {
     enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
 
   
-    event OrderCreated(address _seller, uint256 _amount);
-    event OrderInitiated(address _buyer );
-    event OrderSent(uint256 _sendBlock );
-    event OrderReceived( );
-    event OrderExpired( );
-    event OrderCancelled(address canceller );
-    event OrderDisputed(address disputer);
+    /// @dev the escrow address identifies the order, seller and buyer are indexed to filter the escrows of an account.
+    event OrderCreated(address indexed _seller, uint256 _amount);
+    event OrderInitiated(address indexed _buyer);
+    event OrderSent();
+    event OrderReceived();
+    event OrderExpired();
+    event OrderCancelled(address indexed canceller);
+    event OrderDisputed(address indexed disputer);
     event OrderResolved(bool refundBuyer);
 
     /**
@@ -72,10 +78,21 @@ contract EscrowAave is Ownable  {
      * and owner to the deployer.
      */
     constructor(address _token, address _lendingPoolAddress) public {
-        status = OrderStatus.BLANK;
+        initialize(_token, _lendingPoolAddress, msg.sender);
+    }
+
+    /**
+     * @dev Initialize the contract settings : `token` and `lendingPool`, and owner to `_owner`.
+     * The lending pool is approved once for all deposits.
+     * Called by the constructor, or once on a clone deployed by `EscrowFactory`.
+     */
+    function initialize(address _token, address _lendingPoolAddress, address _owner) public {
+        require(address(lendingPool) == address(0), 'Already initialized');
+        require(_lendingPoolAddress != address(0), 'Lending pool must be set');
         token = _token;
         lendingPool = ILendingPool(_lendingPoolAddress);
-
+        _transferOwnership(_owner);
+        IERC20(_token).approve(_lendingPoolAddress, type(uint256).max);
     }
 
     /**
@@ -98,16 +115,24 @@ contract EscrowAave is Ownable  {
      */
     function initiateOrder() public payable {
         require(status == OrderStatus.CREATED, 'Cant Initiate with the current status');
-        uint256 allowance = IERC20(token).allowance(msg.sender, address(this));
-        require(allowance >= amount, "Check the token allowance");
         IERC20(token).transferFrom(msg.sender, address(this), amount);
         buyer = payable(msg.sender);
         status = OrderStatus.INITIATED;
         emit OrderInitiated(msg.sender);
-        IERC20(token).approve(address(lendingPool), amount);
         lendingPool.deposit(token, amount, address(this),0);
     }
 
+    /**
+     * @dev Same as `initiateOrder` but approves the escrow with an EIP-2612 `permit` signed by the buyer,
+     * so the buyer needs a single transaction. `token` must support `permit`.
+     * A failing `permit` is ignored : anyone can submit the signed permit first from the mempool, which uses its nonce,
+     * the order is then initiated with the allowance it set, and `initiateOrder` throws if there is no allowance.
+     */
+    function initiateOrderWithPermit(uint256 _deadline, uint8 _v, bytes32 _r, bytes32 _s) public payable {
+        try IERC20Permit(token).permit(msg.sender, address(this), amount, _deadline, _v, _r, _s) {} catch {}
+        initiateOrder();
+    }
+
     /**
      * @dev Change the order status to `SENT`. Only the seller can call it.
      */
@@ -115,7 +140,7 @@ contract EscrowAave is Ownable  {
         require(status == OrderStatus.INITIATED, "Can't send order now");
         status = OrderStatus.SENT;
         sendBlock = block.number;
-        emit OrderSent(sendBlock);
+        emit OrderSent();
     }
 
     
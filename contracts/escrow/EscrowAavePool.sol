@@ -0,0 +1,345 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.6.0;
+pragma experimental ABIEncoderV2;
+
+import '../../interfaces/ILendingPool.sol';
+import '../access/Ownable.sol';
+import '../utils/Multicall.sol';
+import {IERC20} from '@aave/contracts/dependencies/openzeppelin/contracts/IERC20.sol';
+import {SafeERC20} from '@aave/contracts/dependencies/openzeppelin/contracts/SafeERC20.sol';
+import {SafeMath} from '@aave/contracts/dependencies/openzeppelin/contracts/SafeMath.sol';
+import {WadRayMath} from '@aave/contracts/protocol/libraries/math/WadRayMath.sol';
+
+/** @title EscrowAavePool
+ *  @dev Multi-order version of `EscrowAave` : all orders of `token` share a single aToken position.
+ * Each initiated order holds shares of the position, the whole position ( idle buffer + aTokens ) is split
+ * between shares so the yield of Aave is distributed pro rata to the orders, like the liquidity index of Aave
+ * for aToken holders.
+ * Buyer funds are buffered in the contract and deposited in Aave in bulk once the buffer reaches `depositThreshold`,
+ * instead of one deposit per order. Settlement pays the order's shares, amount plus yield, from the buffer when it can
+ * and withdraws only the missing part from Aave otherwise.
+ * Process : Admin deploy contract. Seller create an order, sets amount, blockExpiry for the buyer.
+ * Buyer initiate the escrow by paying. Seller sends order, buyer receives, seller gets the order value.
+ * If no reaction from buyer after a while, order expires and seller can withdraw funds.
+ * In case of disputes admins decides who gets the funds.
+ * The position is tracked in `scaledDeposits`, the aTokens deposited by the contract scaled by the liquidity index of Aave,
+ * never with the aToken balance, so aTokens or tokens sent to the contract directly are ignored and can't inflate the share price.
+ * Shares are priced with `VIRTUAL_SHARES` and `VIRTUAL_ASSETS` added to the position, like OpenZeppelin's ERC4626, so the
+ * first orders can't make the shares of the next orders round down.
+ * Calls on many orders can be batched with `multicall`, `msg.sender` is kept.
+ */
+contract EscrowAavePool is Ownable, Multicall  {
+    using SafeMath for uint256;
+    using SafeERC20 for IERC20;
+    using WadRayMath for uint256;
+
+
+    /// ERC20 token of the orders
+    address public token;
+    /// Aave Lending pool to deposit tokens
+    ILendingPool public lendingPool;
+    /// aToken of `token` held by the contract
+    IERC20 public aToken;
+    /// buffered tokens are deposited in Aave once they reach this amount
+    uint256 public depositThreshold;
+    /// tokens of initiated orders not yet deposited in Aave
+    uint256 public bufferedAmount;
+    /// shares of all orders holding funds
+    uint256 public totalShares;
+    /// aTokens deposited by the contract and not withdrawn yet, scaled by the liquidity index, see `totalAssets`
+    uint256 public scaledDeposits;
+    /// shares and assets added to the position when pricing shares, they are owned by no order
+    uint256 public constant VIRTUAL_SHARES = 1e3;
+    uint256 public constant VIRTUAL_ASSETS = 1;
+    /// Array holding all orders, the orderId of an order is its index
+    Order[] private _orders;
+
+    enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
+
+    /// @dev struct representing an order, packed in 3 storage slots.
+    /// @param shares of the pooled position owned by the order once initiated.
+    struct Order {
+        OrderStatus status;
+        uint40 sendBlock;
+        uint40 numBlocksToExpire;
+        address payable buyer;
+        address payable seller;
+        uint128 amount;
+        uint128 shares;
+    }
+
+    /// @dev order events have the orderId as first topic, and the account acting on the order, if any, as second topic.
+    event OrderCreated(uint256 indexed _orderId, address indexed _seller, uint256 _amount);
+    event OrderInitiated(uint256 indexed _orderId, address indexed _buyer, uint256 _shares);
+    event OrderSent(uint256 indexed _orderId);
+    event OrderReceived(uint256 indexed _orderId);
+    event OrderExpired(uint256 indexed _orderId);
+    event OrderDisputed(uint256 indexed _orderId, address indexed disputer);
+    event OrderResolved(uint256 indexed _orderId, bool refundBuyer);
+    event OrderPaid(uint256 indexed _orderId, address indexed _to, uint256 _amount);
+    event BufferDeposited(uint256 _amount);
+    event DepositThresholdSet(uint256 _depositThreshold);
+
+    /**
+     * @dev Throws if called by an account other than the buyer of `orders[_orderId]`
+     */
+    modifier onlyBuyer(uint256 _orderId) {
+        require(_orders[_orderId].buyer == msg.sender, 'Only Buyer Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the seller of `orders[_orderId]`
+     */
+    modifier onlySeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender, 'Only Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the buyer or seller of `orders[_orderId]`
+     */
+    modifier onlyBuyerOrSeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender || _orders[_orderId].buyer == msg.sender, 'Only Buyer or Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Initialize the contract settings : `token`, `lendingPool`, its `aToken` and `depositThreshold`,
+     * and owner to the deployer. The lending pool is approved once for all deposits.
+     */
+    constructor(address _token, address _lendingPoolAddress, uint256 _depositThreshold) public {
+        require(_lendingPoolAddress != address(0), 'Lending pool must be set');
+        token = _token;
+        lendingPool = ILendingPool(_lendingPoolAddress);
+        aToken = IERC20(lendingPool.getReserveData(_token).aTokenAddress);
+        require(address(aToken) != address(0), 'Token not listed on the lending pool');
+        depositThreshold = _depositThreshold;
+        IERC20(_token).safeApprove(_lendingPoolAddress, type(uint256).max);
+    }
+
+    /**
+     * @dev Returns the number of orders ever created.
+     */
+    function orderCount() public view returns (uint256) {
+        return _orders.length;
+    }
+
+    /**
+     * @dev Returns the order with `_orderId`.
+     */
+    function orders(uint256 _orderId) public view returns (
+        OrderStatus status,
+        address buyer,
+        address seller,
+        uint256 amount,
+        uint256 shares,
+        uint256 sendBlock,
+        uint256 numBlocksToExpire
+    ) {
+        Order storage order = _orders[_orderId];
+        return (order.status, order.buyer, order.seller, order.amount, order.shares, order.sendBlock, order.numBlocksToExpire);
+    }
+
+    /**
+     * @dev Returns the tokens held for all orders : buffer and the aTokens deposited by the contract, with their yield.
+     */
+    function totalAssets() public view returns (uint256) {
+        return bufferedAmount.add(scaledDeposits.rayMul(lendingPool.getReserveNormalizedIncome(token)));
+    }
+
+    /**
+     * @dev Returns the tokens the order with `_orderId` would be paid now : its amount plus accrued yield.
+     */
+    function orderValue(uint256 _orderId) public view returns (uint256) {
+        uint256 shares = _orders[_orderId].shares;
+        if (shares == 0) {
+            return 0;
+        }
+        if (shares == totalShares) {
+            return totalAssets();
+        }
+        return _sharesValue(shares, totalAssets());
+    }
+
+    /**
+     * @dev Sets `depositThreshold`. Only the owner can call it.
+     */
+    function setDepositThreshold(uint256 _depositThreshold) public onlyOwner() {
+        depositThreshold = _depositThreshold;
+        emit DepositThresholdSet(_depositThreshold);
+    }
+
+    /**
+     * @dev Creates a new order with status : `CREATED` and append it to the orders. Returns its orderId.
+     */
+    function createOrder(uint256 _amount, uint256 _numBlocksToExpire) public returns (uint256 orderId) {
+        require(_amount > 0, 'Amount must be positive');
+        require(_amount <= type(uint128).max, 'Amount too big');
+        require(_numBlocksToExpire <= type(uint40).max, 'Expiry too long');
+        orderId = _orders.length;
+        _orders.push();
+        Order storage order = _orders[orderId];
+        order.status = OrderStatus.CREATED;
+        order.numBlocksToExpire = uint40(_numBlocksToExpire);
+        order.seller = payable(msg.sender);
+        order.amount = uint128(_amount);
+        emit OrderCreated(orderId, msg.sender, _amount);
+    }
+
+    /**
+     * @dev Initiate the escrow order with `_orderId` and send the funds.
+     * Can only be called if the order state is `CREATED`
+     * The order gets shares of the position worth its amount, funds are buffered and the buffer deposited to Aave
+     * if it reached `depositThreshold`.
+     */
+    function initiateOrder(uint256 _orderId) public {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.CREATED, 'Cant Initiate with the current status');
+        uint256 amount = order.amount;
+        uint256 shares = amount.mul(totalShares.add(VIRTUAL_SHARES)).div(totalAssets().add(VIRTUAL_ASSETS));
+        require(shares > 0, 'Order Too Small');
+        order.buyer = payable(msg.sender);
+        order.status = OrderStatus.INITIATED;
+        order.shares = uint128(shares);
+        totalShares = totalShares.add(shares);
+        bufferedAmount = bufferedAmount.add(amount);
+        emit OrderInitiated(_orderId, msg.sender, shares);
+        _collect(msg.sender, amount);
+        if (bufferedAmount >= depositThreshold) {
+            _depositBuffer();
+        }
+    }
+
+    /**
+     * @dev Deposits the whole buffer to Aave, whatever its size. Anyone can call it.
+     */
+    function depositBuffer() public {
+        require(bufferedAmount > 0, 'Nothing to deposit');
+        _depositBuffer();
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `SENT`. Only the seller can call it.
+     */
+    function sendOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't send order now");
+        order.status = OrderStatus.SENT;
+        order.sendBlock = uint40(block.number);
+        emit OrderSent(_orderId);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `RECEIVED`. Only the buyer can call it.
+     * Pays the order value to the seller.
+     * Can only be called if the order status is `SENT`
+     */
+    function receiveOrder(uint256 _orderId) public onlyBuyer(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't receive order now");
+        order.status = OrderStatus.RECEIVED;
+        emit OrderReceived(_orderId);
+        _releaseOrder(_orderId, order.seller);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `EXPIRED`. Only the seller of that order can call it.
+     * Can only be called if time after sending the order is bigger than its `numBlocksToExpire` .
+     * Can only be called if the order status is `SENT`.
+     * Pays the order value to the seller.
+     */
+    function expireOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Order not sent");
+        require(uint256(order.sendBlock).add(order.numBlocksToExpire) < block.number, 'Order not expired yet');
+        order.status = OrderStatus.EXPIRED;
+        emit OrderExpired(_orderId);
+        _releaseOrder(_orderId, order.seller);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `DISPUTED`. Only the seller or buyer of that order can call it.
+    * Can only be called if order is in state `SENT`.
+    */
+    function disputeOrder(uint256 _orderId) public onlyBuyerOrSeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't dispute order now");
+        order.status = OrderStatus.DISPUTED;
+        emit OrderDisputed(_orderId, msg.sender);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `RESOLVED`. Only the owner of the contract can call it.
+    * Can only be called if order is in state `DISPUTED`.
+    * Pays the order value to the buyer if `refundBuyer`, to the seller otherwise.
+    */
+    function resolveDispute(uint256 _orderId, bool refundBuyer) public onlyOwner() {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.DISPUTED, 'Cant resolve order');
+        order.status = OrderStatus.RESOLVED;
+        emit OrderResolved(_orderId, refundBuyer);
+        _releaseOrder(_orderId, refundBuyer ? order.buyer : order.seller);
+    }
+
+    /**
+     * @dev Deposits `bufferedAmount` to Aave.
+     */
+    function _depositBuffer() internal {
+        uint256 amount = bufferedAmount;
+        bufferedAmount = 0;
+        scaledDeposits = scaledDeposits.add(amount.rayDiv(lendingPool.getReserveNormalizedIncome(token)));
+        lendingPool.deposit(token, amount, address(this), 0);
+        emit BufferDeposited(amount);
+    }
+
+    /**
+     * @dev Burns the shares of order with `_orderId` and pays their value to `_to`, from the buffer first
+     * and withdrawing the rest from Aave. The last order is paid the whole position, so the virtual assets leave no dust,
+     * aTokens the contract did not deposit itself stay in the contract.
+     */
+    function _releaseOrder(uint256 _orderId, address payable _to) internal {
+        Order storage order = _orders[_orderId];
+        uint256 shares = order.shares;
+        uint256 buffered = bufferedAmount;
+        uint256 index = lendingPool.getReserveNormalizedIncome(token);
+        uint256 deposited = scaledDeposits.rayMul(index);
+        bool lastOrder = shares == totalShares;
+        uint256 assets = lastOrder ? buffered.add(deposited) : _sharesValue(shares, buffered.add(deposited));
+        order.shares = 0;
+        totalShares = totalShares.sub(shares);
+        emit OrderPaid(_orderId, _to, assets);
+        if (assets <= buffered) {
+            bufferedAmount = buffered - assets;
+            IERC20(token).safeTransfer(_to, assets);
+        } else {
+            bufferedAmount = 0;
+            if (buffered > 0) {
+                IERC20(token).safeTransfer(_to, buffered);
+            }
+            uint256 withdrawn = assets - buffered;
+            uint256 scaledWithdrawn = withdrawn.rayDiv(index);
+            scaledDeposits = lastOrder || scaledWithdrawn >= scaledDeposits ? 0 : scaledDeposits - scaledWithdrawn;
+            lendingPool.withdraw(token, withdrawn, _to);
+        }
+    }
+
+    /**
+     * @dev Returns the tokens `_shares` are worth out of `_assets`, counting `VIRTUAL_SHARES` and `VIRTUAL_ASSETS`.
+     */
+    function _sharesValue(uint256 _shares, uint256 _assets) internal view returns (uint256) {
+        return _shares.mul(_assets.add(VIRTUAL_ASSETS)).div(totalShares.add(VIRTUAL_SHARES));
+    }
+
+    /**
+     * @dev Transfers `_amount` of `token` from `_from` to the contract, throws unless the contract received exactly `_amount`.
+     */
+    function _collect(address _from, uint256 _amount) internal {
+        uint256 balanceBefore = IERC20(token).balanceOf(address(this));
+        IERC20(token).safeTransferFrom(_from, address(this), _amount);
+        require(IERC20(token).balanceOf(address(this)).sub(balanceBefore) == _amount, 'Fee on transfer token');
+    }
+
+
+}
@@ -0,0 +1,107 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/cryptography/MerkleProof.sol";
+import "@openzeppelin/contracts/metatx/ERC2771Context.sol";
+import "../../interfaces/IEscrow.sol";
+
+
+/** @title EscrowDisputeRoots
+ *  @dev Settles a backlog of disputes of an `Escrow` in bulk, kept out of `Escrow` to stay under the contract size limit.
+ * The owner posts the Merkle root of its decisions, leaves being `keccak256(abi.encode(orderId, refundToBuyer, refundToSeller))`,
+ * and each order is then claimed by its buyer or seller, which resolves it on the escrow through `settleDispute`.
+ * The funds of the order left after the refunds are the fee of the dispute, committed by the leaf.
+ * The escrow owner sets this contract as `disputeResolver` of the escrow.
+ * Roots can be revoked, so a decision is changed by posting a new root and revoking the old one.
+ * Claims can be relayed by the trusted forwarder of the escrow (ERC-2771).
+ */
+contract EscrowDisputeRoots is Ownable, ERC2771Context {
+
+    /// escrow whose disputes are settled
+    IEscrow public immutable escrow;
+    /// Merkle roots of dispute decisions posted by the owner, revoked roots are set to 0, see `revokeDisputeRoot`
+    bytes32[] public disputeRoots;
+
+    event DisputeRootPosted(uint256 indexed _rootId, bytes32 _root);
+    event DisputeRootRevoked(uint256 indexed _rootId);
+
+    /**
+     * @dev Sets the escrow whose disputes are settled, and owner to the deployer.
+     * `_trustedForwarder` is the ERC-2771 forwarder allowed to relay claims, `address(0)` for none.
+     */
+    constructor(address _escrow, address _trustedForwarder) ERC2771Context(_trustedForwarder) {
+        escrow = IEscrow(_escrow);
+    }
+
+    /**
+    * @dev Posts `_root`, the Merkle root of dispute decisions, and returns its rootId. Only the owner of the contract can call it.
+    * The cost does not depend on the number of decisions, each order is then settled by `claimDisputeResolution`.
+    * An order must only be in one root that is not revoked, the first claim settles it : to change a decision, post
+    * a new root and revoke the old one with `revokeDisputeRoot`.
+    */
+    function postDisputeRoot(bytes32 _root) external onlyOwner() returns (uint256 rootId) {
+        require(_root != bytes32(0), 'Invalid root');
+        rootId = disputeRoots.length;
+        disputeRoots.push(_root);
+        emit DisputeRootPosted(rootId, _root);
+    }
+
+    /**
+    * @dev Revokes root `_rootId`, its decisions can't be claimed anymore. Only the owner of the contract can call it.
+    * Orders already claimed from it stay settled.
+    */
+    function revokeDisputeRoot(uint256 _rootId) external onlyOwner() {
+        require(disputeRoots[_rootId] != bytes32(0), 'Root already revoked');
+        disputeRoots[_rootId] = bytes32(0);
+        emit DisputeRootRevoked(_rootId);
+    }
+
+    /**
+    * @dev Returns the number of dispute roots posted, revoked ones included.
+    */
+    function disputeRootCount() public view returns (uint256) {
+        return disputeRoots.length;
+    }
+
+    /**
+    * @dev Settles the disputed order with `_orderId` as decided in root `_rootId`, `_proof` being the Merkle proof of
+    * its leaf `(orderId, refundToBuyer, refundToSeller)`. Only the buyer or seller of that order can call it.
+    * Root `_rootId` must not be revoked.
+    * The rest of the funds of the order, after the refunds, is the fee committed by the leaf, the escrow adds it to its `accruedFees`.
+    * It is not checked against the current `disputeFee` of the escrow, so the decisions of a root stay claimable if the fee changes.
+    * The order becomes `RESOLVED`, so it can only be claimed once.
+    */
+    function claimDisputeResolution(
+        uint256 _rootId,
+        uint256 _orderId,
+        uint256 _refundToBuyer,
+        uint256 _refundToSeller,
+        bytes32[] calldata _proof
+    ) external {
+        (, address buyer, address seller, , , , ) = escrow.orders(_orderId);
+        address sender = _msgSender();
+        require(sender == buyer || sender == seller, 'Only Buyer or Seller Allowed');
+        bytes32 root = disputeRoots[_rootId];
+        require(root != bytes32(0), 'Root revoked');
+        bytes32 leaf = keccak256(abi.encode(_orderId, _refundToBuyer, _refundToSeller));
+        require(MerkleProof.verify(_proof, root, leaf), 'Invalid proof');
+        escrow.settleDispute(_orderId, _refundToBuyer, _refundToSeller);
+    }
+
+    /**
+     * @dev Returns the sender of the request when relayed by the trusted forwarder, `msg.sender` otherwise.
+     */
+    function _msgSender() internal view override(Context, ERC2771Context) returns (address sender) {
+        return ERC2771Context._msgSender();
+    }
+
+    /**
+     * @dev Returns the calldata without the sender appended by the trusted forwarder.
+     */
+    function _msgData() internal view override(Context, ERC2771Context) returns (bytes calldata) {
+        return ERC2771Context._msgData();
+    }
+}
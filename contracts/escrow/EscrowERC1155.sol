@@ -0,0 +1,268 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/token/ERC1155/IERC1155.sol";
+import "@openzeppelin/contracts/token/ERC1155/utils/ERC1155Receiver.sol";
+import "@openzeppelin/contracts/proxy/utils/Initializable.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
+
+/** @title EscrowERC1155
+ *  @dev This contract implement a simple Escrow contract of a set of ERC1155 tokens, e.g. game items.
+ * Same process as `EscrowERC721` : Seller create an order, sets token, tokenIds, amounts and deposit in ETH, blockExpiry for the buyer.
+ * Buyer initiate the escrow by sending the items. Seller sends order, buyer receives. Contract release funds, `deposit` to buyer,
+ * items to seller and `adminFee` to the owner, the fees accrue in `accruedFees` until the owner withdraws them, see `FeeLedger`.
+ * All the items of the order move in a single `safeBatchTransferFrom` on initiation and on settlement, whatever their number.
+ * The contract only accepts the ERC1155 transfers it makes itself, tokens sent to it directly are rejected by `onERC1155BatchReceived`.
+ * ETH is either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`. The items are always transferred.
+ * Can be deployed directly or cloned by `EscrowFactory`, `initialize` then replaces the constructor.
+ * Calls can be batched with `multicall`, `msg.sender` is kept.
+ */
+contract EscrowERC1155 is Ownable, WithdrawalLedger, Initializable, Multicall, ERC1155Receiver {
+
+
+    /// PUBLIC VARAIBLES
+    OrderStatus public status;
+    address payable public buyer;
+    address payable public seller;
+    /// ERC1155 token address
+    address public tokenContract;
+    uint256 public adminFee;
+    uint256 public deposit;
+    uint256 public sendBlock;
+    uint256 public numBlocksToExpire;
+    /// ids of the escrowed tokens and amount of each id, see `getItems`
+    uint256[] private _tokenIds;
+    uint256[] private _amounts;
+
+    enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
+
+
+    /// @dev the escrow address identifies the order, seller, buyer and token are indexed to filter the escrows of an account.
+    event OrderCreated(address indexed _seller, address indexed tokenContract, uint256[] tokenIds, uint256[] amounts, uint256 _deposit);
+    event OrderInitiated(address indexed _buyer);
+    event OrderSent();
+    event OrderReceived();
+    event OrderExpired();
+    event OrderCancelled(address indexed canceller);
+    event OrderDisputed(address indexed disputer);
+    event OrderResolved(bool buyerRefundToken,  bool buyerRefundDposit);
+
+    /**
+     * @dev Throws if called by an account other than the buyer
+     */
+    modifier onlyBuyer() {
+        require(buyer == msg.sender, 'Only Buyer Allowed');
+        _;
+    }
+    /**
+     * @dev Throws if called by an account other than the seller
+     */
+    modifier onlySeller() {
+        require(seller == msg.sender, 'Only Seller Allowed');
+        _;
+    }
+    /**
+     * @dev Throws if called by an account other than the buyer or seller
+     */
+    modifier onlyBuyerOrSeller() {
+        require(seller == msg.sender || buyer == msg.sender, 'Only Buyer or Seller Allowed');
+        _;
+    }
+
+     /**
+     * @dev Initialize the contract settings, and owner to the deployer.
+     */
+    constructor(uint256 _adminFee)  {
+        initialize(_adminFee, msg.sender);
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to `_owner`. Called by the constructor, or once on a clone.
+     */
+    function initialize(uint256 _adminFee, address _owner) public initializer {
+        numBlocksToExpire = 1;
+        adminFee = _adminFee;
+        _transferOwnership(_owner);
+    }
+
+    /**
+     * @dev Returns the escrowed token ids and the amount of each id.
+     */
+    function getItems() public view returns (uint256[] memory tokenIds, uint256[] memory amounts) {
+        return (_tokenIds, _amounts);
+    }
+
+    /**
+     * @dev Creates a new order with status : `CREATED` and sets the escrow contract settings : token address, token ids and amounts.
+     * Can only be called is contract state is BLANK
+     */
+    function createOrder(
+        address _tokenContract,
+        uint256[] calldata _ids,
+        uint256[] calldata _itemAmounts,
+        uint256 _deposit,
+        uint256 _numBlocksToExpire
+    ) public {
+        require(seller == address(0), 'Order already Created');
+        require(status == OrderStatus.BLANK, 'Cant create with the current status');
+        require(_ids.length > 0 && _ids.length == _itemAmounts.length, 'Wrong items');
+        tokenContract = _tokenContract;
+        _tokenIds = _ids;
+        _amounts = _itemAmounts;
+        deposit = _deposit;
+        seller = payable(msg.sender);
+        numBlocksToExpire = _numBlocksToExpire;
+
+        status = OrderStatus.CREATED;
+        emit OrderCreated(msg.sender, _tokenContract, _ids, _itemAmounts, _deposit);
+    }
+
+    /**
+     * @dev Initiate the escrow and send the items, in one batch transfer, and funds.
+     * The buyer must have approved this contract with `setApprovalForAll`.
+     * Can only be called if the order state is `CREATED`
+     */
+    function initiateOrder() public payable {
+        require(buyer == address(0), 'Buyer already exists');
+        require(status == OrderStatus.CREATED, 'Cant create with the current status');
+        require(msg.value == adminFee+ deposit, 'Not enough fund for fee and deposit' );
+
+        buyer = payable(msg.sender);
+        status = OrderStatus.INITIATED;
+        emit OrderInitiated(msg.sender);
+        IERC1155(tokenContract).safeBatchTransferFrom(msg.sender, address(this), _tokenIds, _amounts, "");
+    }
+
+    /**
+     * @dev Change the order status to `SENT`. Only the seller can call it.
+     * Can only be called if status is `INITIATED`
+     */
+    function sendOrder() public onlySeller() {
+        require(status == OrderStatus.INITIATED, "Can't send order now");
+        status = OrderStatus.SENT;
+        sendBlock = block.number;
+        emit OrderSent();
+    }
+
+
+    /**
+     * @dev Change the order status to `RECEIVED`. Only the buyer can call it.
+     * Releases items and funds to buyer and seller and admin.
+     * Can only be called if the order status is `SENT`
+     */
+    function receiveOrder( ) public onlyBuyer() {
+        require(status == OrderStatus.SENT, "Can't receive order now");
+        status = OrderStatus.RECEIVED;
+        emit OrderReceived();
+        _transferItems(seller);
+        _accrueFee(adminFee);
+        _pay(buyer, ETH, deposit);
+    }
+
+     /**
+     * @dev Change the order status to `EXPIRED`. Only the seller of that order can call it.
+     * Can only be called if time after sending the order is bigger than `numBlocksToExpire` .
+     * Can only be called if the order status is `SENT`.
+     * Release items and funds to seller and admin, buyer loses deposit.
+     */
+    function expireOrder() public onlySeller() {
+        require(status == OrderStatus.SENT, "Order not sent");
+        require(sendBlock + numBlocksToExpire < block.number, 'Order not expired yet');
+        status = OrderStatus.EXPIRED;
+        emit OrderExpired();
+        _transferItems(seller);
+        _accrueFee(adminFee);
+        _pay(seller, ETH, deposit);
+    }
+
+    /**
+     * @dev Change order status to `CANCELLED`. Only the buyer of that order can call it.
+     * Can only be called if order is in state `INITIATED`.
+     * Release items and funds to buyer and admin.
+     */
+    function cancelBuyOrder( ) public onlyBuyer() {
+        require(status == OrderStatus.INITIATED, "Can't cancell order now");
+        status = OrderStatus.CANCELLED;
+        emit OrderCancelled(buyer);
+        _transferItems(buyer);
+        _accrueFee(adminFee);
+        _pay(buyer, ETH, deposit);
+    }
+
+    /**
+    * @dev Change order status to `CANCELLED`. Only the seller of that order can call it.
+    * Can only be called if order is in state `INITIATED`, `CREATED` or `SENT`.
+    * If the order is in state `INITIATED` or `SENT` items and funds are sent back to the buyer.
+    * This is only case where admin collect no fees.
+    */
+    function cancelSellOrder( ) public onlySeller() {
+        require(status == OrderStatus.CREATED || status == OrderStatus.INITIATED || status == OrderStatus.SENT, "Can't cancell order now");
+        OrderStatus old_status = status;
+        status = OrderStatus.CANCELLED;
+        emit OrderCancelled(msg.sender);
+
+        if( old_status == OrderStatus.INITIATED || old_status == OrderStatus.SENT) {
+            _transferItems(buyer);
+            _pay(buyer, ETH, adminFee + deposit);
+        }
+
+    }
+
+    /**
+    * @dev Change order status to`DISPUTED`. Only the seller or buyer of that order can call it.
+    * Can only be called if order is in state `SENT`.
+    */
+    function disputeOrder( ) public onlyBuyerOrSeller() {
+        require(status == OrderStatus.SENT, "Can't dispute order now");
+        status = OrderStatus.DISPUTED;
+        emit OrderDisputed(msg.sender);
+    }
+
+
+    /**
+    * @dev Change order status to `RESOLVED`. Only the owner of the contract can call it.
+    * Can only be called if order is in state `DISPUTED`.
+    * Release items and funds to the parties according to resolution, all the items go to the same party.
+    */
+    function resolveDispute(bool buyerRefundToken,  bool buyerRefundDeposit) public onlyOwner() {
+        require(status == OrderStatus.DISPUTED, 'Cant resolve order');
+        status = OrderStatus.RESOLVED;
+        emit OrderResolved(buyerRefundToken, buyerRefundDeposit);
+        _accrueFee(adminFee);
+        _transferItems(buyerRefundToken ? buyer : seller);
+        _pay(buyerRefundDeposit ? buyer : seller, ETH, deposit);
+    }
+
+    /**
+     * @dev Accepts the batch transfer of `initiateOrder` only, other transfers of tokens to the contract revert.
+     */
+    function onERC1155BatchReceived(address _operator, address, uint256[] calldata, uint256[] calldata, bytes calldata)
+        external
+        view
+        override
+        returns (bytes4)
+    {
+        require(_operator == address(this) && msg.sender == tokenContract, 'Unexpected transfer');
+        return this.onERC1155BatchReceived.selector;
+    }
+
+    /**
+     * @dev Rejects single transfers, the contract only moves items with batch transfers.
+     */
+    function onERC1155Received(address, address, uint256, uint256, bytes calldata) external pure override returns (bytes4) {
+        revert('Unexpected transfer');
+    }
+
+    /**
+     * @dev Sends all the escrowed items to `_to` in a single batch transfer.
+     */
+    function _transferItems(address _to) internal {
+        IERC1155(tokenContract).safeBatchTransferFrom(address(this), _to, _tokenIds, _amounts, "");
+    }
+
+
+}
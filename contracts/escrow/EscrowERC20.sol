@@ -5,18 +5,25 @@ pragma solidity ^0.8.0;
 
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-IERC20Permit.sol";
+import "@openzeppelin/contracts/proxy/utils/Initializable.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
 
 /** @title EscrowERC20
  *  @dev This contract implement a simple Escrow contract of an ERC20 token.
  * Contract has an admin to settle disputes. Admin is paid adminFee for handling the escrow contract.
  * Process : Admin deploy contract. Seller create an order, sets token, amount and deposit, blockExpiry for the buyer. Buyer initiate the escrow by paying. Seller
  * sends order, buyer receives. Contract release funds, `deposit` to buyer, `amount` to seller and 
- * `adminFee` to the owner.
+ * `adminFee` to the owner, the fees accrue in `accruedFees` until the owner withdraws them, see `FeeLedger`.
  * If no reaction from buyer after a while, order expires and seller can withdraw funds.
  * Orders can be cancelled by seller or buyer if in an appropriate status.
  * In case of disputes admins decides how to distribute funds
+ * Funds are either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`.
+ * Can be deployed directly or cloned by `EscrowFactory`, `initialize` then replaces the constructor.
+ * Calls can be batched with `multicall`, `msg.sender` is kept.
  */
-contract EscrowERC20 is Ownable {
+contract EscrowERC20 is Ownable, WithdrawalLedger, Initializable, Multicall {
 
 
     address payable public buyer;
@@ -34,13 +41,14 @@ contract EscrowERC20 is Ownable {
     enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
 
 
-    event OrderCreated(address _seller, uint256 _amount, uint256 _deposit);
-    event OrderInitiated(address _buyer);
-    event OrderSent(uint256 _block);
+    /// @dev the escrow address identifies the order, seller, buyer and token are indexed to filter the escrows of an account.
+    event OrderCreated(address indexed _seller, address indexed _token, uint256 _amount, uint256 _deposit);
+    event OrderInitiated(address indexed _buyer);
+    event OrderSent();
     event OrderReceived();
     event OrderExpired();
-    event OrderCancelled(address canceller);
-    event OrderDisputed(address disputer);
+    event OrderCancelled(address indexed canceller);
+    event OrderDisputed(address indexed disputer);
     event OrderResolved(uint256 buyerRefund, uint256 sellerRefund);
 
     /**
@@ -71,14 +79,16 @@ contract EscrowERC20 is Ownable {
      */
 
     constructor(uint256 _adminFee)  {
-        buyer = payable(address(0));
-        seller = payable(address(0));
-        amount = 0;
-        deposit = 0;
-        sendBlock = block.number;
+        initialize(_adminFee, msg.sender);
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to `_owner`. Called by the constructor, or once on a clone.
+     */
+    function initialize(uint256 _adminFee, address _owner) public initializer {
         numBlocksToExpire = 1;
-        status = OrderStatus.BLANK;
         adminFee = _adminFee;
+        _transferOwnership(_owner);
     }
 
     /**
@@ -97,26 +107,37 @@ contract EscrowERC20 is Ownable {
         numBlocksToExpire = _numBlocksToExpire;
         
         status = OrderStatus.CREATED;
-        emit OrderCreated(msg.sender, _amount, _deposit);
+        emit OrderCreated(msg.sender, _token, _amount, _deposit);
         
     }
 
     /**
      * @dev Initiate the escrow and send the funds.
-     * Can only be called if the order state is `CREATED`
+     * Can only be called if the order state is `CREATED`. Tokens taking a fee on transfer are rejected, see `_collect`.
      */
     function initiateOrder() public payable {
         require(buyer == address(0), 'Buyer already exists');
         require(status == OrderStatus.CREATED, 'Cant Initiate with the current status');
         require(msg.value ==adminFee, 'Not enough fund for fee' );
 
-        IERC20(token).transferFrom(msg.sender, address(this), amount + deposit);
+        _collect(token, msg.sender, amount + deposit);
 
         buyer = payable(msg.sender);
         status = OrderStatus.INITIATED;
         emit OrderInitiated(msg.sender);
     }
 
+    /**
+     * @dev Same as `initiateOrder` but approves the escrow with an EIP-2612 `permit` signed by the buyer,
+     * so the buyer needs a single transaction. `token` must support `permit`.
+     * A failing `permit` is ignored : anyone can submit the signed permit first from the mempool, which uses its nonce,
+     * the order is then initiated with the allowance it set, and `initiateOrder` throws if there is no allowance.
+     */
+    function initiateOrderWithPermit(uint256 _deadline, uint8 _v, bytes32 _r, bytes32 _s) public payable {
+        try IERC20Permit(token).permit(msg.sender, address(this), amount + deposit, _deadline, _v, _r, _s) {} catch {}
+        initiateOrder();
+    }
+
     /**
      * @dev Change the order status to `SENT`. Only the seller can call it.
      */
@@ -124,7 +145,7 @@ contract EscrowERC20 is Ownable {
         require(status == OrderStatus.INITIATED, "Can't send order now");
         status = OrderStatus.SENT;
         sendBlock = block.number;
-        emit OrderSent(sendBlock);
+        emit OrderSent();
     }
 
     
@@ -137,9 +158,9 @@ contract EscrowERC20 is Ownable {
         require(status == OrderStatus.SENT, "Can't receive order now");
         status = OrderStatus.RECEIVED;
         emit OrderReceived();
-        IERC20(token).transfer(buyer, deposit);
-        IERC20(token).transfer(seller, amount);
-        payable(owner()).transfer(adminFee);
+        _pay(buyer, token, deposit);
+        _pay(seller, token, amount);
+        _accrueFee(adminFee);
         
     }
 
@@ -154,8 +175,8 @@ contract EscrowERC20 is Ownable {
         require(sendBlock + numBlocksToExpire < block.number, 'Order not expired yet');
         status = OrderStatus.EXPIRED;
         emit OrderExpired();
-        IERC20(token).transfer(seller, amount + deposit);
-        payable(owner()).transfer(adminFee);
+        _pay(seller, token, amount + deposit);
+        _accrueFee(adminFee);
     }
 
     /**
@@ -168,8 +189,8 @@ contract EscrowERC20 is Ownable {
         status = OrderStatus.CREATED;
         buyer = payable(address(0));
         emit OrderCancelled(msg.sender);
-        IERC20(token).transfer(payable(msg.sender), amount + deposit); 
-        payable(owner()).transfer(adminFee); 
+        _pay(payable(msg.sender), token, amount + deposit);
+        _accrueFee(adminFee);
     }
         
     /**
@@ -185,9 +206,8 @@ contract EscrowERC20 is Ownable {
         emit OrderCancelled(msg.sender);
 
         if( old_status == OrderStatus.INITIATED || old_status == OrderStatus.SENT) {
-            uint256 refund = amount + deposit;
-            IERC20(token).transfer(buyer, amount + deposit);
-            buyer.transfer(adminFee);
+            _pay(buyer, token, amount + deposit);
+            _pay(buyer, ETH, adminFee);
         }
         
         
@@ -215,9 +235,9 @@ contract EscrowERC20 is Ownable {
         uint256 refundToSeller = amount + deposit - refundToBuyer ;
         status = OrderStatus.RESOLVED;
         emit OrderResolved(refundToBuyer, refundToSeller);
-        IERC20(token).transfer(buyer, refundToBuyer);
-        IERC20(token).transfer(seller, refundToSeller);
-        payable(owner()).transfer(adminFee);
+        _pay(buyer, token, refundToBuyer);
+        _pay(seller, token, refundToSeller);
+        _accrueFee(adminFee);
 
     }
 
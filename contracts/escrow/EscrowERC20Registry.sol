@@ -0,0 +1,267 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-IERC20Permit.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
+
+/** @title EscrowERC20Registry
+ *  @dev Multi-order version of `EscrowERC20` : any number of concurrent ERC20 orders, in any token,
+ * are held by one contract and identified by their orderId, like the orders of `Escrow`.
+ * Contract has an admin to settle disputes. Admin is paid adminFee for handling each order.
+ * Process : Admin deploy contract. Seller create an order, sets token, amount and deposit, blockExpiry for the buyer. Buyer initiate the escrow by paying. Seller
+ * sends order, buyer receives. Contract release funds, `deposit` to buyer, `amount` to seller and
+ * `adminFee` to the owner, the fees accrue in `accruedFees` until the owner withdraws them, see `FeeLedger`.
+ * If no reaction from buyer after a while, order expires and seller can withdraw funds.
+ * Orders can be cancelled by seller or buyer if in an appropriate status.
+ * In case of disputes admins decides how to distribute funds
+ * Funds are either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`.
+ * Calls on many orders can be batched with `multicall`, `msg.sender` is kept.
+ */
+contract EscrowERC20Registry is Ownable, WithdrawalLedger, Multicall {
+
+
+    /// fee in ETH paid by the buyer of each order for the admin
+    uint256 public adminFee;
+    /// Array holding all orders, the orderId of an order is its index
+    Order[] private _orders;
+
+    enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
+
+    /// @dev struct representing an order, packed in 4 storage slots.
+    /// @param sendBlock block when seller sent the order.
+    /// @param deposit is set to incentivize buyer to release funds early.
+    struct Order {
+        OrderStatus status;
+        uint40 sendBlock;
+        uint40 numBlocksToExpire;
+        address payable buyer;
+        address payable seller;
+        address token;
+        uint128 amount;
+        uint128 deposit;
+    }
+
+    /// @dev order events have the orderId as first topic, and the account acting on the order, if any, as second topic.
+    event OrderCreated(uint256 indexed _orderId, address indexed _seller, address indexed _token, uint256 _amount, uint256 _deposit);
+    event OrderInitiated(uint256 indexed _orderId, address indexed _buyer);
+    event OrderSent(uint256 indexed _orderId);
+    event OrderReceived(uint256 indexed _orderId);
+    event OrderExpired(uint256 indexed _orderId);
+    event OrderCancelled(uint256 indexed _orderId, address indexed canceller);
+    event OrderDisputed(uint256 indexed _orderId, address indexed disputer);
+    event OrderResolved(uint256 indexed _orderId, uint256 buyerRefund, uint256 sellerRefund);
+
+    /**
+     * @dev Throws if called by an account other than the buyer of `orders[_orderId]`
+     */
+    modifier onlyBuyer(uint256 _orderId) {
+        require(_orders[_orderId].buyer == msg.sender, 'Only Buyer Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the seller of `orders[_orderId]`
+     */
+    modifier onlySeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender, 'Only Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the buyer or seller of `orders[_orderId]`
+     */
+    modifier onlyBuyerOrSeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender || _orders[_orderId].buyer == msg.sender, 'Only Buyer or Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to the deployer.
+     */
+    constructor(uint256 _adminFee)  {
+        adminFee = _adminFee;
+    }
+
+    /**
+     * @dev Returns the number of orders ever created.
+     */
+    function orderCount() public view returns (uint256) {
+        return _orders.length;
+    }
+
+    /**
+     * @dev Returns the order with `_orderId`.
+     */
+    function orders(uint256 _orderId) public view returns (
+        OrderStatus status,
+        address buyer,
+        address seller,
+        address token,
+        uint256 amount,
+        uint256 deposit,
+        uint256 sendBlock,
+        uint256 numBlocksToExpire
+    ) {
+        Order storage order = _orders[_orderId];
+        return (order.status, order.buyer, order.seller, order.token, order.amount, order.deposit, order.sendBlock, order.numBlocksToExpire);
+    }
+
+    /**
+     * @dev Creates a new order with status : `CREATED` and append it to the orders. Returns its orderId.
+     */
+    function createOrder(address _token, uint256 _amount, uint256 _deposit, uint256 _numBlocksToExpire ) public returns (uint256 orderId) {
+        require(_amount > 0, 'Order Too Small');
+        require(_amount > _deposit, 'Deposit must be smaller than amount');
+        require(_numBlocksToExpire <= type(uint40).max, 'Expiry too long');
+        orderId = _orders.length;
+        Order storage order = _orders.push();
+        order.status = OrderStatus.CREATED;
+        order.numBlocksToExpire = uint40(_numBlocksToExpire);
+        order.seller = payable(msg.sender);
+        order.token = _token;
+        order.amount = SafeCast.toUint128(_amount);
+        order.deposit = SafeCast.toUint128(_deposit);
+        emit OrderCreated(orderId, msg.sender, _token, _amount, _deposit);
+    }
+
+    /**
+     * @dev Initiate the escrow order with `_orderId` and send the funds.
+     * Can only be called if the order state is `CREATED`. Tokens taking a fee on transfer are rejected, see `_collect`.
+     */
+    function initiateOrder(uint256 _orderId) public payable {
+        Order storage order = _orders[_orderId];
+        require(order.buyer == address(0), 'Buyer already exists');
+        require(order.status == OrderStatus.CREATED, 'Cant Initiate with the current status');
+        require(msg.value == adminFee, 'Not enough fund for fee' );
+        order.buyer = payable(msg.sender);
+        order.status = OrderStatus.INITIATED;
+        emit OrderInitiated(_orderId, msg.sender);
+        _collect(order.token, msg.sender, uint256(order.amount) + order.deposit);
+    }
+
+    /**
+     * @dev Same as `initiateOrder` but approves the escrow with an EIP-2612 `permit` signed by the buyer,
+     * so the buyer needs a single transaction. The order token must support `permit`.
+     * A failing `permit` is ignored : anyone can submit the signed permit first from the mempool, which uses its nonce,
+     * the order is then initiated with the allowance it set, and `initiateOrder` throws if there is no allowance.
+     */
+    function initiateOrderWithPermit(uint256 _orderId, uint256 _deadline, uint8 _v, bytes32 _r, bytes32 _s) public payable {
+        Order storage order = _orders[_orderId];
+        try IERC20Permit(order.token).permit(
+            msg.sender, address(this), uint256(order.amount) + order.deposit, _deadline, _v, _r, _s
+        ) {} catch {}
+        initiateOrder(_orderId);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `SENT`. Only the seller can call it.
+     */
+    function sendOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't send order now");
+        order.status = OrderStatus.SENT;
+        order.sendBlock = uint40(block.number);
+        emit OrderSent(_orderId);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `RECEIVED`. Only the buyer can call it.
+     * Releases tokens and funds to buyer and seller and admin.
+     * Can only be called if the order status is `SENT`
+     */
+    function receiveOrder(uint256 _orderId) public onlyBuyer(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't receive order now");
+        order.status = OrderStatus.RECEIVED;
+        emit OrderReceived(_orderId);
+        _pay(order.buyer, order.token, order.deposit);
+        _pay(order.seller, order.token, order.amount);
+        _accrueFee(adminFee);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `EXPIRED`. Only the seller of that order can call it.
+     * Can only be called if time after sending the order is bigger than its `numBlocksToExpire` .
+     * Can only be called if the order status is `SENT`.
+     * Release funds to seller and admin, buyer loses deposit.
+     */
+    function expireOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Order not sent");
+        require(uint256(order.sendBlock) + order.numBlocksToExpire < block.number, 'Order not expired yet');
+        order.status = OrderStatus.EXPIRED;
+        emit OrderExpired(_orderId);
+        _pay(order.seller, order.token, uint256(order.amount) + order.deposit);
+        _accrueFee(adminFee);
+    }
+
+    /**
+     * @dev Makes order with `_orderId` available again. Only the buyer of that order can call it.
+     * Can only be called if order is in state `INITIATED`.
+     * Release funds to buyer and admin.
+     */
+    function cancelBuyOrder(uint256 _orderId) public onlyBuyer(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't cancell order now");
+        order.status = OrderStatus.CREATED;
+        order.buyer = payable(address(0));
+        emit OrderCancelled(_orderId, msg.sender);
+        _pay(payable(msg.sender), order.token, uint256(order.amount) + order.deposit);
+        _accrueFee(adminFee);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `CANCELLED`. Only the seller of that order can call it.
+    * Can only be called if order is in state `INITIATED`, `CREATED` or `SENT`.
+    * If the order is in state `INITIATED` or `SENT` funds are sent back to the buyer.
+    * This is only case where admin collect no fees.
+    */
+    function cancelSellOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        OrderStatus oldStatus = order.status;
+        require(oldStatus == OrderStatus.CREATED || oldStatus == OrderStatus.INITIATED || oldStatus == OrderStatus.SENT, "Can't cancell order now");
+        order.status = OrderStatus.CANCELLED;
+        emit OrderCancelled(_orderId, msg.sender);
+        if( oldStatus == OrderStatus.INITIATED || oldStatus == OrderStatus.SENT) {
+            _pay(order.buyer, order.token, uint256(order.amount) + order.deposit);
+            _pay(order.buyer, ETH, adminFee);
+        }
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `DISPUTED`. Only the seller or buyer of that order can call it.
+    * Can only be called if order is in state `SENT`.
+    */
+    function disputeOrder(uint256 _orderId) public onlyBuyerOrSeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't dispute order now");
+        order.status = OrderStatus.DISPUTED;
+        emit OrderDisputed(_orderId, msg.sender);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `RESOLVED`. Only the owner of the contract can call it.
+    * Can only be called if order is in state `DISPUTED`.
+    * Release funds the parties according to distribution.
+    */
+    function resolveDispute(uint256 _orderId, uint256 refundToBuyer) public onlyOwner() {
+        Order storage order = _orders[_orderId];
+        uint256 total = uint256(order.amount) + order.deposit;
+        require(refundToBuyer < total, 'High refund' );
+        require(order.status == OrderStatus.DISPUTED, 'Cant resolve order');
+        uint256 refundToSeller = total - refundToBuyer;
+        order.status = OrderStatus.RESOLVED;
+        emit OrderResolved(_orderId, refundToBuyer, refundToSeller);
+        _pay(order.buyer, order.token, refundToBuyer);
+        _pay(order.seller, order.token, refundToSeller);
+        _accrueFee(adminFee);
+    }
+
+
+}
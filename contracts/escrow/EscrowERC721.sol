@@ -5,18 +5,24 @@ pragma solidity ^0.8.0;
 
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/token/ERC721/IERC721.sol";
+import "@openzeppelin/contracts/proxy/utils/Initializable.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
 
 /** @title EscrowERC721
  *  @dev This contract implement a simple Escrow contract of an ERC721 token.
  * Contract has an admin to settle disputes. Admin is paid adminFee for handling the escrow contract.
  * Process : Admin deploy contract. Seller create an order, sets token, tokenId and deposit in ETH, blockExpiry for the buyer. Buyer initiate the escrow by sending the NFT. Seller
  * sends order, buyer receives. Contract release funds, `deposit` to buyer, NFT to seller and 
- * `adminFee` to the owner.
+ * `adminFee` to the owner, the fees accrue in `accruedFees` until the owner withdraws them, see `FeeLedger`.
  * If no reaction from buyer after a while, order expires and seller can withdraw NFT.
  * Orders can be cancelled by seller or buyer if in an appropriate status.
  * In case of disputes admins decides how to settle.
+ * ETH is either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`. The NFT is always transferred.
+ * Can be deployed directly or cloned by `EscrowFactory`, `initialize` then replaces the constructor.
+ * Calls can be batched with `multicall`, `msg.sender` is kept.
  */
-contract EscrowERC721 is Ownable {
+contract EscrowERC721 is Ownable, WithdrawalLedger, Initializable, Multicall {
 
 
     /// PUBLIC VARAIBLES
@@ -35,13 +41,14 @@ contract EscrowERC721 is Ownable {
     enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
 
 
-    event OrderCreated(address _seller, address tokenContract,uint256 tokenId, uint256 _deposit);
-    event OrderInitiated(address _buyer);
-    event OrderSent(uint256 _block);
+    /// @dev the escrow address identifies the order, seller, buyer token and tokenId are indexed to filter the escrows of an account.
+    event OrderCreated(address indexed _seller, address indexed tokenContract, uint256 indexed tokenId, uint256 _deposit);
+    event OrderInitiated(address indexed _buyer);
+    event OrderSent();
     event OrderReceived();
     event OrderExpired();
-    event OrderCancelled(address canceller);
-    event OrderDisputed(address disputer);
+    event OrderCancelled(address indexed canceller);
+    event OrderDisputed(address indexed disputer);
     event OrderResolved(bool buyerRefundToken,  bool buyerRefundDposit);
 
     /**
@@ -70,13 +77,16 @@ contract EscrowERC721 is Ownable {
      * @dev Initialize the contract settings, and owner to the deployer.
      */
     constructor(uint256 _adminFee)  {
-        buyer = payable(address(0));
-        seller = payable(address(0));
-        deposit = 0;
-        sendBlock = block.number;
+        initialize(_adminFee, msg.sender);
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to `_owner`. Called by the constructor, or once on a clone.
+     */
+    function initialize(uint256 _adminFee, address _owner) public initializer {
         numBlocksToExpire = 1;
-        status = OrderStatus.BLANK;
         adminFee = _adminFee;
+        _transferOwnership(_owner);
     }
 
     /**
@@ -121,7 +131,7 @@ contract EscrowERC721 is Ownable {
         require(status == OrderStatus.INITIATED, "Can't send order now");
         status = OrderStatus.SENT;
         sendBlock = block.number;
-        emit OrderSent(sendBlock);
+        emit OrderSent();
     }
 
     
@@ -135,8 +145,8 @@ contract EscrowERC721 is Ownable {
         status = OrderStatus.RECEIVED;
         emit OrderReceived();
         IERC721(tokenContract).transferFrom(address(this), seller, tokenId);
-        payable(owner()).transfer(adminFee);
-        buyer.transfer(deposit);
+        _accrueFee(adminFee);
+        _pay(buyer, ETH, deposit);
     }
 
      /**
@@ -151,8 +161,8 @@ contract EscrowERC721 is Ownable {
         status = OrderStatus.EXPIRED;
         emit OrderExpired();
         IERC721(tokenContract).transferFrom(address(this), seller, tokenId);
-        payable(owner()).transfer(adminFee);
-        seller.transfer(deposit);
+        _accrueFee(adminFee);
+        _pay(seller, ETH, deposit);
     }
 
     /**
@@ -165,8 +175,8 @@ contract EscrowERC721 is Ownable {
         status = OrderStatus.CANCELLED;
         emit OrderCancelled(buyer);
         IERC721(tokenContract).transferFrom(address(this), buyer, tokenId);
-        payable(owner()).transfer(adminFee); 
-        buyer.transfer(deposit);
+        _accrueFee(adminFee);
+        _pay(buyer, ETH, deposit);
     }
         
     /**
@@ -183,7 +193,7 @@ contract EscrowERC721 is Ownable {
 
         if( old_status == OrderStatus.INITIATED || old_status == OrderStatus.SENT) {
             IERC721(tokenContract).transferFrom(address(this), buyer, tokenId);
-            buyer.transfer(adminFee+deposit);
+            _pay(buyer, ETH, adminFee + deposit);
         }
         
     }
@@ -208,19 +218,19 @@ contract EscrowERC721 is Ownable {
         require(status == OrderStatus.DISPUTED, 'Cant resolve order');
         status = OrderStatus.RESOLVED;
         emit OrderResolved(buyerRefundToken, buyerRefundDeposit);
-        payable(owner()).transfer(adminFee);
+        _accrueFee(adminFee);
         if(buyerRefundToken && buyerRefundDeposit) {
             IERC721(tokenContract).transferFrom(address(this), buyer, tokenId);
-            buyer.transfer(deposit);
+            _pay(buyer, ETH, deposit);
         } else if(buyerRefundToken && !buyerRefundDeposit) {
             IERC721(tokenContract).transferFrom(address(this), buyer, tokenId);
-            seller.transfer(deposit);
+            _pay(seller, ETH, deposit);
         } else if(!buyerRefundToken && buyerRefundDeposit) {
             IERC721(tokenContract).transferFrom(address(this), seller, tokenId);
-            buyer.transfer(deposit);
+            _pay(buyer, ETH, deposit);
         } else {
             IERC721(tokenContract).transferFrom(address(this), seller, tokenId);
-            seller.transfer(deposit);
+            _pay(seller, ETH, deposit);
         }
 
     }
@@ -0,0 +1,249 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/token/ERC721/IERC721.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
+
+/** @title EscrowERC721Registry
+ *  @dev Multi-order version of `EscrowERC721` : any number of concurrent NFT orders, across collections,
+ * are held by one contract and identified by their orderId, like the orders of `Escrow`.
+ * Contract has an admin to settle disputes. Admin is paid adminFee for handling each order.
+ * Process : Admin deploy contract. Seller create an order, sets token, tokenId and deposit in ETH, blockExpiry for the buyer. Buyer initiate the escrow by sending the NFT. Seller
+ * sends order, buyer receives. Contract release funds, `deposit` to buyer, NFT to seller and
+ * `adminFee` to the owner, the fees accrue in `accruedFees` until the owner withdraws them, see `FeeLedger`.
+ * If no reaction from buyer after a while, order expires and seller can withdraw NFT.
+ * Orders can be cancelled by seller or buyer if in an appropriate status.
+ * In case of disputes admins decides how to settle.
+ * ETH is either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`. The NFT is always transferred.
+ * Calls on many orders can be batched with `multicall`, `msg.sender` is kept.
+ */
+contract EscrowERC721Registry is Ownable, WithdrawalLedger, Multicall {
+
+
+    /// fee in ETH paid by the buyer of each order for the admin
+    uint256 public adminFee;
+    /// Array holding all orders, the orderId of an order is its index
+    Order[] private _orders;
+
+    enum OrderStatus {BLANK, CREATED, INITIATED, SENT, RECEIVED, CANCELLED, DISPUTED, RESOLVED, EXPIRED}
+
+    /// @dev struct representing an order, packed in 4 storage slots.
+    /// @param sendBlock block when seller sent the order.
+    /// @param deposit in ETH, is set to incentivize buyer to release funds early.
+    struct Order {
+        OrderStatus status;
+        uint40 sendBlock;
+        uint40 numBlocksToExpire;
+        address payable buyer;
+        address payable seller;
+        uint96 deposit;
+        address tokenContract;
+        uint256 tokenId;
+    }
+
+    /// @dev order events have the orderId as first topic, and the account acting on the order, if any, as second topic.
+    event OrderCreated(uint256 indexed _orderId, address indexed _seller, address indexed tokenContract, uint256 tokenId, uint256 _deposit);
+    event OrderInitiated(uint256 indexed _orderId, address indexed _buyer);
+    event OrderSent(uint256 indexed _orderId);
+    event OrderReceived(uint256 indexed _orderId);
+    event OrderExpired(uint256 indexed _orderId);
+    event OrderCancelled(uint256 indexed _orderId, address indexed canceller);
+    event OrderDisputed(uint256 indexed _orderId, address indexed disputer);
+    event OrderResolved(uint256 indexed _orderId, bool buyerRefundToken, bool buyerRefundDposit);
+
+    /**
+     * @dev Throws if called by an account other than the buyer of `orders[_orderId]`
+     */
+    modifier onlyBuyer(uint256 _orderId) {
+        require(_orders[_orderId].buyer == msg.sender, 'Only Buyer Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the seller of `orders[_orderId]`
+     */
+    modifier onlySeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender, 'Only Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the buyer or seller of `orders[_orderId]`
+     */
+    modifier onlyBuyerOrSeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender || _orders[_orderId].buyer == msg.sender, 'Only Buyer or Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to the deployer.
+     */
+    constructor(uint256 _adminFee)  {
+        adminFee = _adminFee;
+    }
+
+    /**
+     * @dev Returns the number of orders ever created.
+     */
+    function orderCount() public view returns (uint256) {
+        return _orders.length;
+    }
+
+    /**
+     * @dev Returns the order with `_orderId`.
+     */
+    function orders(uint256 _orderId) public view returns (
+        OrderStatus status,
+        address buyer,
+        address seller,
+        address tokenContract,
+        uint256 tokenId,
+        uint256 deposit,
+        uint256 sendBlock,
+        uint256 numBlocksToExpire
+    ) {
+        Order storage order = _orders[_orderId];
+        return (order.status, order.buyer, order.seller, order.tokenContract, order.tokenId, order.deposit, order.sendBlock, order.numBlocksToExpire);
+    }
+
+    /**
+     * @dev Creates a new order with status : `CREATED` and append it to the orders. Returns its orderId.
+     */
+    function createOrder(address _tokenContract, uint256 _tokenId, uint256 _deposit, uint256 _numBlocksToExpire ) public returns (uint256 orderId) {
+        require(_numBlocksToExpire <= type(uint40).max, 'Expiry too long');
+        orderId = _orders.length;
+        Order storage order = _orders.push();
+        order.status = OrderStatus.CREATED;
+        order.numBlocksToExpire = uint40(_numBlocksToExpire);
+        order.seller = payable(msg.sender);
+        order.deposit = SafeCast.toUint96(_deposit);
+        order.tokenContract = _tokenContract;
+        order.tokenId = _tokenId;
+        emit OrderCreated(orderId, msg.sender, _tokenContract, _tokenId, _deposit);
+    }
+
+    /**
+     * @dev Initiate the escrow order with `_orderId` and send the Token and funds.
+     * Can only be called if the order state is `CREATED`
+     */
+    function initiateOrder(uint256 _orderId) public payable {
+        Order storage order = _orders[_orderId];
+        require(order.buyer == address(0), 'Buyer already exists');
+        require(order.status == OrderStatus.CREATED, 'Cant create with the current status');
+        require(msg.value == adminFee + order.deposit, 'Not enough fund for fee and deposit' );
+        order.buyer = payable(msg.sender);
+        order.status = OrderStatus.INITIATED;
+        emit OrderInitiated(_orderId, msg.sender);
+        IERC721(order.tokenContract).transferFrom(msg.sender, address(this), order.tokenId);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `SENT`. Only the seller can call it.
+     * Can only be called if status is `INITIATED`
+     */
+    function sendOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't send order now");
+        order.status = OrderStatus.SENT;
+        order.sendBlock = uint40(block.number);
+        emit OrderSent(_orderId);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `RECEIVED`. Only the buyer can call it.
+     * Releases NFT and funds to buyer and seller and admin.
+     * Can only be called if the order status is `SENT`
+     */
+    function receiveOrder(uint256 _orderId) public onlyBuyer(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't receive order now");
+        order.status = OrderStatus.RECEIVED;
+        emit OrderReceived(_orderId);
+        IERC721(order.tokenContract).transferFrom(address(this), order.seller, order.tokenId);
+        _accrueFee(adminFee);
+        _pay(order.buyer, ETH, order.deposit);
+    }
+
+    /**
+     * @dev Change the status of order with `_orderId` to `EXPIRED`. Only the seller of that order can call it.
+     * Can only be called if time after sending the order is bigger than its `numBlocksToExpire` .
+     * Can only be called if the order status is `SENT`.
+     * Release token and funds to seller and admin, buyer loses deposit.
+     */
+    function expireOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Order not sent");
+        require(uint256(order.sendBlock) + order.numBlocksToExpire < block.number, 'Order not expired yet');
+        order.status = OrderStatus.EXPIRED;
+        emit OrderExpired(_orderId);
+        IERC721(order.tokenContract).transferFrom(address(this), order.seller, order.tokenId);
+        _accrueFee(adminFee);
+        _pay(order.seller, ETH, order.deposit);
+    }
+
+    /**
+     * @dev Change status of order with `_orderId` to `CANCELLED`. Only the buyer of that order can call it.
+     * Can only be called if order is in state `INITIATED`.
+     * Release token and funds to buyer and admin.
+     */
+    function cancelBuyOrder(uint256 _orderId) public onlyBuyer(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't cancell order now");
+        order.status = OrderStatus.CANCELLED;
+        emit OrderCancelled(_orderId, order.buyer);
+        IERC721(order.tokenContract).transferFrom(address(this), order.buyer, order.tokenId);
+        _accrueFee(adminFee);
+        _pay(order.buyer, ETH, order.deposit);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `CANCELLED`. Only the seller of that order can call it.
+    * Can only be called if order is in state `INITIATED`, `CREATED` or `SENT`.
+    * If the order is in state `INITIATED` or `SENT` funds are sent back to the buyer.
+    * This is only case where admin collect no fees.
+    */
+    function cancelSellOrder(uint256 _orderId) public onlySeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        OrderStatus oldStatus = order.status;
+        require(oldStatus == OrderStatus.CREATED || oldStatus == OrderStatus.INITIATED || oldStatus == OrderStatus.SENT, "Can't cancell order now");
+        order.status = OrderStatus.CANCELLED;
+        emit OrderCancelled(_orderId, msg.sender);
+        if( oldStatus == OrderStatus.INITIATED || oldStatus == OrderStatus.SENT) {
+            IERC721(order.tokenContract).transferFrom(address(this), order.buyer, order.tokenId);
+            _pay(order.buyer, ETH, adminFee + order.deposit);
+        }
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `DISPUTED`. Only the seller or buyer of that order can call it.
+    * Can only be called if order is in state `SENT`.
+    */
+    function disputeOrder(uint256 _orderId) public onlyBuyerOrSeller(_orderId) {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.SENT, "Can't dispute order now");
+        order.status = OrderStatus.DISPUTED;
+        emit OrderDisputed(_orderId, msg.sender);
+    }
+
+    /**
+    * @dev Change status of order with `_orderId` to `RESOLVED`. Only the owner of the contract can call it.
+    * Can only be called if order is in state `DISPUTED`.
+    * The NFT goes to the buyer if `buyerRefundToken`, to the seller otherwise. Same for the deposit with `buyerRefundDeposit`.
+    */
+    function resolveDispute(uint256 _orderId, bool buyerRefundToken, bool buyerRefundDeposit) public onlyOwner() {
+        Order storage order = _orders[_orderId];
+        require(order.status == OrderStatus.DISPUTED, 'Cant resolve order');
+        order.status = OrderStatus.RESOLVED;
+        emit OrderResolved(_orderId, buyerRefundToken, buyerRefundDeposit);
+        _accrueFee(adminFee);
+        IERC721(order.tokenContract).transferFrom(address(this), buyerRefundToken ? order.buyer : order.seller, order.tokenId);
+        _pay(buyerRefundDeposit ? order.buyer : order.seller, ETH, order.deposit);
+    }
+
+
+}
@@ -0,0 +1,62 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/proxy/Clones.sol";
+import "@openzeppelin/contracts/utils/Address.sol";
+
+/** @title EscrowFactory
+ *  @dev Deploys EIP-1167 minimal proxies ( clones ) of a single order escrow `implementation` :
+ * `EscrowERC20`, `EscrowERC721`, `EscrowERC1155` or `EscrowAave`. A clone costs a fraction of a full deployment and
+ * delegates every call to the implementation, with its own storage.
+ * Clones are deployed with CREATE2 so their address can be computed before deployment with `predictEscrowAddress`,
+ * the salt is bound to the creator so nobody else can take the address.
+ * The clone is initialized in the same transaction with `_initData`, the encoded call to `initialize` of the implementation.
+ * The factory checks that the clone has an owner afterwards, so a clone left uninitialized, e.g. by passing another call
+ * as `_initData`, can't be deployed and then initialized by anyone else to become its owner.
+ */
+contract EscrowFactory {
+
+
+    /// escrow contract cloned by the factory
+    address public immutable implementation;
+
+    event EscrowCreated(address indexed creator, address indexed escrow, bytes32 salt);
+
+    /**
+     * @dev Sets the escrow contract to clone.
+     */
+    constructor(address _implementation) {
+        require(Address.isContract(_implementation), 'Implementation must be a contract');
+        implementation = _implementation;
+    }
+
+    /**
+     * @dev Deploys a clone of `implementation` at `predictEscrowAddress(msg.sender, _salt)` and calls it with `_initData`.
+     * Throws if the clone has no owner after that call, i.e. `_initData` did not initialize it.
+     */
+    function createEscrow(bytes32 _salt, bytes calldata _initData) external returns (address escrow) {
+        escrow = Clones.cloneDeterministic(implementation, _creatorSalt(msg.sender, _salt));
+        Address.functionCall(escrow, _initData, 'Escrow initialization failed');
+        require(Ownable(escrow).owner() != address(0), 'Escrow not initialized');
+        emit EscrowCreated(msg.sender, escrow, _salt);
+    }
+
+    /**
+     * @dev Returns the address of the clone `_creator` deploys with `_salt`.
+     */
+    function predictEscrowAddress(address _creator, bytes32 _salt) external view returns (address) {
+        return Clones.predictDeterministicAddress(implementation, _creatorSalt(_creator, _salt));
+    }
+
+    /**
+     * @dev Salt actually used by CREATE2 for `_salt` chosen by `_creator`.
+     */
+    function _creatorSalt(address _creator, bytes32 _salt) internal pure returns (bytes32) {
+        return keccak256(abi.encodePacked(_creator, _salt));
+    }
+
+
+}
@@ -0,0 +1,329 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/math/SafeCast.sol";
+import "@openzeppelin/contracts/utils/Multicall.sol";
+import "../payments/WithdrawalLedger.sol";
+
+
+/** @title EscrowMilestones
+ *  @dev Escrow of orders paid in milestones, after deployment any user can create a milestone order.
+ * Same settings and roles as `Escrow`, kept in its own contract so `Escrow` stays under the contract size limit.
+ * Process : Seller create an order with the amount of each milestone ( tranche ) and a deposit. Buyer initiate the order by paying
+ * all the tranches and the deposit at once. Then for each tranche : seller sends it, buyer releases it and the contract pays its
+ * amount to the seller. Expiry and disputes apply per tranche : a sent tranche expires to the seller after `numBlocksToExpire`
+ * blocks, and a disputed tranche is resolved by the admin for a `disputeFee`.
+ * Once every tranche is settled the order is closed and the deposit goes back to the buyer, or to the seller if a tranche expired.
+ * Tranches of all orders are stored in one array, one storage slot each, an order keeps the index of its first tranche.
+ * Funds are either pushed at settlement or credited to `pendingWithdrawals`, see `WithdrawalLedger`.
+ * Calls can be batched with `multicall`, e.g. sending several tranches, `msg.sender` is kept.
+ */
+contract EscrowMilestones is Ownable, WithdrawalLedger, Multicall {
+
+    /// fee charged by admin to handle the dispute of a tranche
+    uint256 public disputeFee;
+    /// minimum total amount of an order
+    uint256 public minOrderAmount;
+    /// number of blocks for a tranche to expire after seller send it
+    uint256 public numBlocksToExpire;
+    /// maximum number of tranches of an order
+    uint256 public constant MAX_MILESTONES = 32;
+    /// Array holding all orders, the orderId of an order is its index
+    MilestoneOrder[] private _orders;
+    /// tranches of all orders, those of an order are contiguous from its `firstTranche`
+    Tranche[] private _tranches;
+
+    enum OrderStatus {CREATED, INITIATED, CLOSED, CANCELLED}
+    enum TrancheStatus {PENDING, SENT, RELEASED, DISPUTED, RESOLVED, EXPIRED, REFUNDED}
+
+    /// @dev milestone order, packed in 2 storage slots : `status` to `forfeitDeposit` / `seller` and `deposit`.
+    /// @param openTranches number of tranches not settled yet, the order is closed when it reaches 0.
+    /// @param forfeitDeposit set when a tranche expires, the deposit then goes to the seller.
+    struct MilestoneOrder {
+        OrderStatus status;
+        address payable buyer;
+        uint64 firstTranche;
+        uint8 trancheCount;
+        uint8 openTranches;
+        bool forfeitDeposit;
+        address payable seller;
+        uint96 deposit;
+    }
+
+    /// @dev tranche of a milestone order, packed in 1 storage slot.
+    /// @param sendBlock block when the tranche was sent by the seller.
+    struct Tranche {
+        uint96 amount;
+        uint40 sendBlock;
+        TrancheStatus status;
+    }
+
+    /// @dev order events have the orderId as first topic, and the account acting on the order, if any, as second topic.
+    event OrderCreated(uint256 indexed _orderId, address indexed _seller, uint256[] _amounts, uint256 _deposit);
+    event OrderInitiated(uint256 indexed _orderId, address indexed _buyer);
+    event OrderCancelled(uint256 indexed _orderId, address indexed canceller, uint256 buyerRefund);
+    event OrderClosed(uint256 indexed _orderId, address indexed depositTo, uint256 deposit);
+    event MilestoneSent(uint256 indexed _orderId, uint256 _index);
+    event MilestoneReleased(uint256 indexed _orderId, uint256 _index, uint256 sellerRefund);
+    event MilestoneExpired(uint256 indexed _orderId, uint256 _index, uint256 sellerRefund);
+    event MilestoneDisputed(uint256 indexed _orderId, address indexed disputer, uint256 _index);
+    event MilestoneResolved(uint256 indexed _orderId, uint256 _index, uint256 buyerRefund, uint256 sellerRefund);
+
+    /**
+     * @dev Throws if called by an account other than the buyer of `orders[_orderId]`
+     */
+    modifier onlyBuyer(uint256 _orderId) {
+        require(_orders[_orderId].buyer == msg.sender, 'Only Buyer Allowed');
+        _;
+    }
+    /**
+     * @dev Throws if called by an account other than the seller of `orders[_orderId]`
+     */
+    modifier onlySeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender, 'Only Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Throws if called by an account other than the buyer or seller of `orders[_orderId]`
+     */
+    modifier onlyBuyerOrSeller(uint256 _orderId) {
+        require(_orders[_orderId].seller == msg.sender || _orders[_orderId].buyer == msg.sender , 'Only Buyer or Seller Allowed');
+        _;
+    }
+
+    /**
+     * @dev Initialize the contract settings, and owner to the deployer.
+     */
+    constructor(uint256 _minOrderAmount, uint256 _disputeFee, uint256 _numBlocksToExpire) {
+        require(_disputeFee < _minOrderAmount, 'Review settings');
+        disputeFee = _disputeFee;
+        minOrderAmount = _minOrderAmount;
+        numBlocksToExpire = _numBlocksToExpire;
+    }
+
+    /**
+     * @dev Returns the number of orders ever created.
+     */
+    function orderCount() public view returns (uint256) {
+        return _orders.length;
+    }
+
+    /**
+     * @dev Returns the order with `_orderId`.
+     */
+    function orders(uint256 _orderId) public view returns (MilestoneOrder memory) {
+        return _orders[_orderId];
+    }
+
+    /**
+     * @dev Returns the tranches of the order with `_orderId`, in milestone order.
+     */
+    function getMilestones(uint256 _orderId) public view returns (Tranche[] memory milestones) {
+        MilestoneOrder storage order = _orders[_orderId];
+        milestones = new Tranche[](order.trancheCount);
+        for (uint256 i = 0; i < milestones.length; i++) {
+            milestones[i] = _tranches[order.firstTranche + i];
+        }
+    }
+
+    /**
+     * @dev Creates a new order with status : `CREATED`, with one tranche per `_amounts[i]`.
+     * Each tranche must be above `disputeFee` and the total at least `minOrderAmount`.
+     */
+    function createOrder(uint256[] calldata _amounts, uint256 _deposit) external {
+        require(_amounts.length > 0 && _amounts.length <= MAX_MILESTONES, 'Wrong milestones');
+        uint256 fee = disputeFee;
+        uint256 total = 0;
+        uint256 firstTranche = _tranches.length;
+        for (uint256 i = 0; i < _amounts.length; i++) {
+            require(_amounts[i] > fee, 'Milestone Too Small');
+            total += _amounts[i];
+            _tranches.push(Tranche(SafeCast.toUint96(_amounts[i]), 0, TrancheStatus.PENDING));
+        }
+        require(total >= minOrderAmount, 'Order Too Small');
+        uint256 orderId = _orders.length;
+        MilestoneOrder storage order = _orders.push();
+        order.firstTranche = SafeCast.toUint64(firstTranche);
+        order.trancheCount = uint8(_amounts.length);
+        order.openTranches = uint8(_amounts.length);
+        order.seller = payable(msg.sender);
+        order.deposit = SafeCast.toUint96(_deposit);
+        emit OrderCreated(orderId, msg.sender, _amounts, _deposit);
+    }
+
+    /**
+     * @dev Initiate the order with `_orderId`, the buyer funds all the tranches and the deposit in one payment.
+     */
+    function initiateOrder(uint256 _orderId) external payable {
+        MilestoneOrder storage order = _orders[_orderId];
+        require(order.status == OrderStatus.CREATED && order.buyer == address(0), 'Order already initiated');
+        require(msg.value == _orderTotal(order) + order.deposit, 'wrong amount');
+        order.buyer = payable(msg.sender);
+        order.status = OrderStatus.INITIATED;
+        emit OrderInitiated(_orderId, msg.sender);
+    }
+
+    /**
+     * @dev Change status of tranche `_index` of order `_orderId` to `SENT`. Only the seller of that order can call it.
+     */
+    function sendMilestone(uint256 _orderId, uint256 _index) external onlySeller(_orderId) {
+        Tranche storage tranche = _tranche(_orderId, _index, TrancheStatus.PENDING);
+        tranche.status = TrancheStatus.SENT;
+        tranche.sendBlock = uint40(block.number);
+        emit MilestoneSent(_orderId, _index);
+    }
+
+    /**
+     * @dev Change status of tranche `_index` of order `_orderId` to `RELEASED` and pays its amount to the seller.
+     * Only the buyer of that order can call it.
+     */
+    function releaseMilestone(uint256 _orderId, uint256 _index) external onlyBuyer(_orderId) {
+        Tranche storage tranche = _tranche(_orderId, _index, TrancheStatus.SENT);
+        uint256 amount = tranche.amount;
+        tranche.status = TrancheStatus.RELEASED;
+        _pay(_orders[_orderId].seller, ETH, amount);
+        emit MilestoneReleased(_orderId, _index, amount);
+        _settleTranche(_orderId);
+    }
+
+    /**
+     * @dev Change status of tranche `_index` of order `_orderId` to `EXPIRED` and pays its amount to the seller.
+     * Only the seller of that order can call it, once the tranche was sent more than `numBlocksToExpire` blocks ago.
+     * The buyer loses the deposit of the order.
+     */
+    function expireMilestone(uint256 _orderId, uint256 _index) external onlySeller(_orderId) {
+        Tranche storage tranche = _tranche(_orderId, _index, TrancheStatus.SENT);
+        require(tranche.sendBlock + numBlocksToExpire < block.number, 'Milestone not expired yet');
+        uint256 amount = tranche.amount;
+        tranche.status = TrancheStatus.EXPIRED;
+        _orders[_orderId].forfeitDeposit = true;
+        _pay(_orders[_orderId].seller, ETH, amount);
+        emit MilestoneExpired(_orderId, _index, amount);
+        _settleTranche(_orderId);
+    }
+
+    /**
+     * @dev Change status of tranche `_index` of order `_orderId` to `DISPUTED`. Only the seller or buyer of that order can call it.
+     * Can only be called if the tranche is `SENT`, the other tranches go on.
+     */
+    function disputeMilestone(uint256 _orderId, uint256 _index) external onlyBuyerOrSeller(_orderId) {
+        Tranche storage tranche = _tranche(_orderId, _index, TrancheStatus.SENT);
+        tranche.status = TrancheStatus.DISPUTED;
+        emit MilestoneDisputed(_orderId, msg.sender, _index);
+    }
+
+    /**
+     * @dev Change status of the disputed tranche `_index` of order `_orderId` to `RESOLVED`. Only the owner of the contract can call it.
+     * Pays `_refundToBuyer` to the buyer and the rest of the tranche minus `disputeFee` to the seller, the fee is added to `accruedFees`.
+     */
+    function resolveMilestone(uint256 _orderId, uint256 _index, uint256 _refundToBuyer) external onlyOwner() {
+        Tranche storage tranche = _tranche(_orderId, _index, TrancheStatus.DISPUTED);
+        uint256 fee = disputeFee;
+        require(_refundToBuyer + fee <= tranche.amount, 'High refund');
+        uint256 refundToSeller = tranche.amount - _refundToBuyer - fee;
+        tranche.status = TrancheStatus.RESOLVED;
+        MilestoneOrder storage order = _orders[_orderId];
+        _accrueFee(fee);
+        _pay(order.buyer, ETH, _refundToBuyer);
+        _pay(order.seller, ETH, refundToSeller);
+        emit MilestoneResolved(_orderId, _index, _refundToBuyer, refundToSeller);
+        _settleTranche(_orderId);
+    }
+
+    /**
+     * @dev Cancels the order with `_orderId` and refunds the buyer, who can only call it before any tranche is sent.
+     * Makes order available again.
+     */
+    function cancelBuyOrder(uint256 _orderId) external onlyBuyer(_orderId) {
+        MilestoneOrder storage order = _orders[_orderId];
+        require(order.status == OrderStatus.INITIATED, "Can't cancell order now");
+        uint256 first = order.firstTranche;
+        for (uint256 i = first; i < first + order.trancheCount; i++) {
+            require(_tranches[i].status == TrancheStatus.PENDING, "Can't cancell order now");
+        }
+        uint256 refund = _orderTotal(order) + order.deposit;
+        order.status = OrderStatus.CREATED;
+        order.buyer = payable(address(0));
+        _pay(payable(msg.sender), ETH, refund);
+        emit OrderCancelled(_orderId, msg.sender, refund);
+    }
+
+    /**
+     * @dev Cancels the order with `_orderId`. Only the seller of that order can call it.
+     * If the order is initiated, the pending and sent tranches and the deposit are refunded to the buyer,
+     * released, expired and resolved tranches are kept, and disputed tranches are left to the admin.
+     */
+    function cancelSellOrder(uint256 _orderId) external onlySeller(_orderId) {
+        MilestoneOrder storage order = _orders[_orderId];
+        OrderStatus status = order.status;
+        require(status == OrderStatus.CREATED || status == OrderStatus.INITIATED, "Can't cancell order now");
+        order.status = OrderStatus.CANCELLED;
+        uint256 refund = 0;
+        if (status == OrderStatus.INITIATED) {
+            uint256 first = order.firstTranche;
+            uint256 open = order.openTranches;
+            for (uint256 i = first; i < first + order.trancheCount; i++) {
+                Tranche storage tranche = _tranches[i];
+                if (tranche.status == TrancheStatus.PENDING || tranche.status == TrancheStatus.SENT) {
+                    tranche.status = TrancheStatus.REFUNDED;
+                    refund += tranche.amount;
+                    open--;
+                }
+            }
+            order.openTranches = uint8(open);
+            refund += order.deposit;
+            order.deposit = 0;
+            _pay(order.buyer, ETH, refund);
+        }
+        emit OrderCancelled(_orderId, msg.sender, refund);
+    }
+
+    /**
+     * @dev Returns tranche `_index` of order `_orderId`, throws if the order is not initiated or the tranche not in `_status`.
+     * Disputed tranches of a cancelled order can still be resolved.
+     */
+    function _tranche(uint256 _orderId, uint256 _index, TrancheStatus _status) internal view returns (Tranche storage tranche) {
+        MilestoneOrder storage order = _orders[_orderId];
+        require(
+            order.status == OrderStatus.INITIATED || (order.status == OrderStatus.CANCELLED && _status == TrancheStatus.DISPUTED),
+            'Order not initiated'
+        );
+        require(_index < order.trancheCount, 'Wrong milestone');
+        tranche = _tranches[order.firstTranche + _index];
+        require(tranche.status == _status, 'Wrong milestone status');
+    }
+
+    /**
+     * @dev Counts a settled tranche of order `_orderId`. When it was the last one the order is closed
+     * and the deposit is paid to the buyer, or to the seller if a tranche expired.
+     */
+    function _settleTranche(uint256 _orderId) internal {
+        MilestoneOrder storage order = _orders[_orderId];
+        uint256 open = order.openTranches - 1;
+        order.openTranches = uint8(open);
+        if (open > 0 || order.status != OrderStatus.INITIATED) {
+            return;
+        }
+        order.status = OrderStatus.CLOSED;
+        address payable depositTo = order.forfeitDeposit ? order.seller : order.buyer;
+        uint256 deposit = order.deposit;
+        _pay(depositTo, ETH, deposit);
+        emit OrderClosed(_orderId, depositTo, deposit);
+    }
+
+    /**
+     * @dev Returns the sum of the tranches of `_order`.
+     */
+    function _orderTotal(MilestoneOrder storage _order) internal view returns (uint256 total) {
+        uint256 first = _order.firstTranche;
+        for (uint256 i = first; i < first + _order.trancheCount; i++) {
+            total += _tranches[i].amount;
+        }
+    }
+
+
+}
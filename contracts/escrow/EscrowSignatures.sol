@@ -0,0 +1,121 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/draft-EIP712.sol";
+import "@openzeppelin/contracts/metatx/ERC2771Context.sol";
+import "../../interfaces/IEscrow.sol";
+
+
+/** @title EscrowSignatures
+ *  @dev Creates the orders of an `Escrow` signed off-chain (EIP-712), kept out of `Escrow` to stay under the contract size limit.
+ * Sellers sign `SignedOrder` messages, an order is only stored on the escrow when a buyer initiates it with `initiateSignedOrder`,
+ * which creates and initiates it through `initiateOrderFor`.
+ * The escrow owner sets this contract as `signatureVerifier` of the escrow.
+ * Each nonce of a seller can be used once, unused ones are cancelled in bulk with `invalidateNonces`.
+ * Buyer and seller can also settle an initiated order at once by both signing a `Release`, see `settleCooperatively`.
+ * Calls can be relayed by the trusted forwarder of the escrow (ERC-2771).
+ */
+contract EscrowSignatures is EIP712, ERC2771Context {
+
+    /// escrow the signed orders are created and settled on
+    IEscrow public immutable escrow;
+    /// used or invalidated nonces of signed orders per seller, 256 nonces per word : nonce `n` is bit `n % 256` of word `n / 256`
+    mapping(address => mapping(uint256 => uint256)) public nonceBitmap;
+
+    bytes32 private constant _SIGNED_ORDER_TYPEHASH =
+        keccak256("SignedOrder(address seller,uint256 amount,uint256 deposit,uint256 nonce,uint256 deadline)");
+    bytes32 private constant _RELEASE_TYPEHASH =
+        keccak256("Release(uint256 orderId,uint256 nonce,uint256 payoutBuyer,uint256 payoutSeller,uint256 deadline)");
+
+    /// @dev order signed off-chain by its seller, see `initiateSignedOrder`.
+    /// @param deadline timestamp after which the signature can't be used.
+    struct SignedOrder {
+        address seller;
+        uint256 amount;
+        uint256 deposit;
+        uint256 nonce;
+        uint256 deadline;
+    }
+
+    event NoncesInvalidated(address indexed _seller, uint256 _wordPos, uint256 _mask);
+
+    /**
+     * @dev Sets the escrow the signed orders are created and settled on.
+     * `_trustedForwarder` is the ERC-2771 forwarder allowed to relay calls, `address(0)` for none.
+     */
+    constructor(address _escrow, address _trustedForwarder)
+        EIP712("EscrowSignatures", "1")
+        ERC2771Context(_trustedForwarder)
+    {
+        escrow = IEscrow(_escrow);
+    }
+
+    /**
+     * @dev Creates the order signed off-chain by `_order.seller` on the escrow and initiates it with the caller as buyer,
+     * sending the funds. The nonce of the order is marked as used, so the signature can only be used once.
+     * Returns the orderId.
+     */
+    function initiateSignedOrder(SignedOrder calldata _order, bytes calldata _signature) external payable returns (uint256) {
+        require(block.timestamp <= _order.deadline, 'Signature expired');
+        bytes32 structHash = keccak256(abi.encode(
+            _SIGNED_ORDER_TYPEHASH, _order.seller, _order.amount, _order.deposit, _order.nonce, _order.deadline
+        ));
+        require(ECDSA.recover(_hashTypedDataV4(structHash), _signature) == _order.seller, 'Invalid signature');
+        _useNonce(_order.seller, _order.nonce);
+        return escrow.initiateOrderFor{value: msg.value}(_order.seller, _order.amount, _order.deposit, _msgSender());
+    }
+
+    /**
+     * @dev Invalidates the signed orders of the caller whose nonce is in word `_wordPos` of `nonceBitmap` and has its bit set in `_mask`.
+     */
+    function invalidateNonces(uint256 _wordPos, uint256 _mask) external {
+        nonceBitmap[_msgSender()][_wordPos] |= _mask;
+        emit NoncesInvalidated(_msgSender(), _wordPos, _mask);
+    }
+
+    /**
+     * @dev Settles the order with `_orderId` of the escrow as `RECEIVED`, paying `_payoutBuyer` to the buyer and `_payoutSeller`
+     * to the seller, as agreed in the EIP-712 `Release` message signed by both of them. Anyone can submit it until `_deadline`.
+     * The escrow checks the status of the order and the payouts, see `Escrow.releaseOrder`.
+     * The release is signed with the `releaseNonce` of the order, bumped when the buyer cancels, so releases signed before
+     * a cancellation can't settle the order once the same buyer initiates it again. The order is settled, so the signatures
+     * can only be used once.
+     */
+    function settleCooperatively(
+        uint256 _orderId,
+        uint256 _payoutBuyer,
+        uint256 _payoutSeller,
+        uint256 _deadline,
+        bytes calldata _sigBuyer,
+        bytes calldata _sigSeller
+    ) external {
+        require(block.timestamp <= _deadline, 'Signature expired');
+        (, address buyer, address seller, , , , ) = escrow.orders(_orderId);
+        bytes32 digest = _hashTypedDataV4(keccak256(abi.encode(
+            _RELEASE_TYPEHASH, _orderId, escrow.releaseNonce(_orderId), _payoutBuyer, _payoutSeller, _deadline
+        )));
+        require(ECDSA.recover(digest, _sigBuyer) == buyer, 'Invalid buyer signature');
+        require(ECDSA.recover(digest, _sigSeller) == seller, 'Invalid seller signature');
+        escrow.releaseOrder(_orderId, _payoutBuyer, _payoutSeller);
+    }
+
+    /**
+     * @dev Returns the EIP-712 domain separator used to sign orders and releases.
+     */
+    function DOMAIN_SEPARATOR() external view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+
+    /**
+     * @dev Marks `_nonce` of `_seller` as used, throws if it was already used or invalidated.
+     */
+    function _useNonce(address _seller, uint256 _nonce) internal {
+        uint256 bit = uint256(1) << (_nonce & 0xff);
+        uint256 word = nonceBitmap[_seller][_nonce >> 8];
+        require(word & bit == 0, 'Nonce already used');
+        nonceBitmap[_seller][_nonce >> 8] = word | bit;
+    }
+}
@@ -0,0 +1,125 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/utils/Address.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/draft-EIP712.sol";
+
+/** @title BatchForwarder
+ *  @dev ERC-2771 forwarder, OpenZeppelin `MinimalForwarder` with a batch entry point. Users sign `ForwardRequest`s off-chain (EIP-712)
+ * and a relayer submits many of them in one `executeBatch` transaction, paying a single base fee.
+ * The target gets `abi.encodePacked(data, from)` and reads the signer with `_msgSender()` ( see `ERC2771Context` ).
+ * A request with a wrong signature or nonce, or whose call fails, does not revert the batch, its outcome is in `RequestExecuted`.
+ */
+contract BatchForwarder is EIP712 {
+
+    struct ForwardRequest {
+        address from;
+        address to;
+        uint256 value;
+        uint256 gas;
+        uint256 nonce;
+        bytes data;
+    }
+
+    bytes32 private constant _TYPEHASH =
+        keccak256("ForwardRequest(address from,address to,uint256 value,uint256 gas,uint256 nonce,bytes data)");
+
+    /// next nonce of each signer, requests of a signer are executed in nonce order
+    mapping(address => uint256) private _nonces;
+
+    /// @dev `_index` is the position of the request in the batch, `_executed` is false if the signature or nonce was invalid.
+    event RequestExecuted(uint256 indexed _index, address indexed _from, uint256 _nonce, bool _executed, bool _success);
+
+    constructor() EIP712("BatchForwarder", "1") {}
+
+    /**
+     * @dev Returns the nonce the next request of `_from` must be signed with.
+     */
+    function getNonce(address _from) public view returns (uint256) {
+        return _nonces[_from];
+    }
+
+    /**
+     * @dev Returns the EIP-712 domain separator used to sign requests.
+     */
+    function DOMAIN_SEPARATOR() external view returns (bytes32) {
+        return _domainSeparatorV4();
+    }
+
+    /**
+     * @dev Returns whether `_signature` is the signature of `_req` by `_req.from` and `_req.nonce` is the next nonce of the signer.
+     * A malformed signature returns false instead of reverting, so it can't revert a batch.
+     */
+    function verify(ForwardRequest calldata _req, bytes calldata _signature) public view returns (bool) {
+        bytes32 structHash = keccak256(abi.encode(
+            _TYPEHASH, _req.from, _req.to, _req.value, _req.gas, _req.nonce, keccak256(_req.data)
+        ));
+        (address signer, ECDSA.RecoverError error) = ECDSA.tryRecover(_hashTypedDataV4(structHash), _signature);
+        return error == ECDSA.RecoverError.NoError && signer == _req.from && _nonces[_req.from] == _req.nonce;
+    }
+
+    /**
+     * @dev Executes a single request, reverts if the signature or nonce is invalid. `msg.value` must be `_req.value`.
+     */
+    function execute(ForwardRequest calldata _req, bytes calldata _signature) external payable returns (bool success, bytes memory result) {
+        require(msg.value == _req.value, 'Wrong value');
+        require(verify(_req, _signature), 'Invalid request');
+        (success, result) = _execute(_req);
+        if (!success && _req.value > 0) {
+            Address.sendValue(payable(msg.sender), _req.value);
+        }
+    }
+
+    /**
+     * @dev Executes each request of `_requests` signed with `_signatures[i]`, in order, and returns the success and return data of each call.
+     * Requests with an invalid signature or nonce are skipped, failed calls don't revert the batch.
+     * `msg.value` must be the sum of the `value` of the requests, the value of skipped or failed requests is sent back to the caller.
+     */
+    function executeBatch(ForwardRequest[] calldata _requests, bytes[] calldata _signatures)
+        external
+        payable
+        returns (bool[] memory successes, bytes[] memory results)
+    {
+        require(_requests.length == _signatures.length, 'Length mismatch');
+        uint256 value = 0;
+        uint256 refund = 0;
+        successes = new bool[](_requests.length);
+        results = new bytes[](_requests.length);
+        for (uint256 i = 0; i < _requests.length; i++) {
+            ForwardRequest calldata req = _requests[i];
+            value += req.value;
+            bool executed = verify(req, _signatures[i]);
+            if (executed) {
+                (successes[i], results[i]) = _execute(req);
+            }
+            if (!successes[i]) {
+                refund += req.value;
+            }
+            emit RequestExecuted(i, req.from, req.nonce, executed, successes[i]);
+        }
+        require(value == msg.value, 'Wrong value');
+        if (refund > 0) {
+            Address.sendValue(payable(msg.sender), refund);
+        }
+    }
+
+    /**
+     * @dev Uses the nonce of `_req` and calls its target with the signer appended to the calldata.
+     * Aborts the whole transaction if the relayer did not give the call the `gas` signed by the user.
+     */
+    function _execute(ForwardRequest calldata _req) internal returns (bool success, bytes memory result) {
+        _nonces[_req.from] = _req.nonce + 1;
+        (success, result) = _req.to.call{gas: _req.gas, value: _req.value}(abi.encodePacked(_req.data, _req.from));
+        // the call got at most 63/64 of the gas left, see EIP-150
+        if (gasleft() <= _req.gas / 63) {
+            assembly {
+                invalid()
+            }
+        }
+    }
+
+
+}
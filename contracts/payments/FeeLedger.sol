@@ -0,0 +1,43 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "@openzeppelin/contracts/access/Ownable.sol";
+import "@openzeppelin/contracts/utils/Address.sol";
+
+/** @title FeeLedger
+ *  @dev Fees of the escrow contracts. Instead of sending the fee of each order to the owner at settlement,
+ * fees accrue in `accruedFees` and the owner sweeps them with `withdrawFees`.
+ * `accruedFees` is a uint88 so that it shares the storage slot of `owner`, see `WithdrawalLedger`.
+ */
+abstract contract FeeLedger is Ownable {
+
+
+    /// fees in ETH collected by the contract and not withdrawn yet by the owner
+    uint88 public accruedFees;
+
+    event FeesWithdrawn(address indexed to, uint256 amount);
+
+    /**
+     * @dev Sends all the accrued fees to `_to`. Only the owner can call it.
+     */
+    function withdrawFees(address payable _to) public onlyOwner() {
+        uint256 fees = accruedFees;
+        require(fees > 0, 'No fees to withdraw');
+        accruedFees = 0;
+        Address.sendValue(_to, fees);
+        emit FeesWithdrawn(_to, fees);
+    }
+
+    /**
+     * @dev Adds `_fee` to the fees owed to the owner.
+     */
+    function _accrueFee(uint256 _fee) internal {
+        uint256 fees = accruedFees + _fee;
+        require(fees <= type(uint88).max, 'Fees overflow');
+        accruedFees = uint88(fees);
+    }
+
+
+}
@@ -0,0 +1,92 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+
+import "./FeeLedger.sol";
+import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/utils/SafeERC20.sol";
+import "@openzeppelin/contracts/utils/Address.sol";
+
+/** @title WithdrawalLedger
+ *  @dev Settlement of the escrow contracts. By default funds are pushed to the recipient when an order settles.
+ * When the owner turns on `pullPayments`, settlements only credit `pendingWithdrawals[account][asset]` and
+ * each account collects its balances, possibly from many orders, with a single `withdraw`.
+ * The asset `address(0)` stands for ETH.
+ * Fees of the owner are not paid through `_pay`, they accrue in `accruedFees`, see `FeeLedger`.
+ * ERC20 transfers go through `SafeERC20`, a token returning `false` reverts, and tokens are received with `_collect`.
+ */
+abstract contract WithdrawalLedger is FeeLedger {
+    using SafeERC20 for IERC20;
+
+
+    /// asset used for ETH balances
+    address internal constant ETH = address(0);
+    /// when true settlements credit `pendingWithdrawals` instead of transferring funds, packed with `owner` and `accruedFees`
+    bool public pullPayments;
+    /// amount owed by the contract per account and asset
+    mapping(address => mapping(address => uint256)) public pendingWithdrawals;
+
+    event PullPaymentsSet(bool enabled);
+    event PaymentCredited(address indexed account, address indexed asset, uint256 amount);
+    event Withdrawn(address indexed account, address indexed asset, uint256 amount);
+
+    /**
+     * @dev Switch between pushing funds at settlement and crediting `pendingWithdrawals`. Only the owner can call it.
+     * Balances already credited stay withdrawable.
+     */
+    function setPullPayments(bool _enabled) public onlyOwner() {
+        pullPayments = _enabled;
+        emit PullPaymentsSet(_enabled);
+    }
+
+    /**
+     * @dev Sends the caller its whole balance of each asset in `_assets`, assets without balance are skipped.
+     * ETH is sent with all the gas available so smart contract wallets can withdraw.
+     */
+    function withdraw(address[] calldata _assets) public {
+        address payable account = payable(_msgSender());
+        for (uint256 i = 0; i < _assets.length; i++) {
+            uint256 balance = pendingWithdrawals[account][_assets[i]];
+            if (balance == 0) {
+                continue;
+            }
+            pendingWithdrawals[account][_assets[i]] = 0;
+            if (_assets[i] == ETH) {
+                Address.sendValue(account, balance);
+            } else {
+                IERC20(_assets[i]).safeTransfer(account, balance);
+            }
+            emit Withdrawn(account, _assets[i], balance);
+        }
+    }
+
+    /**
+     * @dev Pays `_amount` of `_asset` to `_to`, either right away or by crediting its pending withdrawals.
+     */
+    function _pay(address payable _to, address _asset, uint256 _amount) internal {
+        if (_amount == 0) {
+            return;
+        }
+        if (pullPayments) {
+            pendingWithdrawals[_to][_asset] += _amount;
+            emit PaymentCredited(_to, _asset, _amount);
+        } else if (_asset == ETH) {
+            _to.transfer(_amount);
+        } else {
+            IERC20(_asset).safeTransfer(_to, _amount);
+        }
+    }
+
+    /**
+     * @dev Transfers `_amount` of `_token` from `_from` to the contract, throws unless the contract balance grew by exactly `_amount`,
+     * so fee-on-transfer tokens, which would leave less than the order books, are rejected.
+     */
+    function _collect(address _token, address _from, uint256 _amount) internal {
+        uint256 balanceBefore = IERC20(_token).balanceOf(address(this));
+        IERC20(_token).safeTransferFrom(_from, address(this), _amount);
+        require(IERC20(_token).balanceOf(address(this)) - balanceBefore == _amount, 'Fee on transfer token');
+    }
+
+
+}
@@ -0,0 +1,15 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/token/ERC1155/ERC1155.sol";
+
+contract EscrowItems is ERC1155 {
+
+    constructor() ERC1155("https://escrow.items/{id}.json") {}
+
+    function mintItems(uint256[] memory ids, uint256[] memory amounts) public {
+        _mintBatch(msg.sender, ids, amounts, "");
+    }
+
+
+}
@@ -2,8 +2,9 @@
 pragma solidity ^0.8.0;
 
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
-contract EscrowToken is ERC20 {
-    constructor() public ERC20("Escrow Token", "ESCRW"){
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-ERC20Permit.sol";
+contract EscrowToken is ERC20, ERC20Permit {
+    constructor() public ERC20("Escrow Token", "ESCRW") ERC20Permit("Escrow Token"){
         _mint(msg.sender, 1000000000000000000000000);
     }
-}
\ No newline at end of file
+}
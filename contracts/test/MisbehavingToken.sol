@@ -0,0 +1,44 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+/** @title MisbehavingToken
+ *  @dev ERC20 token for the tests of the escrows against non standard tokens : when `returnFalse` is set, transfers
+ * return `false` without moving tokens instead of reverting, and `transferFeeBps` of each transfer is burnt.
+ */
+contract MisbehavingToken is ERC20 {
+    bool public returnFalse;
+    uint256 public transferFeeBps;
+
+    constructor() ERC20("Misbehaving Token", "MSBHV") {
+        _mint(msg.sender, 1000000000000000000000000);
+    }
+
+    function setBehaviour(bool _returnFalse, uint256 _transferFeeBps) public {
+        returnFalse = _returnFalse;
+        transferFeeBps = _transferFeeBps;
+    }
+
+    function transfer(address _to, uint256 _amount) public override returns (bool) {
+        if (returnFalse) {
+            return false;
+        }
+        return super.transfer(_to, _amount);
+    }
+
+    function transferFrom(address _from, address _to, uint256 _amount) public override returns (bool) {
+        if (returnFalse) {
+            return false;
+        }
+        return super.transferFrom(_from, _to, _amount);
+    }
+
+    function _transfer(address _from, address _to, uint256 _amount) internal override {
+        uint256 fee = _amount * transferFeeBps / 10000;
+        if (fee > 0) {
+            _burn(_from, fee);
+        }
+        super._transfer(_from, _to, _amount - fee);
+    }
+}
@@ -0,0 +1,63 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+
+import {WadRayMath} from '@aave/contracts/protocol/libraries/math/WadRayMath.sol';
+import {SafeMath} from '@aave/contracts/dependencies/openzeppelin/contracts/SafeMath.sol';
+
+interface IMockLendingPool {
+    function getReserveNormalizedIncome(address asset) external view returns (uint256);
+}
+
+/** @title MockAToken
+ *  @dev Minimal Aave v2 aToken for local tests : balances are stored scaled by the liquidity index of `pool`
+ * and grow with it. Only the pool can mint and burn, aTokens can't be transferred.
+ */
+contract MockAToken {
+    using WadRayMath for uint256;
+    using SafeMath for uint256;
+
+    address public immutable pool;
+    address public immutable underlyingAsset;
+    uint256 private _totalScaled;
+    mapping(address => uint256) private _scaledBalances;
+
+    modifier onlyPool() {
+        require(msg.sender == pool, 'Only Pool Allowed');
+        _;
+    }
+
+    constructor(address _pool, address _underlyingAsset) public {
+        pool = _pool;
+        underlyingAsset = _underlyingAsset;
+    }
+
+    function scaledBalanceOf(address _user) public view returns (uint256) {
+        return _scaledBalances[_user];
+    }
+
+    function balanceOf(address _user) public view returns (uint256) {
+        return _scaledBalances[_user].rayMul(_index());
+    }
+
+    function totalSupply() public view returns (uint256) {
+        return _totalScaled.rayMul(_index());
+    }
+
+    function mint(address _user, uint256 _amount, uint256 _index) public onlyPool() {
+        uint256 amountScaled = _amount.rayDiv(_index);
+        require(amountScaled != 0, 'Invalid mint amount');
+        _scaledBalances[_user] = _scaledBalances[_user].add(amountScaled);
+        _totalScaled = _totalScaled.add(amountScaled);
+    }
+
+    function burn(address _user, uint256 _amount, uint256 _index) public onlyPool() {
+        uint256 amountScaled = _amount.rayDiv(_index);
+        require(amountScaled != 0, 'Invalid burn amount');
+        _scaledBalances[_user] = _scaledBalances[_user].sub(amountScaled);
+        _totalScaled = _totalScaled.sub(amountScaled);
+    }
+
+    function _index() internal view returns (uint256) {
+        return IMockLendingPool(pool).getReserveNormalizedIncome(underlyingAsset);
+    }
+}
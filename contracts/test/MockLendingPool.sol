@@ -0,0 +1,60 @@
+// SPDX-License-Identifier: MIT
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {DataTypes} from '@aave/contracts/protocol/libraries/types/DataTypes.sol';
+import {IERC20} from '@aave/contracts/dependencies/openzeppelin/contracts/IERC20.sol';
+import {SafeMath} from '@aave/contracts/dependencies/openzeppelin/contracts/SafeMath.sol';
+import {WadRayMath} from '@aave/contracts/protocol/libraries/math/WadRayMath.sol';
+import './MockAToken.sol';
+
+/** @title MockLendingPool
+ *  @dev Minimal Aave v2 lending pool for local tests : `deposit`, `withdraw`, `getReserveData` and
+ * `getReserveNormalizedIncome` behave like Aave for a reserve added with `addReserve`.
+ * `accrueYield` simulates interest : it pulls `amount` of underlying from the caller and raises the
+ * liquidity index so that aToken holders share it pro rata.
+ */
+contract MockLendingPool {
+    using WadRayMath for uint256;
+    using SafeMath for uint256;
+
+    mapping(address => MockAToken) public aTokens;
+    mapping(address => uint256) private _liquidityIndex;
+
+    function addReserve(address _asset) public returns (address) {
+        require(address(aTokens[_asset]) == address(0), 'Reserve already added');
+        aTokens[_asset] = new MockAToken(address(this), _asset);
+        _liquidityIndex[_asset] = WadRayMath.ray();
+        return address(aTokens[_asset]);
+    }
+
+    function deposit(address _asset, uint256 _amount, address _onBehalfOf, uint16) public {
+        IERC20(_asset).transferFrom(msg.sender, address(this), _amount);
+        aTokens[_asset].mint(_onBehalfOf, _amount, _liquidityIndex[_asset]);
+    }
+
+    function withdraw(address _asset, uint256 _amount, address _to) public returns (uint256) {
+        if (_amount == type(uint256).max) {
+            _amount = aTokens[_asset].balanceOf(msg.sender);
+        }
+        aTokens[_asset].burn(msg.sender, _amount, _liquidityIndex[_asset]);
+        IERC20(_asset).transfer(_to, _amount);
+        return _amount;
+    }
+
+    function accrueYield(address _asset, uint256 _amount) public {
+        uint256 supply = aTokens[_asset].totalSupply();
+        require(supply > 0, 'No liquidity');
+        IERC20(_asset).transferFrom(msg.sender, address(this), _amount);
+        _liquidityIndex[_asset] = _liquidityIndex[_asset].add(_liquidityIndex[_asset].mul(_amount).div(supply));
+    }
+
+    function getReserveNormalizedIncome(address _asset) public view returns (uint256) {
+        return _liquidityIndex[_asset];
+    }
+
+    function getReserveData(address _asset) public view returns (DataTypes.ReserveData memory data) {
+        data.liquidityIndex = uint128(_liquidityIndex[_asset]);
+        data.aTokenAddress = address(aTokens[_asset]);
+    }
+}
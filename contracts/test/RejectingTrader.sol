@@ -0,0 +1,24 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+import "@openzeppelin/contracts/utils/Address.sol";
+
+/** @title RejectingTrader
+ *  @dev Contract account for the tests of the escrows against counterparties refusing payments : it forwards calls
+ * with `execute`, and rejects the ETH it receives while `rejectPayments` is set.
+ */
+contract RejectingTrader {
+    bool public rejectPayments = true;
+
+    function setRejectPayments(bool _rejectPayments) public {
+        rejectPayments = _rejectPayments;
+    }
+
+    function execute(address _target, bytes calldata _data) public payable returns (bytes memory) {
+        return Address.functionCallWithValue(_target, _data, msg.value);
+    }
+
+    receive() external payable {
+        require(!rejectPayments, 'Payments rejected');
+    }
+}
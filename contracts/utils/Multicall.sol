@@ -0,0 +1,32 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity >=0.6.0 <0.8.0;
+pragma experimental ABIEncoderV2;
+
+/*
+ * @dev Provides a function to batch together multiple calls in a single external call,
+ * port of OpenZeppelin 4.x `Multicall` for the 0.6 contracts.
+ *
+ * Each call is a delegatecall to this contract so `msg.sender` is kept. `multicall` is not payable :
+ * a batch can't carry ETH, so `msg.value` can't be counted once per call.
+ */
+abstract contract Multicall {
+    /**
+     * @dev Receives and executes a batch of function calls on this contract, reverts with the
+     * reason of the first failing call.
+     */
+    function multicall(bytes[] calldata data) external virtual returns (bytes[] memory results) {
+        results = new bytes[](data.length);
+        for (uint256 i = 0; i < data.length; i++) {
+            (bool success, bytes memory result) = address(this).delegatecall(data[i]);
+            if (!success) {
+                if (result.length == 0) revert('Multicall: call failed');
+                assembly {
+                    revert(add(32, result), mload(result))
+                }
+            }
+            results[i] = result;
+        }
+        return results;
+    }
+}
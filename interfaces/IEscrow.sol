@@ -0,0 +1,26 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+/**
+ * @dev Functions of `Escrow` used by the contracts extending it, see `EscrowDisputeRoots` and `EscrowSignatures`.
+ */
+interface IEscrow {
+    function orders(uint256 _orderId) external view returns (
+        uint8 status,
+        address buyer,
+        address seller,
+        uint256 amount,
+        uint256 deposit,
+        uint256 orderId,
+        uint256 sendBlock
+    );
+
+    function settleDispute(uint256 _orderId, uint256 _refundToBuyer, uint256 _refundToSeller) external;
+
+    function releaseNonce(uint256 _orderId) external view returns (uint256);
+
+    function initiateOrderFor(address _seller, uint256 _amount, uint256 _deposit, address _buyer) external payable returns (uint256 orderId);
+
+    function releaseOrder(uint256 _orderId, uint256 _payoutBuyer, uint256 _payoutSeller) external;
+}
@@ -0,0 +1,90 @@
+import json
+import os
+
+# gas results of the benchmark runs, one json file per label, e.g. `benchmarks/before.json`
+RESULTS_DIR = "benchmarks"
+REPORT_PATH = os.path.join("docs", "benchmarks.md")
+
+
+def results_path(label):
+    return os.path.join(RESULTS_DIR, f"{label}.json")
+
+
+def load_results(label):
+    """
+    Returns the results saved under `label` : `{section: {row: gas}}`, empty if nothing was saved.
+    """
+    if not os.path.exists(results_path(label)):
+        return {}
+    with open(results_path(label)) as results_file:
+        return json.load(results_file)
+
+
+def save_results(label, section, rows):
+    """
+    Saves the gas results `{row: gas}` of benchmark `section` under `label`, keeping the other sections of that label.
+    A row holding a tuple, e.g. `(gas used, gas refunded)`, is saved as its first value.
+    """
+    results = load_results(label)
+    results[section] = {
+        str(row): value[0] if isinstance(value, (tuple, list)) else value
+        for row, value in rows.items()
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(results_path(label), "w") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+
+
+def comparison_table(before, after):
+    """
+    Returns the markdown table comparing the rows of `before` and `after`, a row missing on one side is left blank.
+    """
+    lines = ["| | before | after | change |", "|---|---:|---:|---:|"]
+    for row in list(before) + [row for row in after if row not in before]:
+        old, new = before.get(row), after.get(row)
+        change = f"{(new - old) / old:+.1%}" if old and new is not None else ""
+        cells = ["" if value is None else str(value) for value in (old, new)]
+        lines.append(f"| {row} | {cells[0]} | {cells[1]} | {change} |")
+    return "\n".join(lines)
+
+
+def results_table(label, rows):
+    """
+    Returns the markdown table of the rows of a section saved under `label` only, e.g. a benchmark comparing
+    two entry points within one run.
+    """
+    lines = [f"| | {label} |", "|---|---:|"]
+    lines += [f"| {row} | {value} |" for row, value in rows.items()]
+    return "\n".join(lines)
+
+
+def write_report(before_label="before", after_label="after", path=REPORT_PATH):
+    """
+    Writes the markdown report comparing every section saved under `before_label` and `after_label` to `path`.
+    A section saved under one of them only is written as a single column.
+    """
+    before, after = load_results(before_label), load_results(after_label)
+    sections = list(before) + [section for section in after if section not in before]
+    if not sections:
+        raise ValueError(f"No results saved under {before_label} or {after_label}")
+    parts = [
+        "# Gas benchmarks",
+        "",
+        f"Generated by `scripts/benchmark_report.py` from the `{before_label}` and `{after_label}` runs, gas per call on a local network.",
+    ]
+    for section in sections:
+        if section in before and section in after:
+            table = comparison_table(before[section], after[section])
+        elif section in before:
+            table = results_table(before_label, before[section])
+        else:
+            table = results_table(after_label, after[section])
+        parts += ["", f"## {section}", "", table]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as report_file:
+        report_file.write("\n".join(parts) + "\n")
+    print(f"Report written to {path}")
+
+
+def main(before_label="before", after_label="after"):
+    write_report(before_label, after_label)
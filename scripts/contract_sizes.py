@@ -0,0 +1,29 @@
+from brownie import project
+
+# maximum deployed bytecode size of a contract on mainnet, EIP-170
+MAX_CONTRACT_SIZE = 24_576
+
+
+def deployed_size(contract):
+    """
+    Returns the size in bytes of the deployed bytecode of the `ContractContainer` `contract`, as compiled with `brownie-config.yaml`.
+    """
+    return len(contract._build["deployedBytecode"]) // 2
+
+
+def contract_sizes():
+    """
+    Returns `{name: deployed size}` of the contracts of the project, interfaces and libraries without code excluded.
+    """
+    loaded = project.get_loaded_projects()[0]
+    return {
+        name: deployed_size(contract)
+        for name, contract in sorted(loaded.dict().items())
+        if deployed_size(contract) > 0
+    }
+
+
+def main():
+    for name, size in contract_sizes().items():
+        flag = "" if size <= MAX_CONTRACT_SIZE else "  over the EIP-170 limit"
+        print(f"{name:<24}{size:>7} bytes{flag}")
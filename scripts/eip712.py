@@ -0,0 +1,70 @@
+from eth_abi import encode_abi
+from eth_keys import keys
+from hexbytes import HexBytes
+from web3 import Web3
+
+
+def struct_hash(type_string, abi_types, values):
+    """
+    EIP-712 hash of a struct of static fields, `type_string` being its encoded type
+    e.g. "SignedOrder(address seller,uint256 amount)".
+    """
+    type_hash = Web3.keccak(text=type_string)
+    return Web3.keccak(encode_abi(["bytes32"] + abi_types, [type_hash] + list(values)))
+
+
+def typed_data_digest(domain_separator, hashed_struct):
+    """
+    Returns the EIP-712 digest of `hashed_struct` under `domain_separator`, the hash that is signed.
+    """
+    return Web3.keccak(
+        b"\x19\x01" + bytes(HexBytes(domain_separator)) + bytes(hashed_struct)
+    )
+
+
+def sign_typed_data(private_key, domain_separator, hashed_struct):
+    """
+    Signs the EIP-712 digest of `hashed_struct` under `domain_separator`, returns the 65 bytes r, s, v signature.
+    The domain separator is read from the contract so the signature matches the chain id seen by the EVM.
+    """
+    digest = typed_data_digest(domain_separator, hashed_struct)
+    signature = keys.PrivateKey(HexBytes(private_key)).sign_msg_hash(digest)
+    v, r, s = signature.vrs
+    return r.to_bytes(32, "big") + s.to_bytes(32, "big") + bytes([v + 27])
+
+
+def recover_signer(domain_separator, hashed_struct, signature):
+    """
+    Returns the checksum address that signed `hashed_struct` with the 65 bytes `signature`, to check a signature off-chain.
+    """
+    signature = bytes(HexBytes(signature))
+    vrs = (signature[64] - 27, int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:64], "big"))
+    public_key = keys.Signature(vrs=vrs).recover_public_key_from_msg_hash(
+        typed_data_digest(domain_separator, hashed_struct)
+    )
+    return public_key.to_checksum_address()
+
+
+def split_signature(signature):
+    """
+    Returns the v, r, s of a 65 bytes signature, for functions taking them separately.
+    """
+    return signature[64], signature[:32], signature[32:64]
+
+
+PERMIT_TYPE = "Permit(address owner,address spender,uint256 value,uint256 nonce,uint256 deadline)"
+PERMIT_ABI_TYPES = ["address", "address", "uint256", "uint256", "uint256"]
+
+
+def sign_permit(token, owner, spender, value, deadline):
+    """
+    Signs an EIP-2612 permit of `token` letting `spender` spend `value` of `owner` until `deadline`,
+    `owner` must be a local account with a private key. Returns the v, r, s to pass to `permit`.
+    """
+    permit = (owner.address, str(spender), value, token.nonces(owner), deadline)
+    signature = sign_typed_data(
+        owner.private_key,
+        token.DOMAIN_SEPARATOR(),
+        struct_hash(PERMIT_TYPE, PERMIT_ABI_TYPES, permit),
+    )
+    return split_signature(signature)
@@ -0,0 +1,72 @@
+from scripts.escrow_aave.deploy_escrow_aave_pool import (
+    deploy_mock_lending_pool,
+    deploy_escrow_aave_pool,
+)
+from scripts.escrow_erc20.deploy_escrow_erc20 import deploy_escrow_token, approve_erc20
+from scripts.helpful_scripts import get_account
+from brownie import EscrowAave
+from web3 import Web3
+
+AMOUNT = Web3.toWei(1, "ether")
+NUM_ORDERS = 10
+
+
+def run_lifecycle(escrow, escrow_token, *order_id):
+    """
+    Runs create, approve, initiate, send and receive of one order, returns the total gas used.
+    `order_id` is only passed to `EscrowAavePool`, `EscrowAave` takes no order id.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    txs = [escrow.createOrder(AMOUNT, 10, {"from": account_1})]
+    txs.append(approve_erc20(AMOUNT, escrow, escrow_token, account))
+    txs.append(escrow.initiateOrder(*order_id, {"from": account}))
+    txs.append(escrow.sendOrder(*order_id, {"from": account_1}))
+    txs.append(escrow.receiveOrder(*order_id, {"from": account}))
+    for tx in txs:
+        tx.wait(1)
+    return sum(tx.gas_used for tx in txs)
+
+
+def benchmark_pooled_position(num_orders=NUM_ORDERS):
+    """
+    Gas per order on the mock lending pool : one `EscrowAave` deployed per order, against `EscrowAavePool`
+    depositing every order ( threshold 0 ) and buffering `num_orders` orders per deposit.
+    """
+    account = get_account()
+    escrow_token = deploy_escrow_token()
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    per_order_gas = 0
+    for _ in range(num_orders):
+        escrow = EscrowAave.deploy(escrow_token, lending_pool, {"from": account})
+        per_order_gas += escrow.tx.gas_used + run_lifecycle(escrow, escrow_token)
+    print(f"EscrowAave per order : {per_order_gas // num_orders} gas / order")
+    results = {"EscrowAave": per_order_gas // num_orders}
+    for threshold in [0, num_orders * AMOUNT]:
+        pool = deploy_escrow_aave_pool(escrow_token, lending_pool, threshold)
+        # initiate every order first so the buffer fills up, then settle them
+        pool_gas = pool.tx.gas_used
+        order_ids = []
+        for _ in range(num_orders):
+            tx_create = pool.createOrder(AMOUNT, 10, {"from": get_account(index=1)})
+            tx_create.wait(1)
+            order_ids.append(tx_create.return_value)
+            tx_approve = approve_erc20(AMOUNT, pool, escrow_token, account)
+            tx_initiate = pool.initiateOrder(tx_create.return_value, {"from": account})
+            tx_initiate.wait(1)
+            pool_gas += tx_create.gas_used + tx_approve.gas_used + tx_initiate.gas_used
+        for order_id in order_ids:
+            tx_send = pool.sendOrder(order_id, {"from": get_account(index=1)})
+            tx_send.wait(1)
+            tx_receive = pool.receiveOrder(order_id, {"from": account})
+            tx_receive.wait(1)
+            pool_gas += tx_send.gas_used + tx_receive.gas_used
+        print(
+            f"EscrowAavePool, depositThreshold {threshold} : {pool_gas // num_orders} gas / order"
+        )
+        results[threshold] = pool_gas // num_orders
+    return results
+
+
+def main():
+    benchmark_pooled_position()
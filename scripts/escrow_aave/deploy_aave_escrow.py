@@ -16,10 +16,7 @@ def main():
     if network.show_active() in ["mainnet-fork"]:
         get_weth()
     lending_pool = get_lending_pool()
-    escrow_aave = EscrowAave.deploy(
-        erc20_address, lending_pool.address, {"from": account}
-    )
-    print(f"Escrow_Aave Deployed at {escrow_aave}")
+    escrow_aave = deploy_escrow_aave(erc20_address, lending_pool.address)
     print("Creating the Escrow transaction")
     blocks = 10
     tx_create = escrow_aave.createOrder(AMOUNT, blocks, {"from": account_1})
@@ -43,6 +40,15 @@ def main():
     )
 
 
+def deploy_escrow_aave(erc20_address, lending_pool_address):
+    account = get_account()
+    escrow_aave = EscrowAave.deploy(
+        erc20_address, lending_pool_address, {"from": account}
+    )
+    print(f"Escrow_Aave Deployed at {escrow_aave}")
+    return escrow_aave
+
+
 def approve_erc20(amount, spender, erc20_address, account):
     print("Approving ERC20 token...")
     erc20 = interface.IERC20(erc20_address)
@@ -0,0 +1,37 @@
+from brownie import EscrowAavePool, MockLendingPool, interface
+from scripts.helpful_scripts import get_account
+
+DEPOSIT_THRESHOLD = 0
+
+
+def deploy_mock_lending_pool(token):
+    """
+    Deploys a `MockLendingPool` listing `token`, returns the pool and the aToken of `token`.
+    """
+    account = get_account()
+    lending_pool = MockLendingPool.deploy({"from": account})
+    tx = lending_pool.addReserve(token, {"from": account})
+    tx.wait(1)
+    a_token = interface.IERC20(lending_pool.aTokens(token))
+    print(f"Mock Lending Pool deployed, aToken at {a_token.address}")
+    return lending_pool, a_token
+
+
+def deploy_escrow_aave_pool(token, lending_pool, deposit_threshold=DEPOSIT_THRESHOLD):
+    account = get_account()
+    escrow = EscrowAavePool.deploy(
+        token, lending_pool, deposit_threshold, {"from": account}
+    )
+    print(f"Escrow Aave Pool deployed at {escrow}")
+    return escrow
+
+
+def accrue_yield(lending_pool, token, amount):
+    """
+    Simulates `amount` of interest on `token` in the mock lending pool, paid by the deployer.
+    """
+    account = get_account()
+    interface.IERC20(token).approve(lending_pool, amount, {"from": account}).wait(1)
+    tx = lending_pool.accrueYield(token, amount, {"from": account})
+    tx.wait(1)
+    return tx
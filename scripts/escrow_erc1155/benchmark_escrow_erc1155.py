@@ -0,0 +1,56 @@
+from scripts.escrow_erc1155.deploy_escrow_erc1155 import (
+    deploy_and_mint_items,
+    deploy_escrow_erc1155,
+    approve_erc1155,
+    ADMIN_FEE,
+)
+from scripts.escrow_erc721.benchmark_escrow_erc721 import run_lifecycle
+from scripts.escrow_erc721.deploy_and_create_erc721 import deploy_escrow_erc721_registry
+from scripts.helpful_scripts import get_account
+from brownie import EscrowNFT
+from web3 import Web3
+
+ITEM_COUNTS = [1, 10, 50]
+
+
+def benchmark_items(item_counts=ITEM_COUNTS):
+    """
+    Gas of a trade of `n` different items : one `EscrowERC1155` order moving them in one batch transfer per leg,
+    against `n` orders of a shared `EscrowERC721Registry`, one per NFT. Both include create, approve, initiate, send and receive.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    deposit = Web3.toWei(0.1, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    results = {}
+    for num_items in item_counts:
+        ids = list(range(num_items))
+        escrow_items = deploy_and_mint_items(ids, [1] * num_items)
+        escrow = deploy_escrow_erc1155()
+        txs = [
+            escrow.createOrder(escrow_items, ids, [1] * num_items, deposit, 10, {"from": account_1}),
+            approve_erc1155(escrow_items, escrow, account),
+            escrow.initiateOrder({"from": account, "value": deposit + admin_fee}),
+            escrow.sendOrder({"from": account_1}),
+            escrow.receiveOrder({"from": account}),
+        ]
+        for tx in txs:
+            tx.wait(1)
+        erc1155_gas = sum(tx.gas_used for tx in txs)
+        escrow_nft = EscrowNFT.deploy({"from": account})
+        for _ in range(num_items):
+            escrow_nft.createNFT({"from": account}).wait(1)
+        registry = deploy_escrow_erc721_registry()
+        erc721_gas = sum(
+            run_lifecycle(registry, escrow_nft, token_id, token_id) for token_id in ids
+        )
+        results[num_items] = (erc1155_gas, erc721_gas)
+        print(
+            f"{num_items} items : EscrowERC1155 {erc1155_gas} gas ( initiate {txs[2].gas_used}, receive {txs[4].gas_used} ), "
+            f"EscrowERC721Registry {erc721_gas} gas"
+        )
+    return results
+
+
+def main():
+    benchmark_items()
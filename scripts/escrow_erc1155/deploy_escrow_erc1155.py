@@ -0,0 +1,55 @@
+from brownie import EscrowERC1155, EscrowFactory, EscrowItems
+from scripts.helpful_scripts import get_account
+from web3 import Web3
+
+ADMIN_FEE = 0.005
+
+
+def deploy_and_mint_items(ids, amounts):
+    account = get_account()
+    escrow_items = EscrowItems.deploy({"from": account})
+    tx = escrow_items.mintItems(ids, amounts, {"from": account})
+    tx.wait(1)
+    print(f"Your items address : {escrow_items.address}, ids : {list(ids)}")
+    return escrow_items
+
+
+def deploy_escrow_erc1155():
+    account = get_account()
+    escrow = EscrowERC1155.deploy(Web3.toWei(ADMIN_FEE, "ether"), {"from": account})
+    print("Escrow Deployed!")
+    return escrow
+
+
+def deploy_escrow_erc1155_factory():
+    account = get_account()
+    implementation = deploy_escrow_erc1155()
+    factory = EscrowFactory.deploy(implementation, {"from": account})
+    print("Escrow Factory Deployed!")
+    return factory
+
+
+def create_escrow_erc1155(factory, salt):
+    account = get_account()
+    print(f"Escrow will be cloned at {factory.predictEscrowAddress(account, salt)}")
+    implementation = EscrowERC1155.at(factory.implementation())
+    init_data = implementation.initialize.encode_input(
+        Web3.toWei(ADMIN_FEE, "ether"), account
+    )
+    tx = factory.createEscrow(salt, init_data, {"from": account})
+    tx.wait(1)
+    escrow = EscrowERC1155.at(tx.events["EscrowCreated"]["escrow"])
+    print("Escrow Cloned!")
+    return escrow
+
+
+def approve_erc1155(escrow_items, operator, account):
+    print("Approving ERC1155 transfers")
+    tx = escrow_items.setApprovalForAll(operator, True, {"from": account})
+    tx.wait(1)
+    print("Approved !")
+    return tx
+
+
+def main():
+    deploy_escrow_erc1155()
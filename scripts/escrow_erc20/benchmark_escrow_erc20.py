@@ -0,0 +1,79 @@
+from scripts.escrow_erc20.deploy_escrow_erc20 import (
+    deploy_escrow_erc20,
+    deploy_escrow_erc20_factory,
+    deploy_escrow_erc20_registry,
+    deploy_escrow_token,
+    ADMIN_FEE,
+)
+from scripts.helpful_scripts import get_account
+from scripts.benchmark_report import save_results
+from brownie import EscrowERC20
+from web3 import Web3
+
+
+def benchmark_clone():
+    """
+    Compares the gas of a full `EscrowERC20` deployment against a clone created by `EscrowFactory`.
+    """
+    account = get_account()
+    escrow = deploy_escrow_erc20()
+    factory = deploy_escrow_erc20_factory()
+    init_data = EscrowERC20.at(factory.implementation()).initialize.encode_input(
+        Web3.toWei(ADMIN_FEE, "ether"), account
+    )
+    tx_clone = factory.createEscrow(
+        Web3.keccak(text="benchmark"), init_data, {"from": account}
+    )
+    tx_clone.wait(1)
+    print(f"EscrowERC20 deploy : {escrow.tx.gas_used} gas")
+    print(f"EscrowERC20 clone : {tx_clone.gas_used} gas")
+    return escrow.tx.gas_used, tx_clone.gas_used
+
+
+def benchmark_fee_settlement(num_orders=10):
+    """
+    Prints the gas of `receiveOrder` on `num_orders` orders of one `EscrowERC20Registry`, then of the
+    `withdrawFees` sweeping their admin fees. Only `withdrawFees` is new, run it on the commit before the
+    fee ledger ( without the sweep ) to get the gas of settlements paying the owner directly.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc20_registry()
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    amount = 10
+    escrow_token.approve(escrow, num_orders * amount, {"from": account_1}).wait(1)
+    escrow_token.transfer(account_1, num_orders * amount, {"from": account}).wait(1)
+    receive_gas = 0
+    for _ in range(num_orders):
+        tx_create = escrow.createOrder(escrow_token, amount, 0, 10, {"from": account})
+        tx_create.wait(1)
+        order_id = tx_create.return_value
+        escrow.initiateOrder(order_id, {"from": account_1, "value": admin_fee}).wait(1)
+        escrow.sendOrder(order_id, {"from": account}).wait(1)
+        tx_receive = escrow.receiveOrder(order_id, {"from": account_1})
+        tx_receive.wait(1)
+        receive_gas += tx_receive.gas_used
+    results = {"receiveOrder": receive_gas // num_orders}
+    print(f"receiveOrder : {results['receiveOrder']} gas/order")
+    if hasattr(escrow, "withdrawFees"):
+        tx_withdraw = escrow.withdrawFees(account, {"from": account})
+        tx_withdraw.wait(1)
+        results["withdrawFees"] = tx_withdraw.gas_used // num_orders
+        print(
+            f"withdrawFees : {tx_withdraw.gas_used} gas for {num_orders} orders, "
+            f"{results['withdrawFees']} gas/order"
+        )
+    results["receiveOrder + withdrawFees"] = sum(results.values())
+    return results
+
+
+def main(label=None):
+    """
+    Runs the benchmarks. With `label`, only runs `benchmark_fee_settlement` and saves its gas, see `scripts/benchmark_report.py`.
+    """
+    if label is not None:
+        save_results(label, "EscrowERC20Registry fee settlement ( gas per order )", benchmark_fee_settlement())
+        return
+    benchmark_clone()
+    benchmark_fee_settlement()
@@ -1,4 +1,4 @@
-from brownie import EscrowERC20, EscrowToken, interface
+from brownie import EscrowERC20, EscrowERC20Registry, EscrowFactory, EscrowToken, MisbehavingToken, interface
 from scripts.helpful_scripts import get_account
 from web3 import Web3
 
@@ -17,6 +17,38 @@ def deploy_escrow_erc20():
     return escrow
 
 
+def deploy_escrow_erc20_registry():
+    account = get_account()
+    registry = EscrowERC20Registry.deploy(
+        Web3.toWei(ADMIN_FEE, "ether"),
+        {"from": account},
+    )
+    print("Escrow Registry Deployed!")
+    return registry
+
+
+def deploy_escrow_erc20_factory():
+    account = get_account()
+    implementation = deploy_escrow_erc20()
+    factory = EscrowFactory.deploy(implementation, {"from": account})
+    print("Escrow Factory Deployed!")
+    return factory
+
+
+def create_escrow_erc20(factory, salt):
+    account = get_account()
+    print(f"Escrow will be cloned at {factory.predictEscrowAddress(account, salt)}")
+    implementation = EscrowERC20.at(factory.implementation())
+    init_data = implementation.initialize.encode_input(
+        Web3.toWei(ADMIN_FEE, "ether"), account
+    )
+    tx = factory.createEscrow(salt, init_data, {"from": account})
+    tx.wait(1)
+    escrow = EscrowERC20.at(tx.events["EscrowCreated"]["escrow"])
+    print("Escrow Cloned!")
+    return escrow
+
+
 def deploy_escrow_token():
     account = get_account()
     account_1 = get_account(index=1)
@@ -27,6 +59,14 @@ def deploy_escrow_token():
     return escrow_token
 
 
+def deploy_misbehaving_token(return_false=False, transfer_fee_bps=0):
+    account = get_account()
+    token = MisbehavingToken.deploy({"from": account})
+    token.setBehaviour(return_false, transfer_fee_bps, {"from": account}).wait(1)
+    print("Misbehaving Token deployed !")
+    return token
+
+
 def fund_account(escrow_token, receiver, amount):
     account = get_account()
     tx = escrow_token.transfer(receiver, amount, {"from": account})
@@ -0,0 +1,82 @@
+from scripts.escrow_erc721.deploy_and_create_erc721 import (
+    deploy_escrow_erc721,
+    deploy_escrow_erc721_factory,
+    deploy_escrow_erc721_registry,
+    approve_erc721,
+    ADMIN_FEE,
+)
+from scripts.helpful_scripts import get_account
+from brownie import EscrowERC721, EscrowNFT
+from web3 import Web3
+
+
+def benchmark_clone():
+    """
+    Compares the gas of a full `EscrowERC721` deployment against a clone created by `EscrowFactory`.
+    """
+    account = get_account()
+    escrow = deploy_escrow_erc721()
+    factory = deploy_escrow_erc721_factory()
+    init_data = EscrowERC721.at(factory.implementation()).initialize.encode_input(
+        Web3.toWei(ADMIN_FEE, "ether"), account
+    )
+    tx_clone = factory.createEscrow(
+        Web3.keccak(text="benchmark"), init_data, {"from": account}
+    )
+    tx_clone.wait(1)
+    print(f"EscrowERC721 deploy : {escrow.tx.gas_used} gas")
+    print(f"EscrowERC721 clone : {tx_clone.gas_used} gas")
+    return escrow.tx.gas_used, tx_clone.gas_used
+
+
+def run_lifecycle(escrow, escrow_nft, token_id, *order_id):
+    """
+    Runs create, initiate, send and receive of one order, returns the total gas used.
+    `order_id` is only passed to the registry, single order escrows take no order id.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    deposit = Web3.toWei(0.1, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    txs = [escrow.createOrder(escrow_nft, token_id, deposit, 10, {"from": account_1})]
+    txs.append(approve_erc721(escrow_nft, token_id, escrow, account))
+    txs.append(
+        escrow.initiateOrder(*order_id, {"from": account, "value": deposit + admin_fee})
+    )
+    txs.append(escrow.sendOrder(*order_id, {"from": account_1}))
+    txs.append(escrow.receiveOrder(*order_id, {"from": account}))
+    for tx in txs:
+        tx.wait(1)
+    return sum(tx.gas_used for tx in txs)
+
+
+def benchmark_registry(num_orders=10):
+    """
+    Gas for `num_orders` NFT trades : one `EscrowERC721` deployed per order against one shared `EscrowERC721Registry`.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_nft = EscrowNFT.deploy({"from": account})
+    for _ in range(num_orders):
+        escrow_nft.createNFT({"from": account}).wait(1)
+    per_order_gas = 0
+    for token_id in range(num_orders):
+        escrow = deploy_escrow_erc721()
+        per_order_gas += escrow.tx.gas_used + run_lifecycle(escrow, escrow_nft, token_id)
+        # seller hands the NFT back so the registry trades the same tokens
+        tx_back = escrow_nft.transferFrom(
+            account_1, account, token_id, {"from": account_1}
+        )
+        tx_back.wait(1)
+    registry = deploy_escrow_erc721_registry()
+    registry_gas = registry.tx.gas_used
+    for token_id in range(num_orders):
+        registry_gas += run_lifecycle(registry, escrow_nft, token_id, token_id)
+    print(f"{num_orders} orders, EscrowERC721 per order : {per_order_gas} gas")
+    print(f"{num_orders} orders, EscrowERC721Registry : {registry_gas} gas")
+    return per_order_gas, registry_gas
+
+
+def main():
+    benchmark_clone()
+    benchmark_registry()
@@ -1,7 +1,7 @@
 from scripts.escrow_erc20.deploy_escrow_erc20 import ADMIN_FEE
 from scripts.helpful_scripts import get_account
 
-from brownie import EscrowNFT, EscrowERC721, interface
+from brownie import EscrowNFT, EscrowERC721, EscrowERC721Registry, EscrowFactory, interface
 from web3 import Web3
 
 ADMIN_FEE = 0.005
@@ -25,6 +25,37 @@ def deploy_escrow_erc721():
     return escrow
 
 
+def deploy_escrow_erc721_registry():
+    account = get_account()
+    registry = EscrowERC721Registry.deploy(
+        Web3.toWei(ADMIN_FEE, "ether"), {"from": account}
+    )
+    print("Escrow Registry Deployed!")
+    return registry
+
+
+def deploy_escrow_erc721_factory():
+    account = get_account()
+    implementation = deploy_escrow_erc721()
+    factory = EscrowFactory.deploy(implementation, {"from": account})
+    print("Escrow Factory Deployed!")
+    return factory
+
+
+def create_escrow_erc721(factory, salt):
+    account = get_account()
+    print(f"Escrow will be cloned at {factory.predictEscrowAddress(account, salt)}")
+    implementation = EscrowERC721.at(factory.implementation())
+    init_data = implementation.initialize.encode_input(
+        Web3.toWei(ADMIN_FEE, "ether"), account
+    )
+    tx = factory.createEscrow(salt, init_data, {"from": account})
+    tx.wait(1)
+    escrow = EscrowERC721.at(tx.events["EscrowCreated"]["escrow"])
+    print("Escrow Cloned!")
+    return escrow
+
+
 def deploy_escrow_and_erc721():
     account = get_account()
     escrow_nft = deploy_and_create_nft()
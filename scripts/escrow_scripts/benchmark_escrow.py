@@ -0,0 +1,533 @@
+from scripts.escrow_scripts.deploy_escrow import (
+    deploy_escrow,
+    deploy_dispute_roots,
+    deploy_escrow_milestones,
+    deploy_forwarder,
+    deploy_signatures,
+    MIN_ORDER,
+    DISPUTE_FEE,
+)
+from scripts.escrow_scripts.compact_calls import calldata_gas, encode_compact, send_compact
+from scripts.escrow_scripts.dispute_merkle import build_dispute_claims
+from scripts.escrow_scripts.signed_orders import sign_release
+from scripts.benchmark_report import save_results
+from scripts.helpful_scripts import get_account
+from scripts.relayer import Relayer, build_request, sign_request
+from brownie import Escrow, accounts, chain
+from web3 import Web3
+
+BATCH_SIZES = [1, 10, 100]
+DISPUTE_BATCH_SIZES = [1, 10, 50]
+
+
+def benchmark_create_orders(batch_sizes=BATCH_SIZES):
+    """
+    Compares the gas per order of `createOrder` called in a loop against a single `createOrders` batch.
+    """
+    account = get_account()
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    results = {}
+    for batch_size in batch_sizes:
+        single_gas = 0
+        for _ in range(batch_size):
+            tx = escrow.createOrder(amount, deposit, {"from": account})
+            tx.wait(1)
+            single_gas += tx.gas_used
+        tx_batch = escrow.createOrders(
+            [amount] * batch_size, [deposit] * batch_size, {"from": account}
+        )
+        tx_batch.wait(1)
+        results[batch_size] = (single_gas // batch_size, tx_batch.gas_used // batch_size)
+        print(
+            f"Batch size {batch_size} : createOrder {results[batch_size][0]} gas/order, "
+            f"createOrders {results[batch_size][1]} gas/order"
+        )
+    return results
+
+
+def benchmark_lifecycle():
+    """
+    Prints the gas used by every lifecycle function of a fresh order.
+    Only uses the public ABI, so it can be run against older layouts of `Escrow` to compare.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow(expiry_blocks=0)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    gas = {}
+
+    def record(name, tx):
+        tx.wait(1)
+        gas[name] = tx.gas_used
+
+    # happy path : 0 is received, 1 is expired, 2 is disputed and resolved
+    for order_id in range(3):
+        record("createOrder", escrow.createOrder(amount, deposit, {"from": account}))
+        record(
+            "initiateOrder",
+            escrow.initiateOrder(
+                order_id, {"from": account_1, "value": amount + deposit}
+            ),
+        )
+        record("sendOrder", escrow.sendOrder(order_id, {"from": account}))
+    record("receiveOrder", escrow.receiveOrder(0, {"from": account_1}))
+    record("expireOrder", escrow.expireOrder(1, {"from": account}))
+    record("disputeOrder", escrow.disputeOrder(2, {"from": account_1}))
+    record("resolveDispute", escrow.resolveDispute(2, deposit, {"from": account}))
+    # cancellations : 3 is cancelled by the buyer then by the seller
+    escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+    escrow.initiateOrder(3, {"from": account_1, "value": amount + deposit}).wait(1)
+    record("cancelBuyOrder", escrow.cancelBuyOrder(3, {"from": account_1}))
+    record("cancelSellOrder", escrow.cancelSellOrder(3, {"from": account}))
+    for name, gas_used in gas.items():
+        print(f"{name} : {gas_used} gas")
+    return gas
+
+
+def storage_refund(tx):
+    """
+    Returns the gas refunded to `tx` for cleared storage, from its trace : gas spent by the execution minus `gas_used`.
+    """
+    last_step = tx.trace[-1]
+    gas_spent = tx.gas_limit - last_step["gas"] + last_step["gasCost"]
+    return gas_spent - tx.gas_used
+
+
+def benchmark_settlement_refunds():
+    """
+    Prints, for each path ending an order, the gas used and the gas refunded for cleared storage
+    ( the settled order, and the open dispute entry for `resolveDispute` ).
+    The refund depends on the hardfork of the node : since London ( EIP-3529 ) a cleared slot refunds 4800 gas,
+    capped at a fifth of the gas used, earlier rules refund 15000 capped at half.
+    Run it on the commit before the reclamation of settled orders to compare the gas used.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow(expiry_blocks=0)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+
+    def new_order(initiate=True, send=True):
+        order_id = escrow.orderCount()
+        escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+        if initiate:
+            escrow.initiateOrder(
+                order_id, {"from": account_1, "value": amount + deposit}
+            ).wait(1)
+        if send:
+            escrow.sendOrder(order_id, {"from": account}).wait(1)
+        return order_id
+
+    paths = {
+        "receiveOrder": lambda: escrow.receiveOrder(new_order(), {"from": account_1}),
+        "expireOrder": lambda: escrow.expireOrder(new_order(), {"from": account}),
+        "cancelSellOrder ( created )": lambda: escrow.cancelSellOrder(
+            new_order(initiate=False, send=False), {"from": account}
+        ),
+        "cancelSellOrder ( initiated )": lambda: escrow.cancelSellOrder(
+            new_order(send=False), {"from": account}
+        ),
+        "cancelSellOrder ( sent )": lambda: escrow.cancelSellOrder(
+            new_order(), {"from": account}
+        ),
+    }
+
+    def resolve():
+        order_id = new_order()
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+        return escrow.resolveDispute(order_id, deposit, {"from": account})
+
+    paths["resolveDispute"] = resolve
+    results = {}
+    for name, settle in paths.items():
+        tx = settle()
+        tx.wait(1)
+        results[name] = (tx.gas_used, storage_refund(tx))
+        print(f"{name} : {tx.gas_used} gas, {results[name][1]} gas refunded")
+    return results
+
+
+def benchmark_participant_indices(num_orders=10000, batch_size=100, page_size=100):
+    """
+    Compares reading the orders of one seller through `getOrdersBySeller` against scanning `orders(i)`
+    over `num_orders` orders, and prints the write path gas that keeps the seller and buyer indices.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    # one order out of `batch_size` belongs to the seller we look up
+    while escrow.orderCount() < num_orders:
+        escrow.createOrders(
+            [amount] * (batch_size - 1), [deposit] * (batch_size - 1), {"from": account}
+        ).wait(1)
+        escrow.createOrder(amount, deposit, {"from": account_2}).wait(1)
+    tx_create = escrow.createOrder(amount, deposit, {"from": account_2})
+    tx_create.wait(1)
+    order_id = escrow.orderCount() - 1
+    tx_initiate = escrow.initiateOrder(
+        order_id, {"from": account_1, "value": amount + deposit}
+    )
+    tx_initiate.wait(1)
+    tx_cancel = escrow.cancelBuyOrder(order_id, {"from": account_1})
+    tx_cancel.wait(1)
+    print(f"Write path with indices at {escrow.orderCount()} orders :")
+    print(f"  createOrder : {tx_create.gas_used} gas")
+    print(f"  initiateOrder : {tx_initiate.gas_used} gas")
+    print(f"  cancelBuyOrder : {tx_cancel.gas_used} gas")
+
+    seller_orders = escrow.sellerOrderCount(account_2)
+    index_calls = max(1, -(-seller_orders // page_size))
+    index_gas = 0
+    for offset in range(0, seller_orders, page_size):
+        index_gas += escrow.getOrdersBySeller.estimate_gas(account_2, offset, page_size)
+    scan_calls = escrow.orderCount()
+    scan_gas = escrow.orders.estimate_gas(0) * scan_calls
+    print(f"Read path for {seller_orders} orders of one seller :")
+    print(f"  getOrdersBySeller : {index_calls} calls, {index_gas} gas")
+    print(f"  orders(i) scan : {scan_calls} calls, ~{scan_gas} gas")
+    return {
+        "createOrder": tx_create.gas_used,
+        "initiateOrder": tx_initiate.gas_used,
+        "cancelBuyOrder": tx_cancel.gas_used,
+        f"read {seller_orders} orders, getOrdersBySeller": index_gas,
+        f"read {seller_orders} orders, orders(i) scan": scan_gas,
+    }
+
+
+def benchmark_resolve_disputes(batch_sizes=DISPUTE_BATCH_SIZES):
+    """
+    Compares the gas per order of `resolveDispute` called in a loop against a single `resolveDisputes` batch.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+
+    def create_disputes(count):
+        first_id = escrow.orderCount()
+        escrow.createOrders(
+            [amount] * count, [deposit] * count, {"from": account_2}
+        ).wait(1)
+        for order_id in range(first_id, first_id + count):
+            escrow.initiateOrder(
+                order_id, {"from": account_1, "value": amount + deposit}
+            ).wait(1)
+            escrow.sendOrder(order_id, {"from": account_2}).wait(1)
+            escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+        return list(range(first_id, first_id + count))
+
+    results = {}
+    for batch_size in batch_sizes:
+        single_gas = 0
+        for order_id in create_disputes(batch_size):
+            tx = escrow.resolveDispute(order_id, deposit, {"from": account})
+            tx.wait(1)
+            single_gas += tx.gas_used
+        order_ids = create_disputes(batch_size)
+        tx_batch = escrow.resolveDisputes(
+            order_ids, [deposit] * batch_size, {"from": account}
+        )
+        tx_batch.wait(1)
+        results[batch_size] = (single_gas // batch_size, tx_batch.gas_used // batch_size)
+        print(
+            f"Batch size {batch_size} : resolveDispute {results[batch_size][0]} gas/order, "
+            f"resolveDisputes {results[batch_size][1]} gas/order"
+        )
+    return results
+
+
+def benchmark_dispute_root(batch_sizes=DISPUTE_BATCH_SIZES):
+    """
+    Prints the owner gas of `postDisputeRoot` for batches of disputes, against the gas per order of the
+    `claimDisputeResolution` paid by the buyers and sellers. Compare with `benchmark_resolve_disputes`.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    dispute_roots = deploy_dispute_roots(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    refund_to_seller = amount - escrow.disputeFee()
+    results = {}
+    for batch_size in batch_sizes:
+        first_id = escrow.orderCount()
+        escrow.createOrders(
+            [amount] * batch_size, [deposit] * batch_size, {"from": account_2}
+        ).wait(1)
+        for order_id in range(first_id, first_id + batch_size):
+            escrow.initiateOrder(
+                order_id, {"from": account_1, "value": amount + deposit}
+            ).wait(1)
+            escrow.sendOrder(order_id, {"from": account_2}).wait(1)
+            escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+        root, claims = build_dispute_claims(
+            [(i, deposit, refund_to_seller) for i in range(first_id, first_id + batch_size)]
+        )
+        tx_post = dispute_roots.postDisputeRoot(root, {"from": account})
+        tx_post.wait(1)
+        claim_gas = 0
+        for claim in claims.values():
+            tx_claim = dispute_roots.claimDisputeResolution(
+                tx_post.return_value, *claim, {"from": account_1}
+            )
+            tx_claim.wait(1)
+            claim_gas += tx_claim.gas_used
+        results[batch_size] = (tx_post.gas_used, claim_gas // batch_size)
+        print(
+            f"Batch size {batch_size} : postDisputeRoot {tx_post.gas_used} gas, "
+            f"claimDisputeResolution {results[batch_size][1]} gas/order"
+        )
+    return results
+
+
+def benchmark_cooperative_settlement():
+    """
+    Compares the transactions and gas after `initiateOrder` of the `sendOrder` + `receiveOrder` path against
+    a single `settleCooperatively` of `EscrowSignatures` with releases signed off-chain by the buyer and the seller.
+    """
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    escrow_signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, 2 * (amount + deposit)).wait(1)
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    escrow.createOrders([amount] * 2, [deposit] * 2, {"from": seller}).wait(1)
+    for order_id in range(2):
+        escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    tx_send = escrow.sendOrder(0, {"from": seller})
+    tx_send.wait(1)
+    tx_receive = escrow.receiveOrder(0, {"from": buyer})
+    tx_receive.wait(1)
+    deadline = chain.time() + 3600
+    signatures = [sign_release(escrow_signatures, signer, 1, deposit, amount, deadline) for signer in (buyer, seller)]
+    tx_settle = escrow_signatures.settleCooperatively(1, deposit, amount, deadline, *signatures, {"from": account})
+    tx_settle.wait(1)
+    results = {
+        "sendOrder + receiveOrder": (2, tx_send.gas_used + tx_receive.gas_used),
+        "settleCooperatively": (1, tx_settle.gas_used),
+    }
+    for name, (num_txs, gas_used) in results.items():
+        print(f"{name} : {num_txs} transaction(s), {gas_used} gas")
+    return results
+
+
+def benchmark_relayed_batch(batch_sizes=BATCH_SIZES[:2]):
+    """
+    Compares the total gas of `sendOrder` sent by the seller in one transaction per order against the same calls
+    signed off-chain and relayed in a single `BatchForwarder.executeBatch`. Each transaction pays the 21000 base gas.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    seller = accounts.add()
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    forwarder = deploy_forwarder()
+    escrow = deploy_escrow(forwarder=forwarder)
+    relayer = Relayer(forwarder, account, max_batch_size=max(batch_sizes))
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    results = {}
+    for batch_size in batch_sizes:
+        first_id = escrow.orderCount()
+        escrow.createOrders(
+            [amount] * 2 * batch_size, [deposit] * 2 * batch_size, {"from": seller}
+        ).wait(1)
+        for order_id in range(first_id, first_id + 2 * batch_size):
+            escrow.initiateOrder(
+                order_id, {"from": account_1, "value": amount + deposit}
+            ).wait(1)
+        direct_gas = 0
+        for order_id in range(first_id, first_id + batch_size):
+            tx = escrow.sendOrder(order_id, {"from": seller})
+            tx.wait(1)
+            direct_gas += tx.gas_used
+        for order_id in range(first_id + batch_size, first_id + 2 * batch_size):
+            request = build_request(
+                forwarder, seller, escrow, "sendOrder", order_id,
+                nonce=relayer.next_nonce(seller.address),
+            )
+            relayer.submit(request, sign_request(forwarder, seller, request))
+        relayed = relayer.flush()
+        relayed_gas = next(iter(relayed.values()))["tx"].gas_used
+        results[batch_size] = (direct_gas, relayed_gas)
+        print(
+            f"{batch_size} orders : {batch_size} sendOrder transactions {direct_gas} gas, "
+            f"one executeBatch {relayed_gas} gas"
+        )
+    return results
+
+
+def benchmark_compact_calls(l1_gas_price_gwei=30):
+    """
+    Runs the lifecycle of an order with regular ABI calls and of another one with the compact calls of the `Escrow`
+    fallback, and prints per call the calldata bytes, its L1 data gas ( EIP-2028 ), its cost at `l1_gas_price_gwei`
+    and the gas used on the chain. The transaction envelope, the same for both, is not counted.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    results = {}
+
+    def steps(order_id):
+        return [
+            ("createOrder", (amount, deposit), account_1, 0),
+            ("initiateOrder", (order_id,), account, amount + deposit),
+            ("sendOrder", (order_id,), account_1, 0),
+            ("disputeOrder", (order_id,), account, 0),
+            ("resolveDispute", (order_id, deposit), account, 0),
+        ]
+
+    for mode in ("abi", "compact"):
+        order_id = escrow.orderCount()
+        for fn_name, args, sender, value in steps(order_id):
+            if mode == "abi":
+                data = getattr(escrow, fn_name).encode_input(*args)
+                tx = getattr(escrow, fn_name)(*args, {"from": sender, "value": value})
+                tx.wait(1)
+            else:
+                data = encode_compact(fn_name, *args, selectors=escrow.selectors.keys())
+                tx = send_compact(escrow, fn_name, *args, account=sender, value=value)
+            size = len(Web3.toBytes(hexstr=data)) if isinstance(data, str) else len(data)
+            results[(fn_name, mode)] = (size, calldata_gas(data), tx.gas_used)
+    for fn_name, _, _, _ in steps(0):
+        line = []
+        for mode in ("abi", "compact"):
+            size, l1_gas, gas_used = results[(fn_name, mode)]
+            cost = Web3.fromWei(l1_gas * Web3.toWei(l1_gas_price_gwei, "gwei"), "ether")
+            line.append(f"{mode} {size} bytes, {l1_gas} L1 gas ( {cost} ETH ), {gas_used} gas")
+        print(f"{fn_name} : " + " | ".join(line))
+    return results
+
+
+def benchmark_netting(num_orders=20):
+    """
+    Gas and number of value transfers of `num_orders` orders received between the same two accounts, half in each
+    direction : paid per order, against netted and collected by one `settleNet` per side.
+    """
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    results = {}
+    for netting in (False, True):
+        for trader in (account_1, account_2):
+            escrow.setNetting(netting, {"from": trader}).wait(1)
+        first_id = escrow.orderCount()
+        for i in range(num_orders):
+            seller, buyer = (account_1, account_2) if i % 2 else (account_2, account_1)
+            escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+            escrow.initiateOrder(first_id + i, {"from": buyer, "value": amount + deposit}).wait(1)
+            escrow.sendOrder(first_id + i, {"from": seller}).wait(1)
+        txs = []
+        for i in range(num_orders):
+            buyer = account_2 if i % 2 else account_1
+            txs.append(escrow.receiveOrder(first_id + i, {"from": buyer}))
+        if netting:
+            txs.append(escrow.settleNet(account_2, {"from": account_1}))
+            txs.append(escrow.settleNet(account_1, {"from": account_2}))
+        for tx in txs:
+            tx.wait(1)
+        transfers = sum(len(tx.internal_transfers) for tx in txs)
+        results[netting] = (sum(tx.gas_used for tx in txs), transfers)
+        print(
+            f"{num_orders} orders, netting {'on' if netting else 'off'} : "
+            f"{results[netting][0]} gas, {transfers} value transfers"
+        )
+    return results
+
+
+def benchmark_milestones(milestone_counts=(3, 10)):
+    """
+    Transactions and gas of an order paid in `n` milestones : `n` independent `Escrow` orders, each created,
+    initiated, sent and received, against one `EscrowMilestones` order funded once and sent and released per tranche.
+    """
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    escrow_milestones = deploy_escrow_milestones()
+    amount = Web3.toWei(MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    results = {}
+    for count in milestone_counts:
+        txs = []
+        first_id = escrow.orderCount()
+        for i in range(count):
+            txs.append(escrow.createOrder(amount, deposit, {"from": account_2}))
+            txs.append(escrow.initiateOrder(first_id + i, {"from": account_1, "value": amount + deposit}))
+            txs.append(escrow.sendOrder(first_id + i, {"from": account_2}))
+            txs.append(escrow.receiveOrder(first_id + i, {"from": account_1}))
+        milestone_txs = []
+        order_id = escrow_milestones.orderCount()
+        milestone_txs.append(escrow_milestones.createOrder([amount] * count, deposit, {"from": account_2}))
+        milestone_txs.append(
+            escrow_milestones.initiateOrder(order_id, {"from": account_1, "value": count * amount + deposit})
+        )
+        for i in range(count):
+            milestone_txs.append(escrow_milestones.sendMilestone(order_id, i, {"from": account_2}))
+            milestone_txs.append(escrow_milestones.releaseMilestone(order_id, i, {"from": account_1}))
+        for tx in txs + milestone_txs:
+            tx.wait(1)
+        results[count] = (
+            (len(txs), sum(tx.gas_used for tx in txs)),
+            (len(milestone_txs), sum(tx.gas_used for tx in milestone_txs)),
+        )
+        print(
+            f"{count} milestones : {len(txs)} txs, {results[count][0][1]} gas as separate orders, "
+            f"{len(milestone_txs)} txs, {results[count][1][1]} gas as one milestone order"
+        )
+    return results
+
+
+def supports(*names):
+    """
+    Returns whether the compiled layout of `Escrow` has all the functions `names`.
+    """
+    return all(name in Escrow.signatures for name in names)
+
+
+def save_layout_results(label):
+    """
+    Runs the benchmarks that also work on older layouts of `Escrow.sol` and saves their gas under `label`,
+    see `scripts/benchmark_report.py` : lifecycle calls, settlement paths and, once the layout has them,
+    the seller and buyer indices.
+    """
+    save_results(label, "Escrow lifecycle ( gas used )", benchmark_lifecycle())
+    settlements = benchmark_settlement_refunds()
+    save_results(label, "Escrow settlements ( gas used )", {name: used for name, (used, _) in settlements.items()})
+    save_results(label, "Escrow settlements ( gas refunded )", {name: refund for name, (_, refund) in settlements.items()})
+    if supports("createOrders", "getOrdersBySeller"):
+        save_results(label, "Escrow seller and buyer indices at 10k orders", benchmark_participant_indices())
+
+
+def main(label=None):
+    """
+    Runs all the benchmarks of the current layout. With `label`, only runs the ones comparable across layouts
+    and saves them, e.g. `brownie run scripts/escrow_scripts/benchmark_escrow.py main before`.
+    """
+    if label is not None:
+        save_layout_results(label)
+        return
+    benchmark_create_orders()
+    benchmark_lifecycle()
+    benchmark_settlement_refunds()
+    benchmark_resolve_disputes()
+    benchmark_dispute_root()
+    benchmark_cooperative_settlement()
+    benchmark_relayed_batch()
+    benchmark_compact_calls()
+    benchmark_netting()
+    benchmark_milestones()
@@ -0,0 +1,59 @@
+from web3 import Web3
+
+# opcode and packed argument sizes in bytes of the compact calls of `Escrow`, see its `fallback`
+COMPACT_CALLS = {
+    "createOrder": (0x01, [12, 12]),
+    "initiateOrder": (0x02, [4]),
+    "sendOrder": (0x03, [4]),
+    "receiveOrder": (0x04, [4]),
+    "disputeOrder": (0x05, [4]),
+    "expireOrder": (0x06, [4]),
+    "cancelBuyOrder": (0x07, [4]),
+    "cancelSellOrder": (0x08, [4]),
+    "resolveDispute": (0x09, [4, 12]),
+}
+# calldata gas per byte on L1 since EIP-2028
+ZERO_BYTE_GAS = 4
+NONZERO_BYTE_GAS = 16
+
+
+def encode_compact(fn_name, *args, selectors=()):
+    """
+    Returns the compact calldata of `Escrow.fn_name(*args)`, e.g. `encode_compact("sendOrder", order_id)`.
+    Raises `ValueError` if an argument doesn't fit its packed size, or if the payload starts with one of `selectors`
+    ( 4 bytes, e.g. `escrow.selectors` ) : the contract would call that function instead of the fallback.
+    """
+    opcode, sizes = COMPACT_CALLS[fn_name]
+    if len(args) != len(sizes):
+        raise ValueError(f"{fn_name} takes {len(sizes)} arguments")
+    payload = bytes([opcode])
+    for value, size in zip(args, sizes):
+        if not 0 <= value < 2 ** (8 * size):
+            raise ValueError(f"{value} does not fit in {size} bytes")
+        payload += int(value).to_bytes(size, "big")
+    if payload[:4] in {bytes(Web3.toBytes(hexstr=str(selector))) for selector in selectors}:
+        raise ValueError(f"Compact {fn_name} payload collides with a function selector")
+    return payload
+
+
+def calldata_gas(data):
+    """
+    Returns the L1 gas paid for `data` as calldata : 4 per zero byte and 16 per non zero byte.
+    """
+    data = bytes(Web3.toBytes(hexstr=data)) if isinstance(data, str) else bytes(data)
+    zeros = data.count(0)
+    return zeros * ZERO_BYTE_GAS + (len(data) - zeros) * NONZERO_BYTE_GAS
+
+
+def send_compact(escrow, fn_name, *args, account, value=0):
+    """
+    Calls `escrow.fn_name(*args)` from `account` with the compact calldata, with the regular ABI call if the arguments
+    don't fit or the payload collides with a selector. Returns the transaction.
+    """
+    try:
+        payload = encode_compact(fn_name, *args, selectors=escrow.selectors.keys())
+    except ValueError:
+        return getattr(escrow, fn_name)(*args, {"from": account, "value": value})
+    tx = account.transfer(escrow, value, data="0x" + payload.hex())
+    tx.wait(1)
+    return tx
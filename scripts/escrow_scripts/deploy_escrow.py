@@ -1,4 +1,4 @@
-from brownie import Escrow
+from brownie import BatchForwarder, Escrow, EscrowDisputeRoots, EscrowMilestones, EscrowSignatures
 from scripts.helpful_scripts import get_account
 from web3 import Web3
 
@@ -7,15 +7,74 @@ DISPUTE_FEE = 0.005
 EXPIRY_BLOCKS = 1
 
 
-def deploy_escrow(expiry_blocks=1):
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def deploy_forwarder():
+    account = get_account()
+    forwarder = BatchForwarder.deploy({"from": account})
+    print("BatchForwarder Deployed!")
+    return forwarder
+
+
+def deploy_escrow(expiry_blocks=1, forwarder=None):
+    """
+    Deploys `Escrow`, `forwarder` is the trusted ERC-2771 forwarder relaying calls, none by default.
+    Layouts of `Escrow.sol` from before the trusted forwarder take no forwarder argument, they can still be
+    deployed without `forwarder`, e.g. to benchmark them ( see `scripts/benchmark_report.py` ).
+    """
     account = get_account()
-    escrow = Escrow.deploy(
+    args = [Web3.toWei(MIN_ORDER, "ether"), Web3.toWei(DISPUTE_FEE, "ether"), expiry_blocks]
+    if len(Escrow.deploy.abi["inputs"]) > len(args):
+        args.append(forwarder if forwarder is not None else ZERO_ADDRESS)
+    elif forwarder is not None:
+        raise ValueError("This layout of Escrow has no trusted forwarder")
+    escrow = Escrow.deploy(*args, {"from": account})
+    print("Escrow Deployed!")
+    return escrow
+
+
+def deploy_dispute_roots(escrow, forwarder=None):
+    """
+    Deploys `EscrowDisputeRoots` for `escrow` and sets it as the dispute resolver of `escrow`, from the escrow owner.
+    `forwarder` is the trusted ERC-2771 forwarder relaying claims, none by default.
+    """
+    account = get_account()
+    dispute_roots = EscrowDisputeRoots.deploy(
+        escrow,
+        forwarder if forwarder is not None else ZERO_ADDRESS,
+        {"from": account},
+    )
+    escrow.setDisputeResolver(dispute_roots, {"from": account}).wait(1)
+    print("EscrowDisputeRoots Deployed!")
+    return dispute_roots
+
+
+def deploy_signatures(escrow, forwarder=None):
+    """
+    Deploys `EscrowSignatures` for `escrow` and sets it as the signature verifier of `escrow`, from the escrow owner.
+    `forwarder` is the trusted ERC-2771 forwarder relaying calls, none by default.
+    """
+    account = get_account()
+    signatures = EscrowSignatures.deploy(
+        escrow,
+        forwarder if forwarder is not None else ZERO_ADDRESS,
+        {"from": account},
+    )
+    escrow.setSignatureVerifier(signatures, {"from": account}).wait(1)
+    print("EscrowSignatures Deployed!")
+    return signatures
+
+
+def deploy_escrow_milestones(expiry_blocks=1):
+    account = get_account()
+    escrow = EscrowMilestones.deploy(
         Web3.toWei(MIN_ORDER, "ether"),
         Web3.toWei(DISPUTE_FEE, "ether"),
         expiry_blocks,
         {"from": account},
     )
-    print("Escrow Deployed!")
+    print("EscrowMilestones Deployed!")
     return escrow
 
 
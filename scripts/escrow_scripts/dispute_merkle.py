@@ -0,0 +1,86 @@
+import csv
+
+from eth_abi import encode_abi
+from web3 import Web3
+
+DECISION_COLUMNS = ["order_id", "refund_to_buyer", "refund_to_seller"]
+
+
+def read_decisions(csv_path):
+    """
+    Reads dispute decisions from a CSV with the header `order_id,refund_to_buyer,refund_to_seller`, refunds in wei.
+    Returns a list of `(orderId, refundToBuyer, refundToSeller)`.
+    """
+    with open(csv_path, newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    decisions = [tuple(int(row[column]) for column in DECISION_COLUMNS) for row in rows]
+    order_ids = [decision[0] for decision in decisions]
+    if len(set(order_ids)) != len(order_ids):
+        raise ValueError("An order can only have one decision")
+    return decisions
+
+
+def decision_leaf(decision):
+    """
+    Returns the leaf of `(orderId, refundToBuyer, refundToSeller)`, as computed by `claimDisputeResolution`.
+    """
+    return bytes(Web3.keccak(encode_abi(["uint256", "uint256", "uint256"], list(decision))))
+
+
+def build_tree(leaves):
+    """
+    Builds the Merkle tree of `leaves` with the sorted pair hashing of OpenZeppelin `MerkleProof`,
+    returns its layers from the leaves to the root. A node without sibling is moved up as is.
+    """
+    if not leaves:
+        raise ValueError("No leaves")
+    layers = [list(leaves)]
+    while len(layers[-1]) > 1:
+        layer = layers[-1]
+        parents = []
+        for i in range(0, len(layer), 2):
+            if i + 1 == len(layer):
+                parents.append(layer[i])
+            else:
+                left, right = sorted([layer[i], layer[i + 1]])
+                parents.append(bytes(Web3.keccak(left + right)))
+        layers.append(parents)
+    return layers
+
+
+def get_proof(layers, index):
+    """
+    Returns the proof of the leaf at `index` of the tree `layers`.
+    """
+    proof = []
+    for layer in layers[:-1]:
+        sibling = index ^ 1
+        if sibling < len(layer):
+            proof.append(layer[sibling])
+        index //= 2
+    return proof
+
+
+def build_dispute_claims(decisions):
+    """
+    Returns the root of `decisions` and, per orderId, the arguments of `claimDisputeResolution` but the rootId :
+    `{orderId: (orderId, refundToBuyer, refundToSeller, proof)}`.
+    """
+    layers = build_tree([decision_leaf(decision) for decision in decisions])
+    claims = {
+        decision[0]: (*decision, ["0x" + node.hex() for node in get_proof(layers, i)])
+        for i, decision in enumerate(decisions)
+    }
+    return "0x" + layers[-1][0].hex(), claims
+
+
+def post_decisions(dispute_roots, csv_path, account):
+    """
+    Posts the root of the decisions in `csv_path` on the `EscrowDisputeRoots` `dispute_roots` from its owner `account`.
+    Returns the rootId and the claims to hand to the buyers and sellers, see `build_dispute_claims`.
+    """
+    root, claims = build_dispute_claims(read_decisions(csv_path))
+    tx = dispute_roots.postDisputeRoot(root, {"from": account})
+    tx.wait(1)
+    print(f"Posted root {root} for {len(claims)} disputes")
+    return tx.return_value, claims
@@ -0,0 +1,65 @@
+from brownie import exceptions, web3
+from eth_abi import encode_abi
+from web3 import Web3
+
+# gas cap of `eth_call` on the node, geth defaults `--rpc.gascap` to 50M
+CALL_GAS_LIMIT = 50_000_000
+# share of the cap a page is sized for, orders filtered out still cost their status read
+GAS_TARGET = 0.8
+PROBE_PAGE_SIZE = 100
+
+
+def order_outcome(order_id, status, buyer, seller, buyer_refund, seller_refund):
+    """
+    Returns the `orderOutcome` fingerprint kept by `Escrow` for a settled order, to check it against the settlement events.
+    `buyer` is the zero address for an order cancelled before being initiated.
+    """
+    encoded = encode_abi(
+        ["uint256", "uint8", "address", "address", "uint256", "uint256"],
+        [order_id, status, str(buyer), str(seller), buyer_refund, seller_refund],
+    )
+    return "0x" + bytes(Web3.keccak(encoded)[:6]).hex()
+
+
+def status_mask(statuses):
+    """
+    Returns the `getOrders` status filter mask of `statuses` ( `OrderStatus` values ), 0 returns all orders.
+    """
+    mask = 0
+    for status in statuses:
+        mask |= 1 << status
+    return mask
+
+
+def fetch_all_orders(
+    escrow,
+    mask=0,
+    call_gas_limit=CALL_GAS_LIMIT,
+    probe_page_size=PROBE_PAGE_SIZE,
+):
+    """
+    Reads every order of `escrow` matching `mask` with `getOrders`, returns `{orderId: order}`.
+    The page size is set from the gas of a probe page to stay under `call_gas_limit`, and halved if a call
+    still fails. All pages are read at the same block so the snapshot is consistent.
+    """
+    block = web3.eth.block_number
+    total = escrow.orderCount(block_identifier=block)
+    if total == 0:
+        return {}
+    probe_size = min(probe_page_size, total)
+    gas_per_order = escrow.getOrders.estimate_gas(0, probe_size, mask) / probe_size
+    page_size = max(1, int(call_gas_limit * GAS_TARGET / gas_per_order))
+    orders = {}
+    start = 0
+    while start < total:
+        count = min(page_size, total - start)
+        try:
+            ids, page = escrow.getOrders(start, count, mask, block_identifier=block)
+        except (exceptions.VirtualMachineError, ValueError):
+            if count == 1:
+                raise
+            page_size = count // 2
+            continue
+        orders.update(zip(ids, page))
+        start += count
+    return orders
@@ -0,0 +1,57 @@
+from brownie import Escrow
+from scripts.eip712 import struct_hash, sign_typed_data
+
+SIGNED_ORDER_TYPE = (
+    "SignedOrder(address seller,uint256 amount,uint256 deposit,uint256 nonce,uint256 deadline)"
+)
+SIGNED_ORDER_ABI_TYPES = ["address", "uint256", "uint256", "uint256", "uint256"]
+
+
+def sign_order(signatures, seller, amount, deposit, nonce, deadline):
+    """
+    Signs an order off-chain for the `EscrowSignatures` `signatures`, `seller` must be a local account with a private key.
+    Returns the order tuple and the signature to pass to `initiateSignedOrder`.
+    """
+    order = (seller.address, amount, deposit, nonce, deadline)
+    signature = sign_typed_data(
+        seller.private_key,
+        signatures.DOMAIN_SEPARATOR(),
+        struct_hash(SIGNED_ORDER_TYPE, SIGNED_ORDER_ABI_TYPES, order),
+    )
+    return order, signature
+
+
+def nonce_word_and_mask(nonces):
+    """
+    Groups `nonces` by word of the seller nonce bitmap, returns `{wordPos: mask}` for `invalidateNonces`.
+    """
+    masks = {}
+    for nonce in nonces:
+        masks[nonce >> 8] = masks.get(nonce >> 8, 0) | (1 << (nonce & 0xFF))
+    return masks
+
+
+RELEASE_TYPE = (
+    "Release(uint256 orderId,uint256 nonce,uint256 payoutBuyer,uint256 payoutSeller,uint256 deadline)"
+)
+RELEASE_ABI_TYPES = ["uint256", "uint256", "uint256", "uint256", "uint256"]
+
+
+def sign_release(signatures, account, order_id, payout_buyer, payout_seller, deadline, nonce=None):
+    """
+    Signs the release of order `order_id` of the escrow of the `EscrowSignatures` `signatures` off-chain, `account` must be
+    a local account with a private key.
+    Once both the buyer and the seller signed the same payouts, anyone can pass them to `settleCooperatively` until `deadline`.
+    `nonce` defaults to the current `releaseNonce` of the order, the release can't be used once the buyer cancels.
+    """
+    if nonce is None:
+        nonce = Escrow.at(signatures.escrow()).releaseNonce(order_id)
+    return sign_typed_data(
+        account.private_key,
+        signatures.DOMAIN_SEPARATOR(),
+        struct_hash(
+            RELEASE_TYPE,
+            RELEASE_ABI_TYPES,
+            (order_id, nonce, payout_buyer, payout_seller, deadline),
+        ),
+    )
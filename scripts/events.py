@@ -0,0 +1,114 @@
+from brownie import web3
+from brownie.network.event import decode_logs
+from eth_abi import encode_single
+from web3 import Web3
+
+
+def event_topic(contract, event_name):
+    """
+    Returns the topic of `event_name`, the keccak of its signature, from the ABI of `contract`.
+    """
+    abi = _event_abi(contract, event_name)
+    signature = f"{event_name}({','.join(i['type'] for i in abi['inputs'])})"
+    return Web3.keccak(text=signature).hex()
+
+
+def indexed_topic(abi_type, value):
+    """
+    Encodes `value` of the static `abi_type` as a topic, e.g. `indexed_topic("address", seller)`.
+    """
+    if abi_type == "address":
+        value = str(value)
+    return "0x" + encode_single(abi_type, value).hex()
+
+
+def topic_filter(contract, event_names, from_block=0, to_block="latest", address=None, **values):
+    """
+    Returns the `eth_getLogs` filter of the `event_names` logs whose indexed parameters match `values`,
+    e.g. `topic_filter(escrow, ["OrderCreated"], _seller=seller)`. A value can be a list, any of them matches.
+    All events must have the filtered parameters indexed at the same position.
+    `address` defaults to `contract`, pass `address=[]` to match the logs of any contract ( e.g. all escrow clones ).
+    """
+    topics = [[event_topic(contract, name) for name in event_names]]
+    for name, value in values.items():
+        position, abi_type = _indexed_position(contract, event_names, name)
+        values_list = value if isinstance(value, (list, tuple)) else [value]
+        topics += [None] * (position + 1 - len(topics))
+        topics[position] = [indexed_topic(abi_type, v) for v in values_list]
+    log_filter = {"fromBlock": from_block, "toBlock": to_block, "topics": topics}
+    if address is None:
+        log_filter["address"] = contract.address
+    elif address:
+        log_filter["address"] = address
+    return log_filter
+
+
+def get_events(contract, event_names, from_block=0, to_block="latest", address=None, **values):
+    """
+    Fetches and decodes the logs matching `topic_filter`, the node only returns the matching logs.
+    """
+    logs = web3.eth.get_logs(
+        topic_filter(contract, event_names, from_block, to_block, address, **values)
+    )
+    return decode_logs(logs)
+
+
+def order_events(escrow, order_ids, from_block=0, to_block="latest"):
+    """
+    Returns all the events of the orders with `order_ids` of a multi-order escrow, whose order events
+    all have the orderId as first topic.
+    """
+    return get_events(
+        escrow, _order_event_names(escrow), from_block, to_block, _orderId=list(order_ids)
+    )
+
+
+def seller_order_ids(escrow, seller, from_block=0, to_block="latest"):
+    """
+    Returns the orderIds created by `seller` in a multi-order escrow.
+    """
+    events = get_events(escrow, ["OrderCreated"], from_block, to_block, _seller=seller)
+    return [event["_orderId"] for event in events]
+
+
+def buyer_order_ids(escrow, buyer, from_block=0, to_block="latest"):
+    """
+    Returns the orderIds initiated by `buyer` in a multi-order escrow, including cancelled ones.
+    """
+    events = get_events(escrow, ["OrderInitiated"], from_block, to_block, _buyer=buyer)
+    return [event["_orderId"] for event in events]
+
+
+def _event_abi(contract, event_name):
+    for abi in contract.abi:
+        if abi["type"] == "event" and abi["name"] == event_name:
+            return abi
+    raise ValueError(f"{event_name} is not an event of {contract._name}")
+
+
+def _order_event_names(escrow):
+    return [
+        abi["name"]
+        for abi in escrow.abi
+        if abi["type"] == "event"
+        and abi["inputs"]
+        and abi["inputs"][0]["name"] == "_orderId"
+        and abi["inputs"][0]["indexed"]
+    ]
+
+
+def _indexed_position(contract, event_names, param_name):
+    positions = set()
+    for event_name in event_names:
+        indexed = [i for i in _event_abi(contract, event_name)["inputs"] if i["indexed"]]
+        matches = [
+            (position + 1, i["type"])
+            for position, i in enumerate(indexed)
+            if i["name"] == param_name
+        ]
+        if not matches:
+            raise ValueError(f"{param_name} is not indexed in {event_name}")
+        positions.add(matches[0])
+    if len(positions) > 1:
+        raise ValueError(f"{param_name} is not at the same topic in {event_names}")
+    return positions.pop()
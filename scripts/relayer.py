@@ -0,0 +1,138 @@
+import threading
+import time
+
+from brownie import web3
+from scripts.eip712 import recover_signer, sign_typed_data, struct_hash
+from web3 import Web3
+
+FORWARD_REQUEST_TYPE = (
+    "ForwardRequest(address from,address to,uint256 value,uint256 gas,uint256 nonce,bytes data)"
+)
+FORWARD_REQUEST_ABI_TYPES = ["address", "address", "uint256", "uint256", "uint256", "bytes32"]
+# gas forwarded to each relayed call, enough for any single `Escrow` action
+REQUEST_GAS = 300_000
+MAX_BATCH_SIZE = 50
+
+
+def forward_request_hash(request):
+    """
+    EIP-712 struct hash of a `BatchForwarder` request `(from, to, value, gas, nonce, data)`, `data` being hashed first.
+    """
+    *fields, data = request
+    return struct_hash(
+        FORWARD_REQUEST_TYPE,
+        FORWARD_REQUEST_ABI_TYPES,
+        [*fields, Web3.keccak(hexstr=data) if isinstance(data, str) else Web3.keccak(data)],
+    )
+
+
+def build_request(forwarder, account, target, fn_name, *args, nonce=None, gas=REQUEST_GAS, value=0):
+    """
+    Returns the request of `account` calling `target.fn_name(*args)` through `forwarder`, e.g.
+    `build_request(forwarder, seller, escrow, "sendOrder", order_id)`. `nonce` defaults to the next nonce on-chain,
+    pass it to sign several requests of the same account before they are relayed.
+    """
+    if nonce is None:
+        nonce = forwarder.getNonce(account)
+    data = getattr(target, fn_name).encode_input(*args)
+    return (account.address, target.address, value, gas, nonce, data)
+
+
+def sign_request(forwarder, account, request):
+    """
+    Signs `request` for `forwarder` off-chain, `account` must be a local account with a private key.
+    """
+    return sign_typed_data(
+        account.private_key, forwarder.DOMAIN_SEPARATOR(), forward_request_hash(request)
+    )
+
+
+class Relayer:
+    """
+    Collects signed requests and relays them with one `BatchForwarder.executeBatch` per block, `account` paying the gas.
+    Requests are relayed in the order they were submitted, so several requests of one signer must be submitted in nonce order.
+    """
+
+    def __init__(self, forwarder, account, max_batch_size=MAX_BATCH_SIZE):
+        self.forwarder = forwarder
+        self.account = account
+        self.max_batch_size = max_batch_size
+        self.domain_separator = forwarder.DOMAIN_SEPARATOR()
+        self.pending = []
+        self.next_ticket = 0
+        self.lock = threading.Lock()
+
+    def next_nonce(self, address):
+        """
+        Returns the nonce the next request of `address` must be signed with, counting its pending requests.
+        """
+        pending = sum(1 for _, request, _ in self.pending if request[0] == address)
+        return self.forwarder.getNonce(address) + pending
+
+    def submit(self, request, signature):
+        """
+        Queues a signed request and returns its ticket, the key of its result in `flush`.
+        Raises `ValueError` if the signature is not from `request.from` or the nonce is not the next one,
+        so a bad request is rejected before it costs gas.
+        """
+        request = tuple(request)
+        signer = recover_signer(self.domain_separator, forward_request_hash(request), signature)
+        if signer != request[0]:
+            raise ValueError(f"Request signed by {signer} instead of {request[0]}")
+        with self.lock:
+            if request[4] != self.next_nonce(request[0]):
+                raise ValueError(f"Wrong nonce {request[4]} for {request[0]}")
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            self.pending.append((ticket, request, signature))
+        return ticket
+
+    def flush(self):
+        """
+        Relays up to `max_batch_size` pending requests in one `executeBatch`, returns `{ticket: result}`.
+        Each result has `executed` ( false if the signature or nonce was no longer valid ), `success` ( whether the call
+        succeeded ) and `tx`. Value sent with the requests is paid by the relayer account and refunded if a call fails.
+        """
+        with self.lock:
+            batch = self.pending[: self.max_batch_size]
+            if not batch:
+                return {}
+            requests = [request for _, request, _ in batch]
+            signatures = [signature for _, _, signature in batch]
+            tx = self.forwarder.executeBatch(
+                requests,
+                signatures,
+                {"from": self.account, "value": sum(request[2] for request in requests)},
+            )
+            tx.wait(1)
+            # removed once mined, so `next_nonce` counts them until the forwarder nonces are updated
+            self.pending = self.pending[len(batch) :]
+        results = {}
+        for event in tx.events["RequestExecuted"]:
+            ticket = batch[event["_index"]][0]
+            results[ticket] = {
+                "executed": event["_executed"],
+                "success": event["_success"],
+                "tx": tx,
+            }
+        succeeded = sum(1 for result in results.values() if result["success"])
+        print(f"Relayed {len(batch)} requests in {tx.txid} : {succeeded} succeeded, {tx.gas_used} gas")
+        return results
+
+    def run(self, num_blocks=None, poll_interval=1):
+        """
+        Flushes the pending requests once per new block until `num_blocks` blocks were seen, forever if None.
+        Requests are submitted from another thread, e.g. an HTTP handler calling `submit`. Returns all results.
+        """
+        results = {}
+        last_block = web3.eth.block_number
+        seen = 0
+        while num_blocks is None or seen < num_blocks:
+            block = web3.eth.block_number
+            if block > last_block:
+                seen += block - last_block
+                last_block = block
+                results.update(self.flush())
+            else:
+                time.sleep(poll_interval)
+        return results
@@ -0,0 +1,11 @@
+from scripts.contract_sizes import contract_sizes, deployed_size, MAX_CONTRACT_SIZE
+from brownie import Escrow
+
+
+def test_escrow_fits_eip170():
+    assert 0 < deployed_size(Escrow) <= MAX_CONTRACT_SIZE
+
+
+def test_all_contracts_fit_eip170():
+    over = {name: size for name, size in contract_sizes().items() if size > MAX_CONTRACT_SIZE}
+    assert over == {}
@@ -1,7 +1,15 @@
 from scripts.escrow_scripts.deploy_escrow import deploy_escrow, DISPUTE_FEE, MIN_ORDER
+from scripts.escrow_scripts.compact_calls import encode_compact, send_compact
+from scripts.escrow_scripts.order_snapshot import (
+    fetch_all_orders,
+    order_outcome,
+    status_mask,
+)
+from scripts.events import order_events, seller_order_ids, buyer_order_ids
 from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
-from brownie import network, exceptions
+from brownie import network, exceptions, accounts, chain, RejectingTrader
 import pytest
+import random
 from web3 import Web3
 
 zero_address = "0x0000000000000000000000000000000000000000"
@@ -107,14 +115,14 @@ def test_can_receive_order():
     tx_initiate.wait(1)
     tx_send = escrow.sendOrder(0, {"from": account})
     tx_send.wait(1)
-    send_block = tx_send.block_number
     seller_old_balance = account.balance()
     buyer_old_balance = account_1.balance()
     tx_receive = escrow.receiveOrder(0, {"from": account_1})
     tx_receive.wait(1)
     assert account.balance() == seller_old_balance + amount
     assert account_1.balance() == buyer_old_balance + deposit
-    assert escrow.orders(0) == (3, account_1, account, amount, deposit, 0, send_block)
+    assert escrow.orders(0) == (3, account_1, account, 0, 0, 0, 0)
+    assert escrow.orderOutcome(0) == order_outcome(0, 3, account_1, account, deposit, amount)
 
 
 def test_can_expire_order():
@@ -133,12 +141,12 @@ def test_can_expire_order():
     tx_initiate.wait(1)
     tx_send = escrow.sendOrder(0, {"from": account})
     tx_send.wait(1)
-    block_send = tx_send.block_number
     seller_old_balance = account.balance()
     tx_expire = escrow.expireOrder(0, {"from": account})
     tx_expire.wait(1)
     assert account.balance() == seller_old_balance + amount + deposit
-    assert escrow.orders(0) == (7, account_1, account, amount, deposit, 0, block_send)
+    assert escrow.orders(0) == (7, account_1, account, 0, 0, 0, 0)
+    assert escrow.orderOutcome(0) == order_outcome(0, 7, account_1, account, 0, amount + deposit)
 
 
 def test_cant_expire_order():
@@ -194,7 +202,8 @@ def test_seller_can_cancel_order_after_create():
     tx_create.wait(1)
     tx_cancel = escrow.cancelSellOrder(0, {"from": account})
     tx_cancel.wait(1)
-    assert escrow.orders(0) == (4, zero_address, account, amount, deposit, 0, 0)
+    assert escrow.orders(0) == (4, zero_address, account, 0, 0, 0, 0)
+    assert escrow.orderOutcome(0) == order_outcome(0, 4, zero_address, account, 0, 0)
 
 
 def test_seller_can_cancel_order_after_initiate():
@@ -215,7 +224,10 @@ def test_seller_can_cancel_order_after_initiate():
     tx_cancel = escrow.cancelSellOrder(0, {"from": account})
     tx_cancel.wait(1)
     assert buyer_old_balance == account_1.balance()
-    assert escrow.orders(0) == (4, account_1, account, amount, deposit, 0, 0)
+    assert escrow.orders(0) == (4, account_1, account, 0, 0, 0, 0)
+    assert escrow.orderOutcome(0) == order_outcome(
+        0, 4, account_1, account, amount + deposit, 0
+    )
 
 
 def test_seller_can_cancel_order_after_send():
@@ -235,11 +247,10 @@ def test_seller_can_cancel_order_after_send():
     tx_initiate.wait(1)
     tx_send = escrow.sendOrder(0, {"from": account})
     tx_send.wait(1)
-    block_send = tx_send.block_number
     tx_cancel = escrow.cancelSellOrder(0, {"from": account})
     tx_cancel.wait(1)
     assert account_1.balance() == buyer_old_balance
-    assert escrow.orders(0) == (4, account_1, account, amount, deposit, 0, block_send)
+    assert escrow.orders(0) == (4, account_1, account, 0, 0, 0, 0)
 
 
 def test_buyer_can_dispute_order_after_send():
@@ -323,7 +334,6 @@ def test_admin_can_resolve_dispute():
     tx_initiate.wait(1)
     tx_send = escrow.sendOrder(0, {"from": account_2})
     tx_send.wait(1)
-    block_send = tx_send.block_number
     tx_dispute = escrow.disputeOrder(0, {"from": account_2})
     tx_dispute.wait(1)
     buyer_refund = Web3.toWei(MIN_ORDER, "ether")  # 0.01
@@ -336,5 +346,545 @@ def test_admin_can_resolve_dispute():
         2 * MIN_ORDER, "ether"
     )
     assert account_1.balance() == buyer_old_balance + buyer_refund
-    assert account.balance() == admin_old_balance + Web3.toWei(DISPUTE_FEE, "ether")
-    assert escrow.orders(0) == (6, account_1, account_2, amount, deposit, 0, block_send)
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == Web3.toWei(DISPUTE_FEE, "ether")
+    assert escrow.orders(0) == (6, account_1, account_2, 0, 0, 0, 0)
+    seller_refund = amount + deposit - buyer_refund - Web3.toWei(DISPUTE_FEE, "ether")
+    assert tx_resolve.events["OrderResolved"]["sellerRefund"] == seller_refund
+    assert escrow.orderOutcome(0) == order_outcome(
+        0, 6, account_1, account_2, buyer_refund, seller_refund
+    )
+
+
+def test_can_create_orders_batch():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    tx = escrow.createOrders(
+        [amount, amount * 2, amount * 3], [deposit, deposit, 0], {"from": account}
+    )
+    tx.wait(1)
+    assert escrow.orderCount() == 3
+    assert len(tx.events["OrderCreated"]) == 3
+    assert escrow.orders(0) == (0, zero_address, account, amount, deposit, 0, 0)
+    assert escrow.orders(1) == (0, zero_address, account, amount * 2, deposit, 1, 0)
+    assert escrow.orders(2) == (0, zero_address, account, amount * 3, 0, 2, 0)
+
+
+def test_cant_create_orders_batch_with_small_order():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrders([amount, 1], [deposit, deposit], {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrders([amount, amount], [deposit], {"from": account})
+    assert escrow.orderCount() == 0
+
+
+def create_sent_order(escrow, seller, buyer, amount, deposit):
+    order_id = escrow.orderCount()
+    escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+    escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    escrow.sendOrder(order_id, {"from": seller}).wait(1)
+    return order_id
+
+
+def test_open_disputes_are_tracked_until_resolved():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    for _ in range(3):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    assert escrow.openDisputeCount() == 3
+    assert escrow.getOpenDisputes(0, 10) == (0, 1, 2)
+    tx_resolve = escrow.resolveDispute(0, 0, {"from": account})
+    tx_resolve.wait(1)
+    assert escrow.openDisputeCount() == 2
+    assert escrow.getOpenDisputes(0, 10) == (2, 1)
+    assert escrow.getOpenDisputes(1, 1) == (1,)
+    assert escrow.getOpenDisputes(2, 10) == ()
+
+
+def test_can_get_orders_by_seller_and_buyer():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.createOrders([amount] * 3, [deposit] * 3, {"from": account}).wait(1)
+    escrow.createOrder(amount, deposit, {"from": account_2}).wait(1)
+    for order_id in [0, 2, 3]:
+        tx_initiate = escrow.initiateOrder(
+            order_id, {"from": account_1, "value": amount + deposit}
+        )
+        tx_initiate.wait(1)
+    tx_cancel = escrow.cancelBuyOrder(0, {"from": account_1})
+    tx_cancel.wait(1)
+    assert escrow.sellerOrderCount(account) == 3
+    assert escrow.sellerOrderCount(account_2) == 1
+    ids, orders = escrow.getOrdersBySeller(account, 1, 10)
+    assert ids == (1, 2)
+    assert orders[0] == (0, 0, zero_address, "0x000000000000", account, 0, amount, deposit)
+    assert orders[1] == (1, 0, account_1, "0x000000000000", account, 0, amount, deposit)
+    assert escrow.buyerOrderCount(account_1) == 2
+    ids, orders = escrow.getOrdersByBuyer(account_1, 0, 10)
+    assert ids == (3, 2)
+    assert orders[0] == (1, 0, account_1, "0x000000000000", account_2, 0, amount, deposit)
+    assert escrow.getOrdersByBuyer(account_1, 2, 10) == ((), ())
+    # settled orders stay in the buyer list, with their buyer
+    escrow.sendOrder(2, {"from": account}).wait(1)
+    escrow.receiveOrder(2, {"from": account_1}).wait(1)
+    assert escrow.buyerOrderCount(account_1) == 2
+    ids, orders = escrow.getOrdersByBuyer(account_1, 0, 10)
+    assert ids == (3, 2)
+    assert orders[1][:3] == (3, 0, account_1)
+    assert orders[1][4:] == (account, 0, 0, 0)
+    assert escrow.orders(2)[1] == account_1
+
+
+def test_pull_payments_credit_and_withdraw():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.setPullPayments(True, {"from": account_1})
+    escrow.setPullPayments(True, {"from": account}).wait(1)
+    order_ids = [
+        create_sent_order(escrow, account, account_1, amount, deposit) for _ in range(2)
+    ]
+    seller_old_balance = account.balance()
+    buyer_old_balance = account_1.balance()
+    for order_id in order_ids:
+        escrow.receiveOrder(order_id, {"from": account_1}).wait(1)
+    assert account_1.balance() == buyer_old_balance
+    assert escrow.pendingWithdrawals(account, zero_address) == 2 * amount
+    assert escrow.pendingWithdrawals(account_1, zero_address) == 2 * deposit
+    tx_withdraw = escrow.withdraw([zero_address], {"from": account_1})
+    tx_withdraw.wait(1)
+    assert account_1.balance() == buyer_old_balance + 2 * deposit
+    assert escrow.pendingWithdrawals(account_1, zero_address) == 0
+    escrow.withdraw([zero_address], {"from": account}).wait(1)
+    assert account.balance() == seller_old_balance + 2 * amount
+    assert escrow.balance() == 0
+
+
+def test_admin_can_resolve_disputes_batch():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(3 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    for _ in range(3):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    buyer_refund = Web3.toWei(MIN_ORDER, "ether")
+    seller_old_balance = account_2.balance()
+    buyer_old_balance = account_1.balance()
+    admin_old_balance = account.balance()
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveDisputes([0], [buyer_refund], {"from": account_1})
+    # 1 has a too high refund, 3 is not disputed
+    tx_resolve = escrow.resolveDisputes(
+        [0, 1, 2, 3], [buyer_refund, amount + deposit, 0, 0], {"from": account}
+    )
+    tx_resolve.wait(1)
+    assert tx_resolve.return_value == (True, False, True, False)
+    assert [e["_orderId"] for e in tx_resolve.events["DisputeSkipped"]] == [1, 3]
+    assert len(tx_resolve.events["OrderResolved"]) == 2
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == 2 * dispute_fee
+    assert account_1.balance() == buyer_old_balance + buyer_refund
+    assert account_2.balance() == seller_old_balance + 2 * (
+        amount + deposit - dispute_fee
+    ) - buyer_refund
+    assert escrow.openDisputeCount() == 1
+    assert escrow.orders(1)[0] == 5
+
+
+def test_seller_can_expire_orders_batch():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow(expiry_blocks=0)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    for _ in range(2):
+        create_sent_order(escrow, account, account_1, amount, deposit)
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+    seller_old_balance = account.balance()
+    # 2 belongs to another seller, 3 is not sent
+    tx_expire = escrow.expireOrders([0, 1, 2, 3], {"from": account})
+    tx_expire.wait(1)
+    assert tx_expire.return_value == (True, True, False, False)
+    assert [e["_orderId"] for e in tx_expire.events["ExpireSkipped"]] == [2, 3]
+    assert len(tx_expire.events["OrderExpired"]) == 2
+    assert account.balance() == seller_old_balance + 2 * (amount + deposit)
+    assert escrow.orders(0)[0] == 7
+    assert escrow.orders(1)[0] == 7
+    assert escrow.orders(2)[0] == 2
+
+
+def test_seller_can_send_orders_with_multicall():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    for order_id in range(3):
+        escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+        escrow.initiateOrder(
+            order_id, {"from": account_1, "value": amount + deposit}
+        ).wait(1)
+    calls = [escrow.sendOrder.encode_input(order_id) for order_id in range(3)]
+    # the modifiers see the caller of multicall, not the contract itself
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account_2})
+    tx_multicall = escrow.multicall(calls, {"from": account})
+    tx_multicall.wait(1)
+    assert len(tx_multicall.events["OrderSent"]) == 3
+    assert [escrow.orders(order_id)[0] for order_id in range(3)] == [2, 2, 2]
+
+
+def test_multicall_can_mix_actions_and_reads():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    order_id = create_sent_order(escrow, account, account_1, amount, deposit)
+    calls = [
+        escrow.disputeOrder.encode_input(order_id),
+        escrow.orders.encode_input(order_id),
+        escrow.openDisputeCount.encode_input(),
+    ]
+    results = escrow.multicall.call(calls, {"from": account_1})
+    assert escrow.orders.decode_output(results[1])[0] == 5
+    assert escrow.openDisputeCount.decode_output(results[2]) == 1
+    escrow.multicall(calls, {"from": account_1}).wait(1)
+    assert escrow.orders(order_id)[0] == 5
+
+
+def test_multicall_cant_reuse_msg_value():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    for _ in range(2):
+        escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+    calls = [escrow.initiateOrder.encode_input(order_id) for order_id in range(2)]
+    # multicall is not payable, a batch can't carry the value of one order for two
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account_1, "value": amount + deposit})
+    # and payable calls inside a batch see no value
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls[:1], {"from": account_1})
+    assert escrow.orders(0)[0] == 0
+    assert escrow.orders(1)[0] == 0
+    assert escrow.balance() == 0
+
+
+def test_can_get_orders_range_with_status_mask():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.createOrders([amount] * 3, [deposit] * 3, {"from": account}).wait(1)
+    sent_id = create_sent_order(escrow, account, account_1, amount, deposit)
+    escrow.createOrder(amount, deposit, {"from": account}).wait(1)
+    ids, orders = escrow.getOrders(0, 10, 0)
+    assert ids == (0, 1, 2, 3, 4)
+    assert orders[0] == (0, 0, zero_address, "0x000000000000", account, 0, amount, deposit)
+    ids, orders = escrow.getOrders(2, 2, 0)
+    assert ids == (2, 3)
+    assert orders[1][0] == 2
+    ids, orders = escrow.getOrders(1, 3, status_mask([2]))
+    assert ids == (sent_id,)
+    assert orders[0][2] == account_1
+    ids, orders = escrow.getOrders(0, 10, status_mask([0, 2]))
+    assert ids == (0, 1, 2, 3, 4)
+    assert escrow.getOrders(0, 10, status_mask([5])) == ((), ())
+    assert escrow.getOrders(5, 10, 0) == ((), ())
+
+
+def test_fetch_all_orders_pages_through_orders():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    assert fetch_all_orders(escrow) == {}
+    escrow.createOrders([amount] * 5, [deposit] * 5, {"from": account}).wait(1)
+    sent_id = create_sent_order(escrow, account, account_1, amount, deposit)
+    snapshot = fetch_all_orders(escrow, probe_page_size=2)
+    assert sorted(snapshot) == list(range(6))
+    assert snapshot[sent_id][0] == 2
+    # a cap small enough for a few orders per call still reads all of them
+    gas_per_order = escrow.getOrders.estimate_gas(0, 6, 0) // 6
+    snapshot = fetch_all_orders(escrow, call_gas_limit=3 * gas_per_order)
+    assert sorted(snapshot) == list(range(6))
+    assert list(fetch_all_orders(escrow, mask=status_mask([2]))) == [sent_id]
+
+
+def test_can_query_order_events_by_topic():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    create_sent_order(escrow, account, account_1, amount, deposit)
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    create_sent_order(escrow, account, account_2, amount, deposit)
+    escrow.receiveOrder(2, {"from": account_2}).wait(1)
+    assert seller_order_ids(escrow, account) == [0, 2]
+    assert buyer_order_ids(escrow, account_1) == [0, 1]
+    events = order_events(escrow, [2])
+    assert [event.name for event in events] == [
+        "OrderCreated",
+        "OrderInitiated",
+        "OrderSent",
+        "OrderReceived",
+    ]
+    assert events[1]["_buyer"] == account_2
+    assert len(order_events(escrow, [0, 1])) == 6
+
+
+def test_owner_can_withdraw_accrued_fees():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.withdrawFees(account, {"from": account})
+    for _ in range(2):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+        escrow.resolveDispute(order_id, 0, {"from": account}).wait(1)
+    assert escrow.accruedFees() == 2 * dispute_fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.withdrawFees(account_1, {"from": account_1})
+    receiver_old_balance = account_2.balance()
+    tx_withdraw = escrow.withdrawFees(account_2, {"from": account})
+    tx_withdraw.wait(1)
+    assert account_2.balance() == receiver_old_balance + 2 * dispute_fee
+    assert tx_withdraw.events["FeesWithdrawn"]["amount"] == 2 * dispute_fee
+    assert escrow.accruedFees() == 0
+    assert escrow.balance() == 0
+
+
+def test_lifecycle_with_compact_calls():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    tx_create = send_compact(escrow, "createOrder", amount, deposit, account=account_2)
+    assert len(tx_create.input) == 2 + 2 * 25
+    assert tx_create.events["OrderCreated"]["_seller"] == account_2
+    send_compact(escrow, "initiateOrder", 0, account=account_1, value=amount + deposit)
+    send_compact(escrow, "sendOrder", 0, account=account_2)
+    seller_old_balance = account_2.balance()
+    send_compact(escrow, "receiveOrder", 0, account=account_1)
+    assert account_2.balance() == seller_old_balance + amount
+    assert escrow.orders(0)[0] == 3
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    send_compact(escrow, "disputeOrder", 1, account=account_1)
+    buyer_old_balance = account_1.balance()
+    send_compact(escrow, "resolveDispute", 1, deposit, account=account)
+    assert account_1.balance() == buyer_old_balance + deposit
+    assert escrow.orders(1)[0] == 6
+
+
+def test_compact_calls_keep_checks():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.createOrder(amount, deposit, {"from": account_2}).wait(1)
+    escrow.initiateOrder(0, {"from": account_1, "value": amount + deposit}).wait(1)
+    send_order = "0x" + encode_compact("sendOrder", 0).hex()
+    # only the seller, no ETH on non payable calls, exact lengths and known opcodes
+    with pytest.raises(exceptions.VirtualMachineError):
+        account_1.transfer(escrow, 0, data=send_order)
+    with pytest.raises(exceptions.VirtualMachineError):
+        account_2.transfer(escrow, 1, data=send_order)
+    with pytest.raises(exceptions.VirtualMachineError):
+        account_2.transfer(escrow, 0, data=send_order + "00")
+    with pytest.raises(exceptions.VirtualMachineError):
+        account_2.transfer(escrow, 0, data="0x0f00000000")
+    with pytest.raises(exceptions.VirtualMachineError):
+        account.transfer(escrow, amount)
+    with pytest.raises(ValueError):
+        encode_compact("sendOrder", 2 ** 32)
+    account_2.transfer(escrow, 0, data=send_order).wait(1)
+    assert escrow.orders(0)[0] == 2
+
+
+def test_netting_payouts_equal_per_order_payouts():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    account_3 = get_account(index=3)
+    escrow = deploy_escrow()
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    for netting_account in (account_1, account_2):
+        escrow.setNetting(True, {"from": netting_account}).wait(1)
+    # orders in both directions between 1 and 2, and between 1 and 3 who doesn't net
+    rng = random.Random(42)
+    pairs = [(account_1, account_2), (account_2, account_1), (account_3, account_1)]
+    orders = []
+    for _ in range(12):
+        seller, buyer = rng.choice(pairs)
+        amount = Web3.toWei(MIN_ORDER * rng.randint(1, 5), "ether")
+        orders.append((create_sent_order(escrow, seller, buyer, amount, deposit), seller, buyer, amount))
+    traders = [account_1, account_2, account_3]
+    old_balances = {a: a.balance() for a in traders}
+    expected = {a: 0 for a in traders}
+    for order_id, seller, buyer, amount in orders:
+        tx_receive = escrow.receiveOrder(order_id, {"from": buyer})
+        tx_receive.wait(1)
+        netted = account_3 not in (seller, buyer)
+        assert len(tx_receive.internal_transfers) == (0 if netted else 2)
+        expected[seller] += amount
+        expected[buyer] += deposit
+    netted_1 = sum(
+        amount if seller == account_1 else deposit
+        for _, seller, buyer, amount in orders
+        if account_3 not in (seller, buyer)
+    )
+    netted_2 = sum(
+        amount if seller == account_2 else deposit
+        for _, seller, buyer, amount in orders
+        if account_3 not in (seller, buyer)
+    )
+    assert escrow.netBalance(account_1, account_2) == (netted_1, netted_2)
+    assert escrow.netBalance(account_2, account_1) == (netted_2, netted_1)
+    assert escrow.balance() == netted_1 + netted_2
+    # each side collects its own balance
+    tx_settle = escrow.settleNet(account_1, {"from": account_2})
+    tx_settle.wait(1)
+    assert len(tx_settle.internal_transfers) == 1
+    assert escrow.netBalance(account_1, account_2) == (netted_1, 0)
+    escrow.settleNet(account_2, {"from": account_1}).wait(1)
+    for a in traders:
+        assert a.balance() == old_balances[a] + expected[a]
+    assert escrow.balance() == 0
+    assert escrow.netBalance(account_1, account_2) == (0, 0)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.settleNet(account_2, {"from": account_1})
+
+
+def test_netting_is_opt_in_and_survives_opt_out():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.setNetting(True, {"from": account_1}).wait(1)
+    # only one side opted in : paid at once
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    seller_old_balance = account_2.balance()
+    escrow.receiveOrder(0, {"from": account_1}).wait(1)
+    assert account_2.balance() == seller_old_balance + amount
+    escrow.setNetting(True, {"from": account_2}).wait(1)
+    create_sent_order(escrow, account_2, account_1, amount, deposit)
+    escrow.receiveOrder(1, {"from": account_1}).wait(1)
+    assert escrow.netBalance(account_2, account_1) == (amount, deposit)
+    escrow.setNetting(False, {"from": account_2}).wait(1)
+    assert not escrow.nettingEnabled(account_2)
+    tx_settle = escrow.settleNet(account_2, {"from": account_1})
+    tx_settle.wait(1)
+    assert tx_settle.events["NetSettled"]["amount"] == deposit
+    assert account_2.balance() == seller_old_balance + amount
+    tx_settle = escrow.settleNet(account_1, {"from": account_2})
+    tx_settle.wait(1)
+    assert tx_settle.events["NetSettled"]["_account"] == account_2
+    assert tx_settle.events["NetSettled"]["amount"] == amount
+    assert account_2.balance() == seller_old_balance + 2 * amount
+
+
+def test_counterparty_rejecting_eth_cant_block_net_settlement():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow()
+    trader = RejectingTrader.deploy({"from": account_1})
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.setNetting(True, {"from": account_1}).wait(1)
+    trader.execute(escrow, escrow.setNetting.encode_input(True), {"from": account_1}).wait(1)
+    # the contract sells to account 1, its payout is netted
+    trader.execute(escrow, escrow.createOrder.encode_input(amount, deposit), {"from": account_1}).wait(1)
+    escrow.initiateOrder(0, {"from": account_1, "value": amount + deposit}).wait(1)
+    trader.execute(escrow, escrow.sendOrder.encode_input(0), {"from": account_1}).wait(1)
+    escrow.receiveOrder(0, {"from": account_1}).wait(1)
+    assert escrow.netBalance(account_1, trader) == (deposit, amount)
+    # account 1 collects its side although the contract rejects ETH
+    buyer_old_balance = account_1.balance()
+    escrow.settleNet(trader, {"from": account_1}).wait(1)
+    assert account_1.balance() == buyer_old_balance + deposit
+    assert escrow.netBalance(account_1, trader) == (0, amount)
+    with pytest.raises(exceptions.VirtualMachineError):
+        trader.execute(escrow, escrow.settleNet.encode_input(account_1), {"from": account_1})
+    trader.setRejectPayments(False, {"from": account_1}).wait(1)
+    trader.execute(escrow, escrow.settleNet.encode_input(account_1), {"from": account_1}).wait(1)
+    assert trader.balance() == amount
+    assert escrow.balance() == 0
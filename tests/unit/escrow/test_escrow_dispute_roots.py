@@ -0,0 +1,177 @@
+from scripts.escrow_scripts.deploy_escrow import (
+    deploy_escrow,
+    deploy_dispute_roots,
+    DISPUTE_FEE,
+    MIN_ORDER,
+    ZERO_ADDRESS,
+)
+from scripts.escrow_scripts.dispute_merkle import build_dispute_claims, post_decisions
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions
+import pytest
+from web3 import Web3
+
+
+def create_sent_order(escrow, seller, buyer, amount, deposit):
+    order_id = escrow.orderCount()
+    escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+    escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    escrow.sendOrder(order_id, {"from": seller}).wait(1)
+    return order_id
+
+
+def test_disputes_can_be_claimed_from_merkle_root(tmp_path):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    dispute_roots = deploy_dispute_roots(escrow)
+    amount = Web3.toWei(3 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    total = amount + deposit - dispute_fee
+    for _ in range(3):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    decisions = tmp_path / "decisions.csv"
+    decisions.write_text(
+        "order_id,refund_to_buyer,refund_to_seller\n"
+        f"0,{total},0\n1,{amount},{total - amount}\n2,0,{total}\n"
+    )
+    with pytest.raises(exceptions.VirtualMachineError):
+        post_decisions(dispute_roots, decisions, account_1)
+    root_id, claims = post_decisions(dispute_roots, decisions, account)
+    assert root_id == 0
+    assert dispute_roots.disputeRootCount() == 1
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(root_id, *claims[1], {"from": account})
+    # refunds not matching the posted decision
+    order_id, refund_to_buyer, refund_to_seller, proof = claims[1]
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(
+            root_id, order_id, refund_to_seller, refund_to_buyer, proof, {"from": account_1}
+        )
+    seller_old_balance = account_2.balance()
+    buyer_old_balance = account_1.balance()
+    dispute_roots.claimDisputeResolution(root_id, *claims[1], {"from": account_2}).wait(1)
+    assert account_1.balance() == buyer_old_balance + amount
+    assert account_2.balance() == seller_old_balance + total - amount
+    assert escrow.orders(1)[0] == 6
+    assert escrow.accruedFees() == dispute_fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(root_id, *claims[1], {"from": account_2})
+    dispute_roots.claimDisputeResolution(root_id, *claims[0], {"from": account_1}).wait(1)
+    dispute_roots.claimDisputeResolution(root_id, *claims[2], {"from": account_1}).wait(1)
+    assert escrow.openDisputeCount() == 0
+    assert escrow.balance() == 3 * dispute_fee
+
+
+def test_superseded_dispute_root_cant_be_claimed(tmp_path):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    dispute_roots = deploy_dispute_roots(escrow)
+    amount = Web3.toWei(3 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    total = amount + deposit - dispute_fee
+    for _ in range(2):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    decisions = tmp_path / "decisions.csv"
+    decisions.write_text(f"order_id,refund_to_buyer,refund_to_seller\n0,{total},0\n1,{total},0\n")
+    old_root_id, old_claims = post_decisions(dispute_roots, decisions, account)
+    # the owner corrects the decision of order 1 in a new root and revokes the old one
+    decisions.write_text(f"order_id,refund_to_buyer,refund_to_seller\n0,{total},0\n1,0,{total}\n")
+    root_id, claims = post_decisions(dispute_roots, decisions, account)
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.revokeDisputeRoot(old_root_id, {"from": account_1})
+    tx_revoke = dispute_roots.revokeDisputeRoot(old_root_id, {"from": account})
+    tx_revoke.wait(1)
+    assert tx_revoke.events["DisputeRootRevoked"]["_rootId"] == old_root_id
+    assert dispute_roots.disputeRoots(old_root_id) == "0x" + "00" * 32
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.revokeDisputeRoot(old_root_id, {"from": account})
+    # the proofs of the revoked root are rejected, even for a decision that did not change
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(old_root_id, *old_claims[1], {"from": account_1})
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(old_root_id, *old_claims[0], {"from": account_1})
+    seller_old_balance = account_2.balance()
+    dispute_roots.claimDisputeResolution(root_id, *claims[1], {"from": account_1}).wait(1)
+    assert account_2.balance() == seller_old_balance + total
+    dispute_roots.claimDisputeResolution(root_id, *claims[0], {"from": account_1}).wait(1)
+    assert escrow.openDisputeCount() == 0
+    assert escrow.balance() == 2 * dispute_fee
+
+
+
+def test_only_dispute_resolver_can_settle_disputes():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    amount = Web3.toWei(3 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+    escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    # without resolver nobody can call `settleDispute`, the owner uses `resolveDispute`
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.settleDispute(order_id, 0, 0, {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.setDisputeResolver(account_1, {"from": account_1})
+    dispute_roots = deploy_dispute_roots(escrow)
+    assert escrow.disputeResolver() == dispute_roots
+    assert dispute_roots.escrow() == escrow
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.settleDispute(order_id, 0, 0, {"from": account_1})
+    root, claims = build_dispute_claims([(order_id, amount + deposit - escrow.disputeFee(), 0)])
+    dispute_roots.postDisputeRoot(root, {"from": account}).wait(1)
+    # once the owner removes the resolver its roots can't be claimed anymore
+    escrow.setDisputeResolver(ZERO_ADDRESS, {"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(0, *claims[order_id], {"from": account_1})
+    escrow.setDisputeResolver(dispute_roots, {"from": account}).wait(1)
+    buyer_old_balance = account_1.balance()
+    dispute_roots.claimDisputeResolution(0, *claims[order_id], {"from": account_1}).wait(1)
+    assert account_1.balance() == buyer_old_balance + amount + deposit - escrow.disputeFee()
+    assert escrow.orders(order_id)[0] == 6
+
+
+def test_claims_charge_the_fee_committed_in_the_leaf(tmp_path):
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow()
+    dispute_roots = deploy_dispute_roots(escrow)
+    amount = Web3.toWei(3 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    for _ in range(2):
+        order_id = create_sent_order(escrow, account_2, account_1, amount, deposit)
+        escrow.disputeOrder(order_id, {"from": account_1}).wait(1)
+    # decisions taken with another fee than the current `disputeFee`, and refunds above the funds of the order
+    decisions = tmp_path / "decisions.csv"
+    decisions.write_text(
+        "order_id,refund_to_buyer,refund_to_seller\n"
+        f"0,{amount},{deposit - 2 * dispute_fee}\n1,{amount},{deposit + 1}\n"
+    )
+    root_id, claims = post_decisions(dispute_roots, decisions, account)
+    with pytest.raises(exceptions.VirtualMachineError):
+        dispute_roots.claimDisputeResolution(root_id, *claims[1], {"from": account_1})
+    seller_old_balance = account_2.balance()
+    buyer_old_balance = account_1.balance()
+    dispute_roots.claimDisputeResolution(root_id, *claims[0], {"from": account_1}).wait(1)
+    assert account_1.balance() == buyer_old_balance + amount
+    assert account_2.balance() == seller_old_balance + deposit - 2 * dispute_fee
+    assert escrow.accruedFees() == 2 * dispute_fee
+    assert escrow.orders(0)[0] == 6
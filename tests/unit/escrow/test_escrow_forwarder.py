@@ -0,0 +1,156 @@
+from scripts.escrow_scripts.deploy_escrow import (
+    deploy_escrow,
+    deploy_forwarder,
+    DISPUTE_FEE,
+    MIN_ORDER,
+)
+from scripts.escrow_scripts.compact_calls import encode_compact
+from scripts.relayer import Relayer, build_request, sign_request, REQUEST_GAS
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions, accounts
+import pytest
+from web3 import Web3
+
+
+def relay(relayer, forwarder, account, target, fn_name, *args):
+    request = build_request(
+        forwarder, account, target, fn_name, *args, nonce=relayer.next_nonce(account.address)
+    )
+    return relayer.submit(request, sign_request(forwarder, account, request))
+
+
+def relay_data(relayer, forwarder, account, target, data):
+    request = (account.address, target.address, 0, REQUEST_GAS, relayer.next_nonce(account.address), data)
+    return relayer.submit(request, sign_request(forwarder, account, request))
+
+
+def test_relayer_batches_signed_requests():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    forwarder = deploy_forwarder()
+    escrow = deploy_escrow(forwarder=forwarder)
+    assert escrow.isTrustedForwarder(forwarder)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, 2 * (amount + deposit)).wait(1)
+    relayer = Relayer(forwarder, account)
+    # the seller has no ETH, its orders are created by the relayer
+    relay(relayer, forwarder, seller, escrow, "createOrders", [amount] * 2, [deposit] * 2)
+    results = relayer.flush()
+    assert results[0]["success"]
+    assert escrow.getOrdersBySeller(seller, 0, 10)[0] == (0, 1)
+    for order_id in range(2):
+        escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    tickets = [
+        relay(relayer, forwarder, seller, escrow, "sendOrder", 0),
+        relay(relayer, forwarder, seller, escrow, "sendOrder", 1),
+        relay(relayer, forwarder, buyer, escrow, "receiveOrder", 0),
+        # only the seller can send an order, the call fails without reverting the batch
+        relay(relayer, forwarder, buyer, escrow, "sendOrder", 1),
+        relay(relayer, forwarder, buyer, escrow, "disputeOrder", 1),
+    ]
+    seller_old_balance = seller.balance()
+    results = relayer.flush()
+    assert [results[ticket]["success"] for ticket in tickets] == [True, True, True, False, True]
+    assert all(results[ticket]["executed"] for ticket in tickets)
+    assert len({results[ticket]["tx"].txid for ticket in tickets}) == 1
+    assert seller.balance() == seller_old_balance + amount
+    assert escrow.orders(0)[0] == 3
+    assert escrow.orders(1)[0] == 5
+    assert forwarder.getNonce(buyer) == 3
+    assert relayer.flush() == {}
+
+
+def test_relayer_rejects_invalid_requests():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    seller = accounts.add()
+    other = accounts.add()
+    forwarder = deploy_forwarder()
+    escrow = deploy_escrow(forwarder=forwarder)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    relayer = Relayer(forwarder, account)
+    request = build_request(forwarder, seller, escrow, "createOrder", amount, deposit)
+    with pytest.raises(ValueError):
+        relayer.submit(request, sign_request(forwarder, other, request))
+    stale = build_request(forwarder, seller, escrow, "createOrder", amount, deposit, nonce=1)
+    with pytest.raises(ValueError):
+        relayer.submit(stale, sign_request(forwarder, seller, stale))
+    # a request used directly on the forwarder is skipped in the batch
+    signature = sign_request(forwarder, seller, request)
+    ticket = relayer.submit(request, signature)
+    forwarder.execute(request, signature, {"from": account}).wait(1)
+    results = relayer.flush()
+    assert not results[ticket]["executed"]
+    assert escrow.orderCount() == 1
+    with pytest.raises(exceptions.VirtualMachineError):
+        forwarder.execute(request, signature, {"from": account})
+
+
+def test_relayed_multicall_keeps_signer():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = get_account(index=1)
+    seller = accounts.add()
+    attacker = accounts.add()
+    forwarder = deploy_forwarder()
+    escrow = deploy_escrow(forwarder=forwarder)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    relayer = Relayer(forwarder, account)
+    relay(relayer, forwarder, seller, escrow, "createOrders", [amount] * 3, [deposit] * 3)
+    relayer.flush()
+    for order_id in range(3):
+        escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    # a call of the batch ending with the seller address must not be read as sent by the seller
+    spoofed = escrow.sendOrder.encode_input(2) + seller.address[2:].lower()
+    attack = relay(relayer, forwarder, attacker, escrow, "multicall", [spoofed])
+    calls = [escrow.sendOrder.encode_input(order_id) for order_id in range(2)]
+    batch = relay(relayer, forwarder, seller, escrow, "multicall", calls)
+    results = relayer.flush()
+    assert not results[attack]["success"]
+    assert results[batch]["success"]
+    assert [escrow.orders(order_id)[0] for order_id in range(3)] == [2, 2, 1]
+
+
+def test_compact_calls_can_be_relayed():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    forwarder = deploy_forwarder()
+    escrow = deploy_escrow(forwarder=forwarder)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, 2 * (amount + deposit)).wait(1)
+    relayer = Relayer(forwarder, account)
+    # compact calls relayed alone, the forwarder appends the seller to each payload
+    create = "0x" + encode_compact("createOrder", amount, deposit).hex()
+    tickets = [relay_data(relayer, forwarder, seller, escrow, create) for _ in range(2)]
+    results = relayer.flush()
+    assert all(results[ticket]["success"] for ticket in tickets)
+    assert escrow.getOrdersBySeller(seller, 0, 10)[0] == (0, 1)
+    for order_id in range(2):
+        escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    # compact calls inside a relayed multicall, `multicall` appends the seller to each of them too
+    calls = ["0x" + encode_compact("sendOrder", order_id).hex() for order_id in range(2)]
+    batch = relay(relayer, forwarder, seller, escrow, "multicall", calls)
+    results = relayer.flush()
+    assert results[batch]["success"]
+    assert [escrow.orders(order_id)[0] for order_id in range(2)] == [2, 2]
+    # the appended sender is the one checked : the buyer can't expire the order of the seller
+    denied = relay(relayer, forwarder, buyer, escrow, "multicall", ["0x" + encode_compact("expireOrder", 0).hex()])
+    received = relay(relayer, forwarder, buyer, escrow, "multicall", ["0x" + encode_compact("receiveOrder", 0).hex()])
+    seller_old_balance = seller.balance()
+    results = relayer.flush()
+    assert not results[denied]["success"]
+    assert results[received]["success"]
+    assert seller.balance() == seller_old_balance + amount
+    assert escrow.orders(0)[0] == 3
@@ -0,0 +1,153 @@
+from scripts.escrow_scripts.deploy_escrow import deploy_escrow_milestones, DISPUTE_FEE, MIN_ORDER
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions
+import pytest
+from web3 import Web3
+
+MILESTONES = [Web3.toWei(MIN_ORDER * k, "ether") for k in (1, 2, 3)]
+
+
+def create_initiated_order(escrow, seller, buyer, amounts, deposit):
+    order_id = escrow.orderCount()
+    escrow.createOrder(amounts, deposit, {"from": seller}).wait(1)
+    escrow.initiateOrder(order_id, {"from": buyer, "value": sum(amounts) + deposit}).wait(1)
+    return order_id
+
+
+def test_milestone_order_is_funded_once_and_released_per_tranche():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_milestones()
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.createOrder(MILESTONES, deposit, {"from": account_2}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrder(0, {"from": account_1, "value": MILESTONES[0] + deposit})
+    buyer_old_balance = account_1.balance()
+    escrow.initiateOrder(0, {"from": account_1, "value": sum(MILESTONES) + deposit}).wait(1)
+    assert account_1.balance() == buyer_old_balance - sum(MILESTONES) - deposit
+    assert escrow.orders(0) == (1, account_1, 0, 3, 3, False, account_2, deposit)
+    assert [m[2] for m in escrow.getMilestones(0)] == [0, 0, 0]
+    # a tranche must be sent before it is released
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.releaseMilestone(0, 0, {"from": account_1})
+    for index, amount in enumerate(MILESTONES):
+        escrow.sendMilestone(0, index, {"from": account_2}).wait(1)
+        with pytest.raises(exceptions.VirtualMachineError):
+            escrow.releaseMilestone(0, index, {"from": account_2})
+        seller_old_balance = account_2.balance()
+        tx_release = escrow.releaseMilestone(0, index, {"from": account_1})
+        tx_release.wait(1)
+        assert account_2.balance() == seller_old_balance + amount
+        assert escrow.getMilestones(0)[index][2] == 2
+    assert tx_release.events["OrderClosed"]["depositTo"] == account_1
+    assert account_1.balance() == buyer_old_balance - sum(MILESTONES)
+    assert escrow.orders(0)[0] == 2
+    assert escrow.balance() == 0
+
+
+def test_expiry_and_disputes_apply_per_tranche():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_milestones(expiry_blocks=0)
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    order_id = create_initiated_order(escrow, account_2, account_1, MILESTONES, deposit)
+    for index in range(3):
+        escrow.sendMilestone(order_id, index, {"from": account_2}).wait(1)
+    seller_old_balance = account_2.balance()
+    escrow.expireMilestone(order_id, 0, {"from": account_2}).wait(1)
+    assert account_2.balance() == seller_old_balance + MILESTONES[0]
+    escrow.disputeMilestone(order_id, 1, {"from": account_1}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveMilestone(order_id, 1, 0, {"from": account_1})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveMilestone(order_id, 1, MILESTONES[1], {"from": account})
+    buyer_old_balance = account_1.balance()
+    seller_old_balance = account_2.balance()
+    refund = MILESTONES[1] // 2
+    escrow.resolveMilestone(order_id, 1, refund, {"from": account}).wait(1)
+    assert account_1.balance() == buyer_old_balance + refund
+    assert account_2.balance() == seller_old_balance + MILESTONES[1] - refund - dispute_fee
+    assert escrow.accruedFees() == dispute_fee
+    # the undisputed tranche goes on, the deposit goes to the seller as a tranche expired
+    seller_old_balance = account_2.balance()
+    tx_release = escrow.releaseMilestone(order_id, 2, {"from": account_1})
+    tx_release.wait(1)
+    assert account_2.balance() == seller_old_balance + MILESTONES[2] + deposit
+    assert tx_release.events["OrderClosed"]["depositTo"] == account_2
+    assert [m[2] for m in escrow.getMilestones(order_id)] == [5, 4, 2]
+    assert escrow.balance() == dispute_fee
+
+
+def test_milestone_order_cancellations():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_milestones()
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    order_id = create_initiated_order(escrow, account_2, account_1, MILESTONES, deposit)
+    # the buyer cancels before any tranche is sent, the order is available again
+    buyer_old_balance = account_1.balance()
+    escrow.cancelBuyOrder(order_id, {"from": account_1}).wait(1)
+    assert account_1.balance() == buyer_old_balance + sum(MILESTONES) + deposit
+    assert escrow.orders(order_id)[:2] == (0, "0x0000000000000000000000000000000000000000")
+    escrow.initiateOrder(order_id, {"from": account_1, "value": sum(MILESTONES) + deposit}).wait(1)
+    escrow.sendMilestone(order_id, 0, {"from": account_2}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.cancelBuyOrder(order_id, {"from": account_1})
+    escrow.disputeMilestone(order_id, 0, {"from": account_2}).wait(1)
+    escrow.sendMilestone(order_id, 1, {"from": account_2}).wait(1)
+    # the seller cancels : sent and pending tranches and the deposit are refunded, the dispute stays
+    buyer_old_balance = account_1.balance()
+    escrow.cancelSellOrder(order_id, {"from": account_2}).wait(1)
+    assert account_1.balance() == buyer_old_balance + MILESTONES[1] + MILESTONES[2] + deposit
+    assert [m[2] for m in escrow.getMilestones(order_id)] == [3, 6, 6]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.sendMilestone(order_id, 1, {"from": account_2})
+    escrow.resolveMilestone(order_id, 0, 0, {"from": account}).wait(1)
+    assert escrow.orders(order_id)[0] == 3
+    assert escrow.balance() == escrow.accruedFees()
+
+
+def test_cant_create_wrong_milestone_orders():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_milestones()
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder([], deposit, {"from": account_2})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder([MILESTONES[0]] * 33, deposit, {"from": account_2})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder([MILESTONES[2], dispute_fee], deposit, {"from": account_2})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder([dispute_fee + 1], deposit, {"from": account_2})
+    assert escrow.orderCount() == 0
+
+
+def test_cant_use_cancelled_milestone_order():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_milestones()
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    escrow.createOrder(MILESTONES, deposit, {"from": account_2}).wait(1)
+    escrow.cancelSellOrder(0, {"from": account_2}).wait(1)
+    assert escrow.orders(0)[0] == 3
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrder(0, {"from": account_1, "value": sum(MILESTONES) + deposit})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.sendMilestone(0, 0, {"from": account_2})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.cancelSellOrder(0, {"from": account_2})
+    assert escrow.balance() == 0
@@ -0,0 +1,251 @@
+from scripts.escrow_scripts.deploy_escrow import (
+    deploy_escrow,
+    deploy_signatures,
+    DISPUTE_FEE,
+    MIN_ORDER,
+    ZERO_ADDRESS,
+)
+from scripts.escrow_scripts.signed_orders import sign_order, sign_release, nonce_word_and_mask
+from scripts.escrow_scripts.order_snapshot import order_outcome
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions, accounts, chain
+import pytest
+from web3 import Web3
+
+
+def create_sent_order(escrow, seller, buyer, amount, deposit):
+    order_id = escrow.orderCount()
+    escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+    escrow.initiateOrder(order_id, {"from": buyer, "value": amount + deposit}).wait(1)
+    escrow.sendOrder(order_id, {"from": seller}).wait(1)
+    return order_id
+
+
+def test_buyer_can_initiate_signed_order():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    order, signature = sign_order(signatures, seller, amount, deposit, 0, chain.time() + 3600)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.initiateSignedOrder(
+            order, signature, {"from": account_1, "value": amount}
+        )
+    tx_initiate = signatures.initiateSignedOrder(
+        order, signature, {"from": account_1, "value": amount + deposit}
+    )
+    tx_initiate.wait(1)
+    assert escrow.orderCount() == 1
+    assert escrow.orders(0) == (1, account_1, seller, amount, deposit, 0, 0)
+    assert escrow.getOrdersByBuyer(account_1, 0, 10)[0] == (0,)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.initiateSignedOrder(
+            order, signature, {"from": account_1, "value": amount + deposit}
+        )
+
+
+def test_cant_initiate_tampered_or_expired_signed_order():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    order, signature = sign_order(signatures, seller, amount, deposit, 0, chain.time() + 3600)
+    tampered = (order[0], amount, 0, order[3], order[4])
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.initiateSignedOrder(
+            tampered, signature, {"from": account_1, "value": amount}
+        )
+    order, signature = sign_order(signatures, seller, amount, deposit, 1, chain.time() - 1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.initiateSignedOrder(
+            order, signature, {"from": account_1, "value": amount + deposit}
+        )
+    assert escrow.orderCount() == 0
+
+
+def test_seller_can_invalidate_signed_orders():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    seller = accounts.add()
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    deadline = chain.time() + 3600
+    signed = [
+        sign_order(signatures, seller, amount, deposit, nonce, deadline)
+        for nonce in [3, 7, 300]
+    ]
+    for word_pos, mask in nonce_word_and_mask([3, 300]).items():
+        signatures.invalidateNonces(word_pos, mask, {"from": seller}).wait(1)
+    assert signatures.nonceBitmap(seller, 0) == 1 << 3
+    assert signatures.nonceBitmap(seller, 1) == 1 << (300 - 256)
+    for order, signature in [signed[0], signed[2]]:
+        with pytest.raises(exceptions.VirtualMachineError):
+            signatures.initiateSignedOrder(
+                order, signature, {"from": account_1, "value": amount + deposit}
+            )
+    order, signature = signed[1]
+    tx_initiate = signatures.initiateSignedOrder(
+        order, signature, {"from": account_1, "value": amount + deposit}
+    )
+    tx_initiate.wait(1)
+    assert signatures.nonceBitmap(seller, 0) == (1 << 3) | (1 << 7)
+
+
+def test_only_signature_verifier_can_initiate_orders_for_buyers():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    # without verifier nobody can call `initiateOrderFor`
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrderFor(account_2, amount, deposit, account_1, {"from": account, "value": amount + deposit})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.setSignatureVerifier(account_1, {"from": account_1})
+    signatures = deploy_signatures(escrow)
+    assert escrow.signatureVerifier() == signatures
+    assert signatures.escrow() == escrow
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrderFor(account_2, amount, deposit, account_1, {"from": account_1, "value": amount + deposit})
+    order, signature = sign_order(signatures, seller, amount, deposit, 0, chain.time() + 3600)
+    # once the owner removes the verifier its signed orders can't be initiated anymore
+    escrow.setSignatureVerifier(ZERO_ADDRESS, {"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.initiateSignedOrder(order, signature, {"from": account_1, "value": amount + deposit})
+    escrow.setSignatureVerifier(signatures, {"from": account}).wait(1)
+    signatures.initiateSignedOrder(order, signature, {"from": account_1, "value": amount + deposit}).wait(1)
+    assert escrow.orders(0) == (1, account_1, seller, amount, deposit, 0, 0)
+    assert escrow.balance() == amount + deposit
+
+
+def test_order_can_be_settled_cooperatively():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, amount + deposit).wait(1)
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+    deadline = chain.time() + 3600
+    # nothing to release before the buyer pays
+    sig_buyer = sign_release(signatures, buyer, 0, deposit, amount, deadline)
+    sig_seller = sign_release(signatures, seller, 0, deposit, amount, deadline)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, deposit, amount, deadline, sig_buyer, sig_seller, {"from": account})
+    escrow.initiateOrder(0, {"from": buyer, "value": amount + deposit}).wait(1)
+    # only the signature verifier releases orders on the escrow
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.releaseOrder(0, deposit, amount, {"from": buyer})
+    # payouts not signed by both parties or not matching the funds
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, amount, deposit, deadline, sig_buyer, sig_seller, {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, deposit, amount, deadline, sig_seller, sig_seller, {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, deposit, amount, deadline + 1, sig_buyer, sig_seller, {"from": account})
+    too_much = sign_release(signatures, buyer, 0, amount + deposit, amount, deadline)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, amount + deposit, amount, deadline, too_much, sig_seller, {"from": account})
+    # an expired release is rejected
+    expired = chain.time() - 1
+    expired_signatures = [sign_release(signatures, signer, 0, deposit, amount, expired) for signer in (buyer, seller)]
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, deposit, amount, expired, *expired_signatures, {"from": account})
+    buyer_old_balance = buyer.balance()
+    seller_old_balance = seller.balance()
+    tx_settle = signatures.settleCooperatively(0, deposit, amount, deadline, sig_buyer, sig_seller, {"from": account})
+    tx_settle.wait(1)
+    assert buyer.balance() == buyer_old_balance + deposit
+    assert seller.balance() == seller_old_balance + amount
+    assert escrow.orders(0) == (3, buyer, seller, 0, 0, 0, 0)
+    assert escrow.orderOutcome(0) == order_outcome(0, 3, buyer, seller, deposit, amount)
+    assert tx_settle.events["OrderReceived"]["sellerRefund"] == amount
+    # the release can't be replayed
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, deposit, amount, deadline, sig_buyer, sig_seller, {"from": account})
+
+
+def test_release_cant_be_replayed_after_cancel():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, 2 * (amount + deposit)).wait(1)
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    escrow.createOrder(amount, deposit, {"from": seller}).wait(1)
+    escrow.initiateOrder(0, {"from": buyer, "value": amount + deposit}).wait(1)
+    deadline = chain.time() + 3600
+    # the buyer gets a release paying it everything back, then cancels and buys the order again
+    old_signatures = [sign_release(signatures, signer, 0, amount + deposit, 0, deadline) for signer in (buyer, seller)]
+    escrow.cancelBuyOrder(0, {"from": buyer}).wait(1)
+    assert escrow.releaseNonce(0) == 1
+    escrow.initiateOrder(0, {"from": buyer, "value": amount + deposit}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(0, amount + deposit, 0, deadline, *old_signatures, {"from": buyer})
+    # releases signed for the current initiation still settle it
+    release_signatures = [sign_release(signatures, signer, 0, deposit, amount, deadline) for signer in (buyer, seller)]
+    seller_old_balance = seller.balance()
+    signatures.settleCooperatively(0, deposit, amount, deadline, *release_signatures, {"from": account}).wait(1)
+    assert seller.balance() == seller_old_balance + amount
+    assert escrow.orders(0)[0] == 3
+
+
+def test_dispute_cant_be_settled_cooperatively():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    buyer = accounts.add()
+    seller = accounts.add()
+    escrow = deploy_escrow()
+    signatures = deploy_signatures(escrow)
+    amount = Web3.toWei(2 * MIN_ORDER, "ether")
+    deposit = Web3.toWei(DISPUTE_FEE, "ether")
+    dispute_fee = Web3.toWei(DISPUTE_FEE, "ether")
+    account.transfer(buyer, amount + deposit).wait(1)
+    account.transfer(seller, Web3.toWei(0.1, "ether")).wait(1)
+    order_id = create_sent_order(escrow, seller, buyer, amount, deposit)
+    escrow.disputeOrder(order_id, {"from": buyer}).wait(1)
+    payout_buyer = deposit + amount // 2
+    payout_seller = amount - amount // 2
+    deadline = chain.time() + 3600
+    release_signatures = [
+        sign_release(signatures, signer, order_id, payout_buyer, payout_seller, deadline)
+        for signer in (buyer, seller)
+    ]
+    # a co-signed release would skip the dispute fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        signatures.settleCooperatively(
+            order_id, payout_buyer, payout_seller, deadline, *release_signatures, {"from": seller}
+        )
+    assert escrow.orders(order_id)[0] == 5
+    assert escrow.openDisputeCount() == 1
+    escrow.resolveDispute(order_id, deposit, {"from": account}).wait(1)
+    assert escrow.orders(order_id)[0] == 6
+    assert escrow.accruedFees() == dispute_fee
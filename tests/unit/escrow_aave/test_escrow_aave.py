@@ -0,0 +1,114 @@
+from scripts.escrow_aave.deploy_aave_escrow import deploy_escrow_aave
+from scripts.escrow_aave.deploy_escrow_aave_pool import deploy_mock_lending_pool
+from scripts.escrow_erc20.deploy_escrow_erc20 import (
+    deploy_escrow_token,
+    fund_account,
+    approve_erc20,
+)
+
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from scripts.eip712 import sign_permit
+from brownie import network, exceptions, accounts, chain
+import pytest
+from web3 import Web3
+
+AMOUNT = Web3.toWei(1, "ether")
+BLOCKS = 10
+
+
+def test_deploy_escrow_aave_approves_lending_pool_once():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow_token = deploy_escrow_token()
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave(escrow_token, lending_pool)
+    assert escrow.owner() == account
+    assert escrow_token.allowance(escrow, lending_pool) == 2 ** 256 - 1
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initialize(escrow_token, lending_pool, account, {"from": account})
+
+
+def test_can_receive_order_aave():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_token = deploy_escrow_token()
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave(escrow_token, lending_pool)
+    escrow.createOrder(AMOUNT, BLOCKS, {"from": account_1}).wait(1)
+    approve_erc20(AMOUNT, escrow, escrow_token, account)
+    tx_initiate = escrow.initiateOrder({"from": account})
+    tx_initiate.wait(1)
+    assert a_token.balanceOf(escrow) == AMOUNT
+    assert escrow.status() == 2
+    escrow.sendOrder({"from": account_1}).wait(1)
+    escrow.receiveOrder({"from": account}).wait(1)
+    assert escrow_token.balanceOf(account_1) == AMOUNT
+    assert a_token.balanceOf(escrow) == 0
+    assert escrow.status() == 4
+
+
+def test_can_initiate_order_with_permit_aave():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    buyer = accounts.add()
+    escrow_token = deploy_escrow_token()
+    fund_account(escrow_token, buyer, AMOUNT)
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave(escrow_token, lending_pool)
+    escrow.createOrder(AMOUNT, BLOCKS, {"from": account_1}).wait(1)
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(escrow_token, buyer, escrow, AMOUNT, deadline)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": account_1})
+    tx_initiate = escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": buyer})
+    tx_initiate.wait(1)
+    assert escrow.buyer() == buyer
+    assert escrow.status() == 2
+    assert a_token.balanceOf(escrow) == AMOUNT
+    assert escrow_token.balanceOf(buyer) == 0
+
+
+def test_front_run_permit_cant_block_initiation_aave():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    buyer = accounts.add()
+    escrow_token = deploy_escrow_token()
+    fund_account(escrow_token, buyer, AMOUNT)
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave(escrow_token, lending_pool)
+    escrow.createOrder(AMOUNT, BLOCKS, {"from": account_1}).wait(1)
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(escrow_token, buyer, escrow, AMOUNT, deadline)
+    # someone copies the permit from the mempool and submits it first, using its nonce
+    escrow_token.permit(buyer, escrow, AMOUNT, deadline, v, r, s, {"from": account}).wait(1)
+    tx_initiate = escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": buyer})
+    tx_initiate.wait(1)
+    assert escrow.buyer() == buyer
+    assert escrow.status() == 2
+    assert a_token.balanceOf(escrow) == AMOUNT
+
+
+def test_multicall_keeps_sender_aave():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_token = deploy_escrow_token()
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave(escrow_token, lending_pool)
+    escrow.createOrder(AMOUNT, BLOCKS, {"from": account_1}).wait(1)
+    approve_erc20(AMOUNT, escrow, escrow_token, account)
+    escrow.initiateOrder({"from": account}).wait(1)
+    calls = [escrow.sendOrder.encode_input(), escrow.disputeOrder.encode_input()]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account_1, "value": 1})
+    escrow.multicall(calls, {"from": account_1}).wait(1)
+    assert escrow.status() == 6
@@ -0,0 +1,245 @@
+from scripts.escrow_aave.deploy_escrow_aave_pool import (
+    deploy_mock_lending_pool,
+    deploy_escrow_aave_pool,
+    accrue_yield,
+)
+from scripts.escrow_erc20.deploy_escrow_erc20 import deploy_escrow_token, approve_erc20
+
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions
+import pytest
+from web3 import Web3
+
+zero_address = "0x0000000000000000000000000000000000000000"
+AMOUNT = Web3.toWei(1, "ether")
+BLOCKS = 10
+# `EscrowAavePool.VIRTUAL_SHARES`, an order gets this many shares per token when the position has no yield
+VIRTUAL_SHARES = 1000
+
+
+def assert_close(value, expected, tolerance=2):
+    """
+    The virtual shares and assets of the pool take at most a few wei of a payout.
+    """
+    assert abs(value - expected) <= tolerance
+
+
+def deploy_pool(deposit_threshold=0):
+    escrow_token = deploy_escrow_token()
+    lending_pool, a_token = deploy_mock_lending_pool(escrow_token)
+    escrow = deploy_escrow_aave_pool(escrow_token, lending_pool, deposit_threshold)
+    return escrow, escrow_token, lending_pool, a_token
+
+
+def create_initiated_order(escrow, escrow_token, seller, buyer, amount, blocks):
+    tx_create = escrow.createOrder(amount, blocks, {"from": seller})
+    tx_create.wait(1)
+    order_id = tx_create.return_value
+    tx_approve = approve_erc20(amount, escrow, escrow_token, buyer)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder(order_id, {"from": buyer})
+    tx_initiate.wait(1)
+    return order_id
+
+
+def create_sent_order(escrow, escrow_token, seller, buyer, amount, blocks):
+    order_id = create_initiated_order(escrow, escrow_token, seller, buyer, amount, blocks)
+    tx_send = escrow.sendOrder(order_id, {"from": seller})
+    tx_send.wait(1)
+    return order_id
+
+
+def test_deploy_escrow_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    assert escrow.owner() == account
+    assert escrow.token() == escrow_token
+    assert escrow.lendingPool() == lending_pool
+    assert escrow.aToken() == a_token
+    assert escrow_token.allowance(escrow, lending_pool) == 2 ** 256 - 1
+    assert escrow.orderCount() == 0
+
+
+def test_can_create_order_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    tx = escrow.createOrder(AMOUNT, BLOCKS, {"from": account_1})
+    tx.wait(1)
+    assert tx.return_value == 0
+    assert escrow.orders(0) == (1, zero_address, account_1, AMOUNT, 0, 0, BLOCKS)
+
+
+def test_initiate_deposits_to_aave_above_threshold():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool(
+        deposit_threshold=5 * AMOUNT // 2
+    )
+    order_0 = create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    assert escrow.bufferedAmount() == AMOUNT
+    assert a_token.balanceOf(escrow) == 0
+    assert escrow_token.balanceOf(escrow) == AMOUNT
+    tx_create = escrow.createOrder(2 * AMOUNT, BLOCKS, {"from": account_1})
+    tx_create.wait(1)
+    approve_erc20(2 * AMOUNT, escrow, escrow_token, account)
+    tx_initiate = escrow.initiateOrder(tx_create.return_value, {"from": account})
+    tx_initiate.wait(1)
+    assert tx_initiate.events["BufferDeposited"]["_amount"] == 3 * AMOUNT
+    assert escrow.bufferedAmount() == 0
+    assert a_token.balanceOf(escrow) == 3 * AMOUNT
+    assert escrow_token.balanceOf(escrow) == 0
+    assert escrow.totalShares() == 3 * AMOUNT * VIRTUAL_SHARES
+    assert escrow.orderValue(order_0) == AMOUNT
+
+
+def test_settlement_pays_from_buffer_first():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool(deposit_threshold=2 * AMOUNT)
+    create_initiated_order(escrow, escrow_token, account_1, account, 2 * AMOUNT, BLOCKS)
+    order_id = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    assert a_token.balanceOf(escrow) == 2 * AMOUNT
+    assert escrow.bufferedAmount() == AMOUNT
+    tx_receive = escrow.receiveOrder(order_id, {"from": account})
+    tx_receive.wait(1)
+    assert escrow_token.balanceOf(account_1) == AMOUNT
+    assert escrow.bufferedAmount() == 0
+    assert a_token.balanceOf(escrow) == 2 * AMOUNT
+
+
+def test_depositing_buffer_manually_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool(deposit_threshold=10 * AMOUNT)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.depositBuffer({"from": account_1})
+    create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    escrow.depositBuffer({"from": account_1}).wait(1)
+    assert escrow.bufferedAmount() == 0
+    assert a_token.balanceOf(escrow) == AMOUNT
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.setDepositThreshold(0, {"from": account_1})
+
+
+def test_yield_is_distributed_pro_rata_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    order_a = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    order_b = create_sent_order(escrow, escrow_token, account_2, account, 3 * AMOUNT, BLOCKS)
+    # 10% yield on the 4 tokens of the position
+    accrue_yield(lending_pool, escrow_token, 4 * AMOUNT // 10)
+    assert escrow.totalAssets() == 44 * AMOUNT // 10
+    assert_close(escrow.orderValue(order_a), 11 * AMOUNT // 10)
+    assert_close(escrow.orderValue(order_b), 33 * AMOUNT // 10)
+    # an order initiated after the yield gets fewer shares and no past yield
+    order_c = create_sent_order(escrow, escrow_token, account_1, account, 22 * AMOUNT // 10, BLOCKS)
+    assert escrow.orders(order_c)[4] // VIRTUAL_SHARES == 2 * AMOUNT
+    assert_close(escrow.orderValue(order_c), 22 * AMOUNT // 10)
+    escrow.receiveOrder(order_a, {"from": account}).wait(1)
+    assert_close(escrow_token.balanceOf(account_1), 11 * AMOUNT // 10)
+    escrow.receiveOrder(order_b, {"from": account}).wait(1)
+    assert_close(escrow_token.balanceOf(account_2), 33 * AMOUNT // 10)
+    # the last order is paid the rest of the position
+    escrow.receiveOrder(order_c, {"from": account}).wait(1)
+    assert escrow_token.balanceOf(account_1) + escrow_token.balanceOf(account_2) == 66 * AMOUNT // 10
+    assert escrow.totalShares() == 0
+    assert a_token.balanceOf(escrow) == 0
+    assert escrow_token.balanceOf(escrow) == 0
+
+
+def test_can_expire_order_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    order_id = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, 0)
+    tx_expire = escrow.expireOrder(order_id, {"from": account_1})
+    tx_expire.wait(1)
+    assert escrow_token.balanceOf(account_1) == AMOUNT
+    assert escrow.orders(order_id)[0] == 8
+
+
+def test_cant_expire_order_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    order_id = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.expireOrder(order_id, {"from": account_1})
+
+
+def test_only_seller_can_send_order_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    order_id = create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.sendOrder(order_id, {"from": account_2})
+
+
+def test_admin_can_resolve_dispute_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    escrow_token.transfer(account_2, AMOUNT, {"from": account}).wait(1)
+    order_id = create_sent_order(escrow, escrow_token, account_1, account_2, AMOUNT, BLOCKS)
+    accrue_yield(lending_pool, escrow_token, AMOUNT // 10)
+    escrow.disputeOrder(order_id, {"from": account_2}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveDispute(order_id, True, {"from": account_1})
+    tx_resolve = escrow.resolveDispute(order_id, True, {"from": account})
+    tx_resolve.wait(1)
+    assert escrow_token.balanceOf(account_2) == 11 * AMOUNT // 10
+    assert escrow_token.balanceOf(account_1) == 0
+    assert escrow.orders(order_id)[0] == 7
+
+
+def test_donations_cant_inflate_share_price_aave_pool():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    attacker = get_account(index=2)
+    escrow, escrow_token, lending_pool, a_token = deploy_pool()
+    donation = 10 * AMOUNT
+    escrow_token.transfer(attacker, 2 * donation + 1, {"from": account}).wait(1)
+    # the attacker opens a 1 wei first order, then sends aTokens and tokens to the pool directly
+    attacker_order = create_sent_order(escrow, escrow_token, attacker, attacker, 1, BLOCKS)
+    approve_erc20(donation, lending_pool, escrow_token, attacker)
+    lending_pool.deposit(escrow_token, donation, escrow, 0, {"from": attacker}).wait(1)
+    escrow_token.transfer(escrow, donation, {"from": attacker}).wait(1)
+    assert a_token.balanceOf(escrow) == donation + 1
+    assert escrow.totalAssets() == 1
+    # the next order gets its shares as if there was no donation, and its seller is paid in full
+    order_id = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, BLOCKS)
+    assert escrow.orders(order_id)[4] == AMOUNT * VIRTUAL_SHARES
+    escrow.receiveOrder(order_id, {"from": account}).wait(1)
+    assert escrow_token.balanceOf(account_1) == AMOUNT
+    # the attacker only gets its own order back, the donations stay in the pool
+    escrow.receiveOrder(attacker_order, {"from": attacker}).wait(1)
+    assert escrow_token.balanceOf(attacker) == 1
+    assert escrow.scaledDeposits() == 0
+    assert a_token.balanceOf(escrow) == donation
@@ -0,0 +1,220 @@
+from scripts.escrow_erc1155.deploy_escrow_erc1155 import (
+    deploy_and_mint_items,
+    deploy_escrow_erc1155,
+    deploy_escrow_erc1155_factory,
+    create_escrow_erc1155,
+    approve_erc1155,
+    ADMIN_FEE,
+)
+
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions
+import pytest
+from web3 import Web3
+
+zero_address = "0x0000000000000000000000000000000000000000"
+DEPOSIT = 0.1
+BLOCKS = 10
+IDS = [1, 2, 3, 4, 5]
+AMOUNTS = [10, 1, 5, 1, 20]
+
+
+def deploy_and_initiate(blocks=BLOCKS):
+    """
+    Deploys an escrow and items minted to the buyer `account`, the seller `account_1` creates the order of all the items
+    and the buyer initiates it.
+    """
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc1155()
+    escrow_items = deploy_and_mint_items(IDS, AMOUNTS)
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    tx_create = escrow.createOrder(
+        escrow_items, IDS, AMOUNTS, deposit, blocks, {"from": account_1}
+    )
+    tx_create.wait(1)
+    approve_erc1155(escrow_items, escrow, account)
+    tx_initiate = escrow.initiateOrder({"from": account, "value": deposit + admin_fee})
+    tx_initiate.wait(1)
+    return escrow, escrow_items, tx_initiate
+
+
+def balances(escrow_items, owner):
+    return list(escrow_items.balanceOfBatch([owner] * len(IDS), IDS))
+
+
+def test_deploy_escrow_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow_erc1155()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    assert escrow.owner() == account
+    assert escrow.buyer() == zero_address
+    assert escrow.seller() == zero_address
+    assert escrow.status() == 0
+    assert escrow.adminFee() == admin_fee
+    assert escrow.getItems() == ((), ())
+    # ERC1155Receiver interface id
+    assert escrow.supportsInterface("0x4e2312e0")
+
+
+def test_can_create_order_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc1155()
+    escrow_items = deploy_and_mint_items(IDS, AMOUNTS)
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder(escrow_items, IDS, AMOUNTS[:2], deposit, BLOCKS, {"from": account_1})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.createOrder(escrow_items, [], [], deposit, BLOCKS, {"from": account_1})
+    tx = escrow.createOrder(escrow_items, IDS, AMOUNTS, deposit, BLOCKS, {"from": account_1})
+    tx.wait(1)
+    assert escrow.tokenContract() == escrow_items
+    assert escrow.getItems() == (IDS, AMOUNTS)
+    assert escrow.deposit() == deposit
+    assert escrow.seller() == account_1
+    assert escrow.status() == 1
+
+
+def test_can_initiate_order_with_one_batch_transfer_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow, escrow_items, tx_initiate = deploy_and_initiate()
+    assert escrow.buyer() == account
+    assert escrow.status() == 2
+    assert balances(escrow_items, escrow) == AMOUNTS
+    assert balances(escrow_items, account) == [0] * len(IDS)
+    assert len(tx_initiate.events["TransferBatch"]) == 1
+    assert "TransferSingle" not in tx_initiate.events
+
+
+def test_can_receive_order_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_items, _ = deploy_and_initiate()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.sendOrder({"from": account_1}).wait(1)
+    buyer_old_balance = account.balance()
+    tx_receive = escrow.receiveOrder({"from": account})
+    tx_receive.wait(1)
+    assert balances(escrow_items, account_1) == AMOUNTS
+    assert balances(escrow_items, escrow) == [0] * len(IDS)
+    assert len(tx_receive.events["TransferBatch"]) == 1
+    assert account.balance() == buyer_old_balance + deposit
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.status() == 4
+
+
+def test_can_expire_order_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    escrow, escrow_items, _ = deploy_and_initiate(blocks=0)
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    escrow.sendOrder({"from": account_1}).wait(1)
+    seller_old_balance = account_1.balance()
+    escrow.expireOrder({"from": account_1}).wait(1)
+    assert balances(escrow_items, account_1) == AMOUNTS
+    assert account_1.balance() == seller_old_balance + deposit
+    assert escrow.status() == 8
+
+
+def test_buyer_can_cancel_order_before_send_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_items, _ = deploy_and_initiate()
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.cancelBuyOrder({"from": account_1})
+    escrow.cancelBuyOrder({"from": account}).wait(1)
+    assert balances(escrow_items, account) == AMOUNTS
+    assert escrow.status() == 5
+
+
+def test_seller_can_cancel_order_after_send_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_items, _ = deploy_and_initiate()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.sendOrder({"from": account_1}).wait(1)
+    buyer_old_balance = account.balance()
+    escrow.cancelSellOrder({"from": account_1}).wait(1)
+    assert balances(escrow_items, account) == AMOUNTS
+    assert account.balance() == buyer_old_balance + deposit + admin_fee
+    assert escrow.accruedFees() == 0
+    assert escrow.status() == 5
+
+
+def test_admin_can_resolve_dispute_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow, escrow_items, _ = deploy_and_initiate()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.sendOrder({"from": account_1}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.disputeOrder({"from": account_2})
+    escrow.disputeOrder({"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveDispute(True, False, {"from": account_1})
+    seller_old_balance = account_1.balance()
+    escrow.resolveDispute(True, False, {"from": account}).wait(1)
+    assert balances(escrow_items, account) == AMOUNTS
+    assert account_1.balance() == seller_old_balance + deposit
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.status() == 7
+
+
+def test_escrow_rejects_direct_transfers_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc1155()
+    escrow_items = deploy_and_mint_items(IDS, AMOUNTS)
+    tx_create = escrow.createOrder(
+        escrow_items, IDS, AMOUNTS, 0, BLOCKS, {"from": account_1}
+    )
+    tx_create.wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow_items.safeBatchTransferFrom(account, escrow, IDS, AMOUNTS, "", {"from": account})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow_items.safeTransferFrom(account, escrow, IDS[0], 1, "", {"from": account})
+    assert balances(escrow_items, escrow) == [0] * len(IDS)
+
+
+def test_can_clone_escrow_erc1155():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    factory = deploy_escrow_erc1155_factory()
+    escrow_items = deploy_and_mint_items(IDS, AMOUNTS)
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    salt = Web3.keccak(text="order-0")
+    predicted_address = factory.predictEscrowAddress(account, salt)
+    escrow = create_escrow_erc1155(factory, salt)
+    assert escrow.address == predicted_address
+    assert escrow.adminFee() == admin_fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initialize(0, account_1, {"from": account_1})
+    escrow.createOrder(escrow_items, IDS, AMOUNTS, deposit, BLOCKS, {"from": account_1}).wait(1)
+    approve_erc1155(escrow_items, escrow, account)
+    escrow.initiateOrder({"from": account, "value": deposit + admin_fee}).wait(1)
+    assert balances(escrow_items, escrow) == AMOUNTS
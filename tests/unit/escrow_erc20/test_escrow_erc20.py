@@ -1,5 +1,8 @@
 from scripts.escrow_erc20.deploy_escrow_erc20 import (
     deploy_escrow_erc20,
+    deploy_escrow_erc20_registry,
+    deploy_escrow_erc20_factory,
+    create_escrow_erc20,
     fund_account,
     deploy_escrow_token,
     approve_erc20,
@@ -7,7 +10,9 @@ from scripts.escrow_erc20.deploy_escrow_erc20 import (
 )
 
 from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
-from brownie import network, exceptions
+from scripts.eip712 import sign_permit
+from scripts.events import get_events
+from brownie import network, exceptions, accounts, chain, EscrowERC20
 import pytest
 from web3 import Web3
 
@@ -16,6 +21,91 @@ INITIAL_SUPPLY = 1000000000000000000000000
 AMOUNT = 10
 DEPOSIT = 1
 BLOCKS = 10
+# functions acting on an order, they take its orderId first on the registry
+LIFECYCLE = {
+    "initiateOrder",
+    "initiateOrderWithPermit",
+    "sendOrder",
+    "receiveOrder",
+    "expireOrder",
+    "cancelBuyOrder",
+    "cancelSellOrder",
+    "disputeOrder",
+    "resolveDispute",
+}
+# fields of `EscrowERC20Registry.orders(orderId)`, in order
+REGISTRY_FIELDS = ["status", "buyer", "seller", "token", "amount", "deposit", "sendBlock", "numBlocksToExpire"]
+
+
+class OrderDriver:
+    """
+    Runs the same order lifecycle on an `EscrowERC20`, whose functions act on its single order, or on an
+    `EscrowERC20Registry`, whose functions take the orderId of the last order created through the driver.
+    Other attributes are read from the contract.
+    """
+
+    def __init__(self, contract, is_registry):
+        self.contract = contract
+        self.is_registry = is_registry
+        self.order_id = None
+
+    def createOrder(self, *args):
+        tx = self.contract.createOrder(*args)
+        tx.wait(1)
+        if self.is_registry:
+            self.order_id = tx.return_value
+        return tx
+
+    def order(self, field):
+        """
+        Returns `field` of the order, e.g. `order("status")`.
+        """
+        if self.is_registry:
+            return self.contract.orders(self.order_id)[REGISTRY_FIELDS.index(field)]
+        return getattr(self.contract, field)()
+
+    def encode(self, fn_name, *args):
+        return getattr(self.contract, fn_name).encode_input(*self._args(fn_name, args))
+
+    def __getattr__(self, name):
+        method = getattr(self.contract, name)
+        if name not in LIFECYCLE:
+            return method
+        return lambda *args: method(*self._args(name, args))
+
+    def _args(self, fn_name, args):
+        if self.is_registry and fn_name in LIFECYCLE:
+            return (self.order_id, *args)
+        return args
+
+
+@pytest.fixture(params=["single", "registry"])
+def escrow(request):
+    """
+    Each test using it runs against a deployed `EscrowERC20` and against an `EscrowERC20Registry`.
+    """
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    if request.param == "registry":
+        return OrderDriver(deploy_escrow_erc20_registry(), True)
+    return OrderDriver(deploy_escrow_erc20(), False)
+
+
+def create_initiated_order(escrow, escrow_token, seller, buyer, amount, deposit, blocks):
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.createOrder(escrow_token, amount, deposit, blocks, {"from": seller})
+    tx_approve = approve_erc20(amount + deposit, escrow.address, escrow_token, buyer)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder({"from": buyer, "value": admin_fee})
+    tx_initiate.wait(1)
+    return tx_initiate
+
+
+def create_sent_order(escrow, escrow_token, seller, buyer, amount, deposit, blocks):
+    create_initiated_order(escrow, escrow_token, seller, buyer, amount, deposit, blocks)
+    tx_send = escrow.sendOrder({"from": seller})
+    tx_send.wait(1)
+    return tx_send
 
 
 def test_deploy_escrow_erc20():
@@ -42,111 +132,65 @@ def test_deploy_escrow_token():
     assert account_balance == INITIAL_SUPPLY
 
 
-def test_can_create_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_can_create_order_erc20(escrow):
     account = get_account()
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    blocks = 10
-    tx = escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account})
-    tx.wait(1)
-    assert escrow.token() == escrow_token
-    assert escrow.amount() == AMOUNT
-    assert escrow.deposit() == DEPOSIT
-    assert escrow.numBlocksToExpire() == blocks
-    assert escrow.seller() == account
-    assert escrow.buyer() == zero_address
-    assert escrow.status() == 1
-
-
-def test_can_initiate_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+    escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account})
+    assert escrow.order("token") == escrow_token
+    assert escrow.order("amount") == AMOUNT
+    assert escrow.order("deposit") == DEPOSIT
+    assert escrow.order("numBlocksToExpire") == BLOCKS
+    assert escrow.order("seller") == account
+    assert escrow.order("buyer") == zero_address
+    assert escrow.order("status") == 1
+
+
+def test_can_initiate_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    assert escrow.buyer() == account
-    assert escrow_token.balanceOf(escrow) == AMOUNT + DEPOSIT
-    assert escrow.status() == 2
+    create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
+    assert escrow.order("buyer") == account
+    assert escrow_token.balanceOf(escrow.address) == AMOUNT + DEPOSIT
+    assert escrow.order("status") == 2
 
 
-def test_can_send_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_cant_initiate_order_twice_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
-    send_block = tx_send.block_number
-    assert escrow.status() == 3
-    assert escrow.sendBlock() == send_block
+    create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
+    approve_erc20(AMOUNT + DEPOSIT, escrow.address, escrow_token, account)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrder({"from": account, "value": admin_fee})
 
 
-def test_only_seller_can_send_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_can_send_order_erc20(escrow):
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_token = deploy_escrow_token()
+    tx_send = create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
+    assert escrow.order("status") == 3
+    assert escrow.order("sendBlock") == tx_send.block_number
+
+
+def test_only_seller_can_send_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
     account_2 = get_account(index=2)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
+    create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
     with pytest.raises(exceptions.VirtualMachineError):
         escrow.sendOrder({"from": account_2})
 
 
-def test_can_receive_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_can_receive_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
     seller_old_balance = escrow_token.balanceOf(account_1)
     buyer_old_balance = escrow_token.balanceOf(account)
     buyer_old_eth_balance = account.balance()
@@ -154,270 +198,142 @@ def test_can_receive_order_erc20():
     tx_receive.wait(1)
     assert escrow_token.balanceOf(account) == buyer_old_balance + DEPOSIT
     assert escrow_token.balanceOf(account_1) == seller_old_balance + AMOUNT
-    assert account.balance() == buyer_old_eth_balance + admin_fee
-    assert escrow.status() == 4
+    assert account.balance() == buyer_old_eth_balance
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.order("status") == 4
 
 
-def test_can_expire_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_can_expire_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     seller_old_balance = escrow_token.balanceOf(account_1)
     buyer_old_eth_balance = account.balance()
     tx_expire = escrow.expireOrder({"from": account_1})
     tx_expire.wait(1)
     assert escrow_token.balanceOf(account_1) == seller_old_balance + AMOUNT + DEPOSIT
-    assert account.balance() == buyer_old_eth_balance + admin_fee
-    assert escrow.status() == 8
+    assert account.balance() == buyer_old_eth_balance
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.order("status") == 8
 
 
-def test_cant_expire_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_cant_expire_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
     with pytest.raises(exceptions.VirtualMachineError):
         escrow.expireOrder({"from": account_1})
 
 
-def test_buyer_can_cancel_order_before_send_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_buyer_can_cancel_order_before_send_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
     account_2 = get_account(index=2)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     escrow_token.transfer(account_2, AMOUNT + DEPOSIT, {"from": account})
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account_2)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account_2, "value": admin_fee})
-    tx_initiate.wait(1)
+    create_initiated_order(escrow, escrow_token, account_1, account_2, AMOUNT, DEPOSIT, 0)
     buyer_old_balance = escrow_token.balanceOf(account_2)
     admin_old_eth_balance = account.balance()
     tx_cancel = escrow.cancelBuyOrder({"from": account_2})
     tx_cancel.wait(1)
     assert escrow_token.balanceOf(account_2) == buyer_old_balance + AMOUNT + DEPOSIT
-    assert account.balance() == admin_old_eth_balance + admin_fee
-    assert escrow.status() == 1
+    assert account.balance() == admin_old_eth_balance
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.order("status") == 1
+    assert escrow.order("buyer") == zero_address
 
 
-def test_seller_can_cancel_order_after_create_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_seller_can_cancel_order_after_create_erc20(escrow):
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
+    escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1})
     tx_cancel = escrow.cancelSellOrder({"from": account_1})
     tx_cancel.wait(1)
-    assert escrow.status() == 5
+    assert escrow.order("status") == 5
 
 
-def test_seller_can_cancel_order_after_initiate_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_seller_can_cancel_order_after_initiate_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    blocks = 10
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, blocks, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
     buyer_old_balance = escrow_token.balanceOf(account)
     buyer_old_eth_balance = account.balance()
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
+    create_initiated_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
     tx_cancel = escrow.cancelSellOrder({"from": account_1})
     tx_cancel.wait(1)
-    assert escrow.status() == 5
+    assert escrow.order("status") == 5
     assert escrow_token.balanceOf(account) == buyer_old_balance
     assert account.balance() == buyer_old_eth_balance
 
 
-def test_seller_can_cancel_order_after_send_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_seller_can_cancel_order_after_send_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
     buyer_old_balance = escrow_token.balanceOf(account)
     buyer_old_eth_balance = account.balance()
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     tx_cancel = escrow.cancelSellOrder({"from": account_1})
     tx_cancel.wait(1)
-    assert escrow.status() == 5
+    assert escrow.order("status") == 5
     assert escrow_token.balanceOf(account) == buyer_old_balance
     assert account.balance() == buyer_old_eth_balance
 
 
-def test_buyer_can_dispute_order_after_send_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_buyer_can_dispute_order_after_send_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     tx_dispute = escrow.disputeOrder({"from": account})
     tx_dispute.wait(1)
-    assert escrow.status() == 6
+    assert escrow.order("status") == 6
 
 
-def test_seller_can_dispute_order_after_send_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_seller_can_dispute_order_after_send_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     tx_dispute = escrow.disputeOrder({"from": account_1})
     tx_dispute.wait(1)
-    assert escrow.status() == 6
+    assert escrow.order("status") == 6
 
 
-def test_stranger_cant_dispute_order_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_stranger_cant_dispute_order_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
     stranger = get_account(index=2)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     with pytest.raises(exceptions.VirtualMachineError):
         escrow.disputeOrder({"from": stranger})
 
 
-def test_buyer_cant_cancel_order_after_send_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_buyer_cant_cancel_order_after_send_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
-    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, 0)
     with pytest.raises(exceptions.VirtualMachineError):
         escrow.cancelBuyOrder({"from": account})
 
 
-def test_admin_can_resolve_dispute_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_admin_can_resolve_dispute_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
     account_2 = get_account(index=2)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     escrow_token.transfer(account_2, 2 * AMOUNT + DEPOSIT, {"from": account})
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
-    tx_create = escrow.createOrder(
-        escrow_token, 2 * AMOUNT, DEPOSIT, 0, {"from": account_1}
-    )
-    tx_create.wait(1)
-    tx_approve = approve_erc20(2 * AMOUNT + DEPOSIT, escrow, escrow_token, account_2)
-    tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account_2, "value": admin_fee})
-    tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account_2, 2 * AMOUNT, DEPOSIT, 0)
     tx_dispute = escrow.disputeOrder({"from": account_2})
     tx_dispute.wait(1)
-    buyer_refund = AMOUNT + DEPOSIT  # 0.01
+    buyer_refund = AMOUNT + DEPOSIT
     seller_old_balance = escrow_token.balanceOf(account_1)
     buyer_old_balance = escrow_token.balanceOf(account_2)
     admin_old_balance = account.balance()
@@ -425,35 +341,197 @@ def test_admin_can_resolve_dispute_erc20():
     tx_resolve.wait(1)
     assert escrow_token.balanceOf(account_2) == buyer_old_balance + buyer_refund
     assert escrow_token.balanceOf(account_1) == seller_old_balance + AMOUNT
-    assert account.balance() == admin_old_balance + admin_fee
-    assert escrow.status() == 7
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.order("status") == 7
 
 
-def test_non_admin_cant_resolve_dispute_erc20():
-    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
-        pytest.skip()
+def test_non_admin_cant_resolve_dispute_erc20(escrow):
     account = get_account()
     account_1 = get_account(index=1)
     account_2 = get_account(index=2)
-    escrow = deploy_escrow_erc20()
     escrow_token = deploy_escrow_token()
     escrow_token.transfer(account_2, 2 * AMOUNT + DEPOSIT, {"from": account})
+    create_sent_order(escrow, escrow_token, account_1, account_2, 2 * AMOUNT, DEPOSIT, 0)
+    tx_dispute = escrow.disputeOrder({"from": account_2})
+    tx_dispute.wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveDispute(AMOUNT + DEPOSIT, {"from": account_1})
+
+
+def test_pull_payments_credit_and_withdraw_erc20(escrow):
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.setPullPayments(True, {"from": account}).wait(1)
+    create_sent_order(escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
+    buyer_old_balance = escrow_token.balanceOf(account)
+    buyer_old_eth_balance = account.balance()
+    tx_receive = escrow.receiveOrder({"from": account})
+    tx_receive.wait(1)
+    assert escrow_token.balanceOf(account) == buyer_old_balance
+    assert escrow.pendingWithdrawals(account, escrow_token) == DEPOSIT
+    assert escrow.pendingWithdrawals(account, zero_address) == 0
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.pendingWithdrawals(account_1, escrow_token) == AMOUNT
+    tx_withdraw = escrow.withdraw([escrow_token, zero_address], {"from": account})
+    tx_withdraw.wait(1)
+    assert escrow_token.balanceOf(account) == buyer_old_balance + DEPOSIT
+    assert account.balance() == buyer_old_eth_balance
+    escrow.withdraw([escrow_token], {"from": account_1}).wait(1)
+    assert escrow_token.balanceOf(account_1) == AMOUNT
+    assert escrow_token.balanceOf(escrow.address) == 0
+
+
+def test_can_clone_escrow_erc20():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    factory = deploy_escrow_erc20_factory()
+    escrow_token = deploy_escrow_token()
     admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    salt = Web3.keccak(text="order-0")
+    predicted_address = factory.predictEscrowAddress(account, salt)
+    assert factory.predictEscrowAddress(account_1, salt) != predicted_address
+    escrow = create_escrow_erc20(factory, salt)
+    assert escrow.address == predicted_address
+    assert escrow.owner() == account
+    assert escrow.adminFee() == admin_fee
+    assert escrow.numBlocksToExpire() == 1
+    assert escrow.status() == 0
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initialize(0, account_1, {"from": account_1})
+    with pytest.raises(exceptions.VirtualMachineError):
+        create_escrow_erc20(factory, salt)
     tx_create = escrow.createOrder(
-        escrow_token, 2 * AMOUNT, DEPOSIT, 0, {"from": account_1}
+        escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1}
     )
     tx_create.wait(1)
-    tx_approve = approve_erc20(2 * AMOUNT + DEPOSIT, escrow, escrow_token, account_2)
+    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow, escrow_token, account)
     tx_approve.wait(1)
-    tx_initiate = escrow.initiateOrder({"from": account_2, "value": admin_fee})
+    tx_initiate = escrow.initiateOrder({"from": account, "value": admin_fee})
     tx_initiate.wait(1)
-    tx_send = escrow.sendOrder({"from": account_1})
-    tx_send.wait(1)
-    tx_dispute = escrow.disputeOrder({"from": account_2})
-    tx_dispute.wait(1)
-    buyer_refund = AMOUNT + DEPOSIT  # 0.01
-    seller_old_balance = escrow_token.balanceOf(account_1)
-    buyer_old_balance = escrow_token.balanceOf(account_2)
-    admin_old_balance = account.balance()
+    assert escrow.buyer() == account
+    assert escrow_token.balanceOf(escrow) == AMOUNT + DEPOSIT
+
+
+def test_clone_must_be_initialized_erc20():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    factory = deploy_escrow_erc20_factory()
+    escrow_token = deploy_escrow_token()
+    implementation = EscrowERC20.at(factory.implementation())
+    salt = Web3.keccak(text="order-0")
+    # any other call than `initialize` would leave the clone without owner, for anyone to initialize
+    for init_data in (
+        implementation.createOrder.encode_input(escrow_token, AMOUNT, DEPOSIT, BLOCKS),
+        implementation.initialize.encode_input(0, zero_address),
+    ):
+        with pytest.raises(exceptions.VirtualMachineError):
+            factory.createEscrow(salt, init_data, {"from": account})
+    escrow = create_escrow_erc20(factory, salt)
+    assert escrow.owner() == account
+
+
+def test_cant_initialize_deployed_escrow_erc20():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc20()
     with pytest.raises(exceptions.VirtualMachineError):
-        escrow.resolveDispute(buyer_refund, {"from": account_1})
+        escrow.initialize(0, account_1, {"from": account_1})
+
+
+def test_can_initiate_order_with_permit_erc20(escrow):
+    account = get_account()
+    account_1 = get_account(index=1)
+    buyer = accounts.add()
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    account.transfer(buyer, admin_fee).wait(1)
+    fund_account(escrow_token, buyer, AMOUNT + DEPOSIT)
+    escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1})
+    expired = chain.time() - 1
+    v, r, s = sign_permit(escrow_token, buyer, escrow.address, AMOUNT + DEPOSIT, expired)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrderWithPermit(expired, v, r, s, {"from": buyer, "value": admin_fee})
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(escrow_token, buyer, escrow.address, AMOUNT, deadline)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": buyer, "value": admin_fee})
+    v, r, s = sign_permit(escrow_token, buyer, escrow.address, AMOUNT + DEPOSIT, deadline)
+    tx_initiate = escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": buyer, "value": admin_fee})
+    tx_initiate.wait(1)
+    assert escrow.order("buyer") == buyer
+    assert escrow.order("status") == 2
+    assert escrow_token.balanceOf(escrow.address) == AMOUNT + DEPOSIT
+    assert escrow_token.nonces(buyer) == 1
+
+
+def test_front_run_permit_cant_block_initiation_erc20(escrow):
+    account = get_account()
+    account_1 = get_account(index=1)
+    buyer = accounts.add()
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    account.transfer(buyer, admin_fee).wait(1)
+    fund_account(escrow_token, buyer, AMOUNT + DEPOSIT)
+    escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1})
+    deadline = chain.time() + 3600
+    v, r, s = sign_permit(escrow_token, buyer, escrow.address, AMOUNT + DEPOSIT, deadline)
+    # someone copies the permit from the mempool and submits it first, using its nonce
+    escrow_token.permit(buyer, escrow.address, AMOUNT + DEPOSIT, deadline, v, r, s, {"from": account}).wait(1)
+    assert escrow_token.nonces(buyer) == 1
+    tx_initiate = escrow.initiateOrderWithPermit(deadline, v, r, s, {"from": buyer, "value": admin_fee})
+    tx_initiate.wait(1)
+    assert escrow.order("buyer") == buyer
+    assert escrow.order("status") == 2
+    assert escrow_token.balanceOf(escrow.address) == AMOUNT + DEPOSIT
+
+
+def test_multicall_keeps_sender_and_cant_reuse_msg_value_erc20(escrow):
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1})
+    tx_approve = approve_erc20(AMOUNT + DEPOSIT, escrow.address, escrow_token, account)
+    tx_approve.wait(1)
+    initiate = [escrow.encode("initiateOrder")]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(initiate, {"from": account, "value": admin_fee})
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(initiate, {"from": account})
+    escrow.initiateOrder({"from": account, "value": admin_fee}).wait(1)
+    calls = [escrow.encode("sendOrder"), escrow.encode("disputeOrder")]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account})
+    tx_multicall = escrow.multicall(calls, {"from": account_1})
+    tx_multicall.wait(1)
+    assert escrow.order("status") == 6
+
+
+def test_can_filter_escrow_clones_by_seller_topic():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    factory = deploy_escrow_erc20_factory()
+    escrow_token = deploy_escrow_token()
+    from_block = chain.height
+    escrow_a = create_escrow_erc20(factory, Web3.keccak(text="order-a"))
+    escrow_b = create_escrow_erc20(factory, Web3.keccak(text="order-b"))
+    escrow_a.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1}).wait(1)
+    escrow_b.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_2}).wait(1)
+    events = get_events(
+        escrow_a, ["OrderCreated"], from_block, address=[], _seller=account_1
+    )
+    assert [event.address for event in events] == [escrow_a.address]
+    assert events[0]["_token"] == escrow_token
+    events = get_events(
+        escrow_a, ["OrderCreated"], from_block, address=[], _token=escrow_token
+    )
+    assert [event.address for event in events] == [escrow_a.address, escrow_b.address]
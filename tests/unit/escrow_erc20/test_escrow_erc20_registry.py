@@ -0,0 +1,171 @@
+from scripts.escrow_erc20.deploy_escrow_erc20 import (
+    deploy_escrow_erc20_registry,
+    deploy_escrow_token,
+    deploy_misbehaving_token,
+    approve_erc20,
+    ADMIN_FEE,
+)
+
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions
+import pytest
+from web3 import Web3
+
+# the lifecycle of an order is tested on both EscrowERC20 and EscrowERC20Registry in test_escrow_erc20.py,
+# this module only has the cases specific to the registry : order ids and balances pooled across orders.
+zero_address = "0x0000000000000000000000000000000000000000"
+AMOUNT = 10
+DEPOSIT = 1
+BLOCKS = 10
+
+
+def create_initiated_order(escrow, escrow_token, seller, buyer, amount, deposit, blocks):
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    tx_create = escrow.createOrder(
+        escrow_token, amount, deposit, blocks, {"from": seller}
+    )
+    tx_create.wait(1)
+    order_id = tx_create.return_value
+    tx_approve = approve_erc20(amount + deposit, escrow, escrow_token, buyer)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder(order_id, {"from": buyer, "value": admin_fee})
+    tx_initiate.wait(1)
+    return order_id
+
+
+def create_sent_order(escrow, escrow_token, seller, buyer, amount, deposit, blocks):
+    order_id = create_initiated_order(
+        escrow, escrow_token, seller, buyer, amount, deposit, blocks
+    )
+    tx_send = escrow.sendOrder(order_id, {"from": seller})
+    tx_send.wait(1)
+    return order_id
+
+
+def test_deploy_escrow_erc20_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow_erc20_registry()
+    assert escrow.owner() == account
+    assert escrow.adminFee() == Web3.toWei(ADMIN_FEE, "ether")
+    assert escrow.orderCount() == 0
+
+
+def test_can_create_order_erc20_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow_erc20_registry()
+    escrow_token = deploy_escrow_token()
+    tx = escrow.createOrder(escrow_token, AMOUNT, DEPOSIT, BLOCKS, {"from": account})
+    tx.wait(1)
+    assert tx.return_value == 0
+    assert escrow.orderCount() == 1
+    (
+        status,
+        buyer,
+        seller,
+        token,
+        amount,
+        deposit,
+        send_block,
+        num_blocks_to_expire,
+    ) = escrow.orders(0)
+    assert status == 1
+    assert buyer == zero_address
+    assert seller == account
+    assert token == escrow_token
+    assert amount == AMOUNT
+    assert deposit == DEPOSIT
+    assert send_block == 0
+    assert num_blocks_to_expire == BLOCKS
+
+
+def test_concurrent_orders_across_tokens_erc20_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_erc20_registry()
+    token_a = deploy_escrow_token()
+    token_b = deploy_escrow_token()
+    token_b.transfer(account_2, 2 * AMOUNT + DEPOSIT, {"from": account})
+    order_a = create_sent_order(
+        escrow, token_a, account_1, account, AMOUNT, DEPOSIT, BLOCKS
+    )
+    order_b = create_sent_order(
+        escrow, token_b, account_1, account_2, 2 * AMOUNT, DEPOSIT, BLOCKS
+    )
+    assert order_b == order_a + 1
+    assert escrow.orderCount() == 2
+    assert token_a.balanceOf(escrow) == AMOUNT + DEPOSIT
+    assert token_b.balanceOf(escrow) == 2 * AMOUNT + DEPOSIT
+    escrow.receiveOrder(order_b, {"from": account_2}).wait(1)
+    assert escrow.orders(order_a)[0] == 3
+    assert escrow.orders(order_b)[0] == 4
+    assert token_a.balanceOf(escrow) == AMOUNT + DEPOSIT
+    assert token_b.balanceOf(escrow) == 0
+    assert token_b.balanceOf(account_1) == 2 * AMOUNT
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.receiveOrder(order_a, {"from": account_2})
+    escrow.receiveOrder(order_a, {"from": account}).wait(1)
+    assert token_a.balanceOf(escrow) == 0
+    assert token_a.balanceOf(account_1) == AMOUNT
+
+
+def test_owner_can_withdraw_fees_of_many_orders_erc20_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_erc20_registry()
+    escrow_token = deploy_escrow_token()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    for _ in range(3):
+        order_id = create_sent_order(
+            escrow, escrow_token, account_1, account, AMOUNT, DEPOSIT, BLOCKS
+        )
+        escrow.receiveOrder(order_id, {"from": account}).wait(1)
+    assert escrow.accruedFees() == 3 * admin_fee
+    assert escrow.balance() == 3 * admin_fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.withdrawFees(account_1, {"from": account_1})
+    receiver_old_balance = account_2.balance()
+    escrow.withdrawFees(account_2, {"from": account}).wait(1)
+    assert account_2.balance() == receiver_old_balance + 3 * admin_fee
+    assert escrow.accruedFees() == 0
+    assert escrow.balance() == 0
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.withdrawFees(account_2, {"from": account})
+
+
+def test_cant_initiate_without_paying_erc20_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_erc20_registry()
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    token = deploy_misbehaving_token()
+    token.transfer(account_2, AMOUNT + DEPOSIT, {"from": account}).wait(1)
+    # an honest order holds funds of the same token in the registry
+    create_initiated_order(escrow, token, account_1, account, AMOUNT, DEPOSIT, BLOCKS)
+    tx_create = escrow.createOrder(token, AMOUNT, DEPOSIT, BLOCKS, {"from": account_1})
+    tx_create.wait(1)
+    order_id = tx_create.return_value
+    approve_erc20(AMOUNT + DEPOSIT, escrow, token, account_2)
+    # transfers returning false revert instead of initiating an unpaid order
+    token.setBehaviour(True, 0, {"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrder(order_id, {"from": account_2, "value": admin_fee})
+    # fee-on-transfer tokens are rejected, the registry would receive less than the order books
+    token.setBehaviour(False, 1000, {"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initiateOrder(order_id, {"from": account_2, "value": admin_fee})
+    assert escrow.orders(order_id)[0] == 1
+    assert token.balanceOf(escrow) == AMOUNT + DEPOSIT
+    assert token.balanceOf(account_2) == AMOUNT + DEPOSIT
@@ -2,6 +2,8 @@ from scripts.escrow_erc721.deploy_and_create_erc721 import (
     deploy_and_create_nft,
     deploy_escrow_erc721,
     deploy_escrow_and_erc721,
+    deploy_escrow_erc721_factory,
+    create_escrow_erc721,
     approve_erc721,
     ADMIN_FEE,
 )
@@ -145,7 +147,8 @@ def test_can_receive_order_erc721():
     tx_receive.wait(1)
     erc721 = interface.IERC721(escrow_nft)
     assert erc721.ownerOf(0) == account_1
-    assert account.balance() == buyer_old_balance + admin_fee + deposit
+    assert account.balance() == buyer_old_balance + deposit
+    assert escrow.accruedFees() == admin_fee
     assert escrow.status() == 4
 
 
@@ -171,7 +174,8 @@ def test_can_expire_order_erc721():
     tx_expire.wait(1)
     erc721 = interface.IERC721(escrow_nft)
     assert erc721.ownerOf(0) == account_1
-    assert account.balance() == buyer_old_balance + admin_fee
+    assert account.balance() == buyer_old_balance
+    assert escrow.accruedFees() == admin_fee
     assert account_1.balance() == seller_old_balance + deposit
     assert escrow.status() == 8
 
@@ -217,7 +221,8 @@ def test_buyer_can_cancel_order_before_send_erc721():
     tx_cancel.wait(1)
     erc721 = interface.IERC721(escrow_nft)
     assert erc721.ownerOf(0) == account
-    assert account.balance() == admin_old_eth_balance + admin_fee + deposit
+    assert account.balance() == admin_old_eth_balance + deposit
+    assert escrow.accruedFees() == admin_fee
     assert escrow.status() == 5
 
 
@@ -406,7 +411,8 @@ def test_admin_can_resolve_dispute_erc721_frist_case():
     )
     tx_resolve.wait(1)
     assert erc721.ownerOf(0) == account_2
-    assert account.balance() == admin_old_balance + admin_fee
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
     assert account_1.balance() == seller_old_balance + deposit
     assert escrow.status() == 7
 
@@ -444,7 +450,8 @@ def test_admin_can_resolve_dispute_erc721_second_case():
     )
     tx_resolve.wait(1)
     assert erc721.ownerOf(0) == account_2
-    assert account.balance() == admin_old_balance + admin_fee
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
     assert account_2.balance() == buyer_old_balance + deposit
     assert escrow.status() == 7
 
@@ -482,7 +489,8 @@ def test_admin_can_resolve_dispute_erc721_third_case():
     )
     tx_resolve.wait(1)
     assert erc721.ownerOf(0) == account_1
-    assert account.balance() == admin_old_balance + admin_fee
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
     assert account_2.balance() == buyer_old_balance + deposit
     assert escrow.status() == 7
 
@@ -520,7 +528,8 @@ def test_admin_can_resolve_dispute_erc721_fourth_case():
     )
     tx_resolve.wait(1)
     assert erc721.ownerOf(0) == account_1
-    assert account.balance() == admin_old_balance + admin_fee
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
     assert account_1.balance() == seller_old_balance + deposit
     assert escrow.status() == 7
 
@@ -555,3 +564,86 @@ def test_non_admin_cant_resolve_dispute_erc721():
         escrow.resolveDispute(
             buyer_refund_token, buyer_refund_deposit, {"from": account_1}
         )
+
+
+def test_pull_payments_credit_and_withdraw_erc721():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_nft = deploy_escrow_and_erc721()
+    blocks = BLOCKS
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    escrow.setPullPayments(True, {"from": account}).wait(1)
+    tx_create = escrow.createOrder(escrow_nft, 0, deposit, blocks, {"from": account_1})
+    tx_create.wait(1)
+    tx_approve = approve_erc721(escrow_nft, 0, escrow, account)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder({"from": account, "value": deposit + admin_fee})
+    tx_initiate.wait(1)
+    tx_send = escrow.sendOrder({"from": account_1})
+    tx_send.wait(1)
+    buyer_old_balance = account.balance()
+    tx_receive = escrow.receiveOrder({"from": account})
+    tx_receive.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == account_1
+    assert account.balance() == buyer_old_balance
+    assert escrow.pendingWithdrawals(account, zero_address) == deposit
+    assert escrow.accruedFees() == admin_fee
+    tx_withdraw = escrow.withdraw([zero_address], {"from": account})
+    tx_withdraw.wait(1)
+    assert account.balance() == buyer_old_balance + deposit
+    assert escrow.balance() == admin_fee
+
+
+def test_can_clone_escrow_erc721():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    factory = deploy_escrow_erc721_factory()
+    escrow_nft = deploy_and_create_nft()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    salt = Web3.keccak(text="order-0")
+    predicted_address = factory.predictEscrowAddress(account, salt)
+    escrow = create_escrow_erc721(factory, salt)
+    assert escrow.address == predicted_address
+    assert escrow.owner() == account
+    assert escrow.adminFee() == admin_fee
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.initialize(0, account_1, {"from": account_1})
+    tx_create = escrow.createOrder(escrow_nft, 0, deposit, BLOCKS, {"from": account_1})
+    tx_create.wait(1)
+    tx_approve = approve_erc721(escrow_nft, 0, escrow, account)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder({"from": account, "value": deposit + admin_fee})
+    tx_initiate.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == escrow
+    assert escrow.buyer() == account
+
+
+def test_multicall_keeps_sender_and_cant_reuse_msg_value_erc721():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow, escrow_nft = deploy_escrow_and_erc721()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    tx_create = escrow.createOrder(escrow_nft, 0, deposit, BLOCKS, {"from": account_1})
+    tx_create.wait(1)
+    tx_approve = approve_erc721(escrow_nft, 0, escrow, account)
+    tx_approve.wait(1)
+    initiate = [escrow.initiateOrder.encode_input()]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(initiate, {"from": account, "value": deposit + admin_fee})
+    escrow.initiateOrder({"from": account, "value": deposit + admin_fee}).wait(1)
+    calls = [escrow.sendOrder.encode_input(), escrow.disputeOrder.encode_input()]
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.multicall(calls, {"from": account})
+    escrow.multicall(calls, {"from": account_1}).wait(1)
+    assert escrow.status() == 6
@@ -0,0 +1,312 @@
+from scripts.escrow_erc721.deploy_and_create_erc721 import (
+    deploy_and_create_nft,
+    deploy_escrow_erc721_registry,
+    approve_erc721,
+    ADMIN_FEE,
+)
+
+from scripts.helpful_scripts import get_account, LOCAL_BLOCKCHAIN_ENVIRONMENTS
+from brownie import network, exceptions, interface
+import pytest
+from web3 import Web3
+
+zero_address = "0x0000000000000000000000000000000000000000"
+DEPOSIT = 0.1
+BLOCKS = 10
+
+
+def create_initiated_order(escrow, escrow_nft, token_id, seller, buyer, blocks):
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    tx_create = escrow.createOrder(
+        escrow_nft, token_id, deposit, blocks, {"from": seller}
+    )
+    tx_create.wait(1)
+    order_id = tx_create.return_value
+    tx_approve = approve_erc721(escrow_nft, token_id, escrow, buyer)
+    tx_approve.wait(1)
+    tx_initiate = escrow.initiateOrder(
+        order_id, {"from": buyer, "value": deposit + admin_fee}
+    )
+    tx_initiate.wait(1)
+    return order_id
+
+
+def create_sent_order(escrow, escrow_nft, token_id, seller, buyer, blocks):
+    order_id = create_initiated_order(
+        escrow, escrow_nft, token_id, seller, buyer, blocks
+    )
+    tx_send = escrow.sendOrder(order_id, {"from": seller})
+    tx_send.wait(1)
+    return order_id
+
+
+def test_deploy_escrow_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow_erc721_registry()
+    assert escrow.owner() == account
+    assert escrow.adminFee() == Web3.toWei(ADMIN_FEE, "ether")
+    assert escrow.orderCount() == 0
+
+
+def test_can_create_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    tx = escrow.createOrder(escrow_nft, 0, deposit, BLOCKS, {"from": account})
+    tx.wait(1)
+    assert tx.return_value == 0
+    (
+        status,
+        buyer,
+        seller,
+        token_contract,
+        token_id,
+        order_deposit,
+        send_block,
+        num_blocks_to_expire,
+    ) = escrow.orders(0)
+    assert status == 1
+    assert buyer == zero_address
+    assert seller == account
+    assert token_contract == escrow_nft
+    assert token_id == 0
+    assert order_deposit == deposit
+    assert send_block == 0
+    assert num_blocks_to_expire == BLOCKS
+
+
+def test_can_initiate_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    order_id = create_initiated_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    erc721 = interface.IERC721(escrow_nft)
+    assert escrow.orders(order_id)[1] == account
+    assert erc721.ownerOf(0) == escrow
+    assert escrow.orders(order_id)[0] == 2
+
+
+def test_only_seller_can_send_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    order_id = create_initiated_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.sendOrder(order_id, {"from": account_2})
+    tx_send = escrow.sendOrder(order_id, {"from": account_1})
+    tx_send.wait(1)
+    assert escrow.orders(order_id)[0] == 3
+    assert escrow.orders(order_id)[6] == tx_send.block_number
+
+
+def test_can_receive_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    buyer_old_balance = account.balance()
+    tx_receive = escrow.receiveOrder(order_id, {"from": account})
+    tx_receive.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == account_1
+    assert account.balance() == buyer_old_balance + deposit
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.orders(order_id)[0] == 4
+
+
+def test_can_expire_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, 0)
+    seller_old_balance = account_1.balance()
+    buyer_old_balance = account.balance()
+    tx_expire = escrow.expireOrder(order_id, {"from": account_1})
+    tx_expire.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == account_1
+    assert account.balance() == buyer_old_balance
+    assert escrow.accruedFees() == admin_fee
+    assert account_1.balance() == seller_old_balance + deposit
+    assert escrow.orders(order_id)[0] == 8
+
+
+def test_cant_expire_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.expireOrder(order_id, {"from": account_1})
+
+
+def test_buyer_can_cancel_order_before_send_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    order_id = create_initiated_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    admin_old_eth_balance = account.balance()
+    tx_cancel = escrow.cancelBuyOrder(order_id, {"from": account})
+    tx_cancel.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == account
+    assert account.balance() == admin_old_eth_balance + deposit
+    assert escrow.accruedFees() == admin_fee
+    assert escrow.orders(order_id)[0] == 5
+
+
+def test_seller_can_cancel_order_after_send_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    buyer_old_balance = account.balance()
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    tx_cancel = escrow.cancelSellOrder(order_id, {"from": account_1})
+    tx_cancel.wait(1)
+    erc721 = interface.IERC721(escrow_nft)
+    assert erc721.ownerOf(0) == account
+    assert account.balance() == buyer_old_balance
+    assert escrow.orders(order_id)[0] == 5
+
+
+def test_stranger_cant_dispute_order_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    stranger = get_account(index=2)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.disputeOrder(order_id, {"from": stranger})
+    tx_dispute = escrow.disputeOrder(order_id, {"from": account_1})
+    tx_dispute.wait(1)
+    assert escrow.orders(order_id)[0] == 6
+
+
+def resolve_dispute_case(buyer_refund_token, buyer_refund_deposit):
+    account = get_account()
+    account_1 = get_account(index=1)
+    account_2 = get_account(index=2)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    erc721 = interface.IERC721(escrow_nft)
+    erc721.transferFrom(account, account_2, 0, {"from": account})
+    deposit = Web3.toWei(DEPOSIT, "ether")
+    admin_fee = Web3.toWei(ADMIN_FEE, "ether")
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account_2, BLOCKS)
+    tx_dispute = escrow.disputeOrder(order_id, {"from": account_2})
+    tx_dispute.wait(1)
+    seller_old_balance = account_1.balance()
+    buyer_old_balance = account_2.balance()
+    admin_old_balance = account.balance()
+    tx_resolve = escrow.resolveDispute(
+        order_id, buyer_refund_token, buyer_refund_deposit, {"from": account}
+    )
+    tx_resolve.wait(1)
+    assert erc721.ownerOf(0) == (account_2 if buyer_refund_token else account_1)
+    assert account.balance() == admin_old_balance
+    assert escrow.accruedFees() == admin_fee
+    if buyer_refund_deposit:
+        assert account_2.balance() == buyer_old_balance + deposit
+        assert account_1.balance() == seller_old_balance
+    else:
+        assert account_2.balance() == buyer_old_balance
+        assert account_1.balance() == seller_old_balance + deposit
+    assert escrow.orders(order_id)[0] == 7
+
+
+def test_admin_can_resolve_dispute_erc721_registry_frist_case():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    resolve_dispute_case(True, False)
+
+
+def test_admin_can_resolve_dispute_erc721_registry_second_case():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    resolve_dispute_case(True, True)
+
+
+def test_admin_can_resolve_dispute_erc721_registry_third_case():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    resolve_dispute_case(False, True)
+
+
+def test_admin_can_resolve_dispute_erc721_registry_fourth_case():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    resolve_dispute_case(False, False)
+
+
+def test_non_admin_cant_resolve_dispute_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    escrow_nft = deploy_and_create_nft()
+    order_id = create_sent_order(escrow, escrow_nft, 0, account_1, account, BLOCKS)
+    escrow.disputeOrder(order_id, {"from": account}).wait(1)
+    with pytest.raises(exceptions.VirtualMachineError):
+        escrow.resolveDispute(order_id, True, True, {"from": account_1})
+
+
+def test_concurrent_orders_across_collections_erc721_registry():
+    if network.show_active() not in LOCAL_BLOCKCHAIN_ENVIRONMENTS:
+        pytest.skip()
+    account = get_account()
+    account_1 = get_account(index=1)
+    escrow = deploy_escrow_erc721_registry()
+    nft_a = deploy_and_create_nft()
+    nft_b = deploy_and_create_nft()
+    nft_b.createNFT({"from": account}).wait(1)
+    order_a = create_sent_order(escrow, nft_a, 0, account_1, account, BLOCKS)
+    order_b = create_sent_order(escrow, nft_b, 0, account_1, account, BLOCKS)
+    order_c = create_initiated_order(escrow, nft_b, 1, account_1, account, BLOCKS)
+    assert escrow.orderCount() == 3
+    assert interface.IERC721(nft_a).ownerOf(0) == escrow
+    assert interface.IERC721(nft_b).ownerOf(0) == escrow
+    assert interface.IERC721(nft_b).ownerOf(1) == escrow
+    escrow.receiveOrder(order_b, {"from": account}).wait(1)
+    escrow.cancelBuyOrder(order_c, {"from": account}).wait(1)
+    assert interface.IERC721(nft_b).ownerOf(0) == account_1
+    assert interface.IERC721(nft_b).ownerOf(1) == account
+    assert interface.IERC721(nft_a).ownerOf(0) == escrow
+    assert escrow.orders(order_a)[0] == 3